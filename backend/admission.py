@@ -0,0 +1,272 @@
+"""
+Load reporting and job admission for the agent worker.
+
+LiveKit's default load function reports host CPU, which says little about
+whether one more session still gets its audio on time. AdmissionPolicy
+scores the worker on what actually breaks a session instead:
+
+- active sessions against a configured ceiling,
+- event-loop lag inside the job processes, where audio frames are paced,
+- memory: what the running sessions hold against what the host has left.
+
+Each job process runs a LoadReporter that samples its own loop lag and RSS
+and writes them to a small file in a directory the worker process owns;
+the worker reads those files when the agents framework polls load_fnc.
+The load is the highest of the three ratios, so the worker reports itself
+full (load 1.0) as soon as any limit is reached, and request_fnc rejects
+jobs that would go over one in the meantime, e.g. several dispatches
+arriving between two load polls.
+"""
+
+import asyncio
+import atexit
+import glob
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger("voice-cloning-agent")
+
+# Set by the worker process, inherited by its job processes
+LOAD_DIR_ENV = "VOICE_AGENT_LOAD_DIR"
+
+# Seconds between loop lag probes in a job process
+_PROBE_INTERVAL = 0.05
+# Seconds between report writes, and the window the reported lag covers
+_REPORT_INTERVAL = 1.0
+_LAG_WINDOW = 5.0
+# Reports older than this belong to a job that stopped without cleaning up
+_REPORT_MAX_AGE = 5.0
+# Seconds an accepted job may take to show up in the worker's active jobs
+# before it is assumed to have failed to start
+_ACCEPT_GRACE = 30.0
+
+
+@dataclass
+class JobLoad:
+    """What one job process last reported."""
+
+    pid: int
+    lag_ms: float
+    rss: int
+
+
+@dataclass
+class LoadSample:
+    """Worker load as scored by AdmissionPolicy."""
+
+    load: float
+    sessions: int
+    lag_ms: float
+    session_rss: int
+    # Which limit is closest: sessions, loop_lag or memory
+    limit: str
+
+
+class LoadReporter:
+    """Samples this job process's event-loop lag and RSS and publishes them to the worker."""
+
+    def __init__(self, load_dir: str) -> None:
+        self.path = os.path.join(load_dir, f"{os.getpid()}.json")
+        self._lags: Deque[Tuple[float, float]] = deque()
+        self._process = psutil.Process()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def lag_ms(self) -> float:
+        """90th percentile loop lag over the recent window, in milliseconds."""
+        if not self._lags:
+            return 0.0
+        lags = sorted(lag for _, lag in self._lags)
+        return lags[int(0.9 * (len(lags) - 1))] * 1000
+
+    async def _run(self) -> None:
+        next_report = 0.0
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(_PROBE_INTERVAL)
+            now = time.perf_counter()
+            self._lags.append((now, now - start - _PROBE_INTERVAL))
+            while self._lags[0][0] < now - _LAG_WINDOW:
+                self._lags.popleft()
+            if now >= next_report:
+                next_report = now + _REPORT_INTERVAL
+                self._write()
+
+    def _write(self) -> None:
+        report = {"lag_ms": self.lag_ms(), "rss": self._process.memory_info().rss, "time": time.time()}
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(report, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f"Could not write load report: {e}")
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def start_load_reporter() -> Optional[LoadReporter]:
+    """Start reporting this job's load, if the worker asked for reports."""
+    load_dir = os.environ.get(LOAD_DIR_ENV)
+    if not load_dir:
+        return None
+    reporter = LoadReporter(load_dir)
+    reporter.start()
+    return reporter
+
+
+def read_job_loads(load_dir: str) -> List[JobLoad]:
+    """Fresh reports from live job processes; stale ones are removed."""
+    loads = []
+    now = time.time()
+    for path in glob.glob(os.path.join(load_dir, "*.json")):
+        try:
+            pid = int(os.path.basename(path)[:-len(".json")])
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - report["time"] > _REPORT_MAX_AGE or not psutil.pid_exists(pid):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        loads.append(JobLoad(pid, report["lag_ms"], report["rss"]))
+    return loads
+
+
+class AdmissionPolicy:
+    """Scores worker load from sessions, loop lag and memory, and turns away jobs past any limit."""
+
+    def __init__(
+        self,
+        max_sessions: int,
+        max_loop_lag_ms: float,
+        min_free_memory_mb: float,
+        load_dir: Optional[str] = None,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.min_free_memory = int(min_free_memory_mb * 2**20)
+        self.load_dir = load_dir or os.path.join(tempfile.gettempdir(), f"voice-agent-load-{os.getpid()}")
+        self.last: Optional[LoadSample] = None
+        # Accepted job id -> time accepted, until the job appears among the active ones.
+        # sample() runs in the worker's executor thread and request_fnc on its loop
+        self._accepted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def install(self) -> None:
+        """Create the report directory and point job processes started from now on at it."""
+        os.makedirs(self.load_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(self.load_dir, "*.json")):
+            os.remove(path)
+        atexit.register(shutil.rmtree, self.load_dir, True)
+        os.environ[LOAD_DIR_ENV] = self.load_dir
+
+    def sample(
+        self,
+        active_sessions: int,
+        loads: Optional[List[JobLoad]] = None,
+        active_job_ids: Optional[Iterable[str]] = None,
+    ) -> LoadSample:
+        """Score the load for `active_sessions` running sessions and their reports.
+
+        Accepted jobs stay counted on top of the active sessions until their id
+        is among `active_job_ids`, or for _ACCEPT_GRACE seconds without ids.
+        """
+        if loads is None:
+            loads = read_job_loads(self.load_dir)
+        lag_ms = max((load.lag_ms for load in loads), default=0.0)
+        session_rss = int(sum(load.rss for load in loads) / len(loads)) if loads else 0
+        in_use = sum(load.rss for load in loads)
+        headroom = psutil.virtual_memory().available - self.min_free_memory
+
+        ratios: Dict[str, float] = {
+            "sessions": active_sessions / self.max_sessions if self.max_sessions > 0 else 0.0,
+            "loop_lag": lag_ms / self.max_loop_lag_ms if self.max_loop_lag_ms > 0 else 0.0,
+            # Share of the memory sessions may use that is already taken; full
+            # once the next session would not fit
+            "memory": 1.0 if headroom < session_rss else in_use / max(in_use + headroom, 1),
+        }
+        limit = max(ratios, key=ratios.get)
+        sample = LoadSample(min(ratios[limit], 1.0), active_sessions, lag_ms, session_rss, limit)
+        active = set(active_job_ids or ())
+        expired = time.monotonic() - _ACCEPT_GRACE
+        with self._lock:
+            self.last = sample
+            # Forget accepted jobs only once the active count includes them
+            for job_id, accepted in list(self._accepted.items()):
+                if job_id in active or accepted < expired:
+                    del self._accepted[job_id]
+        return sample
+
+    def load_fnc(self, worker) -> float:
+        """WorkerOptions.load_fnc: called periodically by the worker, off its event loop."""
+        jobs = worker.active_jobs
+        return self.sample(len(jobs), active_job_ids=[info.job.id for info in jobs]).load
+
+    def _admit_locked(self) -> Optional[str]:
+        sample = self.last
+        if sample is None:
+            return None
+        sessions = sample.sessions + len(self._accepted)
+        if self.max_sessions > 0 and sessions >= self.max_sessions:
+            return "sessions"
+        if sample.load >= 1.0:
+            return sample.limit
+        return None
+
+    def admit(self) -> Optional[str]:
+        """None if one more job fits, otherwise the limit it would break."""
+        with self._lock:
+            return self._admit_locked()
+
+    async def request_fnc(self, req) -> None:
+        """WorkerOptions.request_fnc: accept jobs that fit, reject the rest."""
+        with self._lock:
+            reason = self._admit_locked()
+            if reason is None:
+                # Counted before accepting, so a burst of requests sees each other
+                self._accepted[req.id] = time.monotonic()
+        if reason is not None:
+            self.rejected += 1
+            logger.warning(f"Rejecting job for room {req.room.name}: at the {reason} limit")
+            await req.reject()
+            return
+        await req.accept()
+
+
+def open_admission_policy() -> Optional[AdmissionPolicy]:
+    """Admission policy from the configuration, or None to keep LiveKit's CPU-based load."""
+    from config import get_settings
+
+    config = get_settings().admission
+    if not config.enabled:
+        return None
+    return AdmissionPolicy(config.max_sessions, config.max_loop_lag_ms, config.min_free_memory_mb)
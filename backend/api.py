@@ -1,17 +1,66 @@
-from uuid import uuid4
+import hmac
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Query
+import aiohttp
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from livekit.api import LiveKitAPI, ListRoomsRequest, AccessToken, VideoGrants, CreateRoomRequest
+from livekit.api import (
+    LiveKitAPI, AccessToken, VideoGrants, DataPacket, SendDataRequest, TokenVerifier,
+    TwirpError, TwirpErrorCode, WebhookReceiver,
+)
 from pydantic import BaseModel
 import uvicorn
 
+from characters import get_characters
 from config import get_settings
+from room_index import RoomIndex
+from room_pool import RoomPool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Hold one LiveKit API client, room pool and room index for the lifetime of the app."""
+    settings = get_settings()
+    app.state.livekit = None
+    app.state.room_pool = None
+    app.state.room_index = None
+    app.state.webhooks = None
+    # Room name -> monotonic time of its last profiling request
+    app.state.profile_requests = {}
+    if settings.livekit.url and settings.livekit.api_key and settings.livekit.api_secret:
+        # One client means one HTTP session: connections and TLS are reused across requests
+        app.state.livekit = LiveKitAPI(
+            settings.livekit.url,
+            settings.livekit.api_key,
+            settings.livekit.api_secret,
+            timeout=aiohttp.ClientTimeout(total=settings.api.livekit_timeout),
+        )
+        app.state.room_pool = RoomPool(
+            app.state.livekit,
+            size=settings.api.room_pool_size,
+            max_age=settings.api.room_max_age,
+            empty_timeout=settings.api.room_empty_timeout,
+        )
+        app.state.room_pool.start()
+        app.state.room_index = RoomIndex(app.state.livekit, settings.api.room_reconcile_interval)
+        app.state.room_index.start()
+        app.state.webhooks = WebhookReceiver(TokenVerifier(settings.livekit.api_key, settings.livekit.api_secret))
+    yield
+    # RoomIndex has __len__, so an empty index is falsy: compare with None
+    if app.state.room_index is not None:
+        await app.state.room_index.close()
+    if app.state.room_pool is not None:
+        await app.state.room_pool.close()
+    if app.state.livekit is not None:
+        await app.state.livekit.aclose()
 
 app = FastAPI(
     title="Voice Cloning Demo API",
     description="API for generating tokens and managing rooms for voice cloning demonstrations",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -38,17 +87,35 @@ async def root():
     }
 
 @app.get("/health")
-async def health():
+async def health(request: Request):
     """Health check endpoint"""
-    return {"status": "healthy", "message": "Voice cloning demo is operational"}
+    pool = request.app.state.room_pool
+    index = request.app.state.room_index
+    return {
+        "status": "healthy",
+        "message": "Voice cloning demo is operational",
+        "room_pool": (
+            {"ready": pool.ready, "hits": pool.hits, "misses": pool.misses, "dispatches": pool.dispatches}
+            if pool is not None else None
+        ),
+        "room_index": (
+            {"rooms": len(index), "events": index.events, "reconciles": index.reconciles}
+            if index is not None else None
+        ),
+    }
 
 @app.get("/api/get-token", response_model=TokenResponse)
-async def get_token(participant: str = Query(..., description="Name of the participant")):
+async def get_token(
+    request: Request,
+    participant: str = Query(..., description="Name of the participant"),
+    character: Optional[str] = Query(None, description="Character the agent plays (default: default)"),
+):
     """
     Generate a LiveKit token for a participant to join a voice cloning conversation.
     
     Args:
         participant: The name of the participant
+        character: Name of a prompts/<name>_instructions.md character
         
     Returns:
         Token, URL, and room name for connecting to the conversation
@@ -67,24 +134,31 @@ async def get_token(participant: str = Query(..., description="Name of the parti
             detail="LiveKit URL not configured"
         )
 
-    # Create a unique room for this conversation
-    room_name = f"voice-clone-demo-{uuid4().hex[:8]}"
-    
     try:
-        async with LiveKitAPI() as client:
-            room = await client.room.create_room(
-                CreateRoomRequest(
-                    name=room_name,
-                    departure_timeout=60,  # Room cleanup after participant leaves
-                    max_participants=2,    # Participant and voice clone agent
-                ),
-            )
-            room_name = room.name
+        known = get_characters().find(character) is not None
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Characters not configured: {str(e)}")
+    if not known:
+        raise HTTPException(status_code=404, detail=f"Unknown character: {character}")
+
+    # Take a pre-created room for this conversation
+    try:
+        room_name = await request.app.state.room_pool.acquire()
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create room: {str(e)}"
         )
+
+    # Send the agent now: pooled rooms have none until a user is on the way.
+    # The character rides on the dispatch, since the room was created before it was known.
+    # With no agent name, workers are dispatched automatically when a room is created
+    if settings.livekit.agent_name:
+        request.app.state.room_pool.dispatch_later(
+            room_name,
+            settings.livekit.agent_name,
+            metadata=json.dumps({"character": character}) if character else "",
+        )
     
     # Generate access token
     try:
@@ -109,35 +183,107 @@ async def get_token(participant: str = Query(..., description="Name of the parti
             detail=f"Failed to generate token: {str(e)}"
         )
 
-@app.get("/api/rooms")
-async def list_rooms():
-    """List active rooms (for debugging/monitoring)"""
-    settings = get_settings()
-    if not settings.livekit.api_key or not settings.livekit.api_secret:
+@app.get("/api/characters")
+async def list_characters():
+    """Characters the agent can play, for the character picker"""
+    try:
+        return {"characters": get_characters().names()}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=f"Characters not configured: {str(e)}")
+
+@app.post("/api/livekit/webhook")
+async def livekit_webhook(request: Request):
+    """Receive LiveKit webhook events and apply them to the room index"""
+    if request.app.state.webhooks is None:
         raise HTTPException(status_code=500, detail="LiveKit API credentials not configured")
-    
+    body = (await request.body()).decode("utf-8")
     try:
-        async with LiveKitAPI() as client:
-            rooms = await client.room.list_rooms(ListRoomsRequest())
-            return {
-                "rooms": [
-                    {
-                        "name": room.name,
-                        "participants": room.num_participants,
-                        "created_at": room.creation_time
-                    }
-                    for room in rooms.rooms
-                ],
-                "total": len(rooms.rooms)
-            }
+        event = request.app.state.webhooks.receive(body, request.headers.get("Authorization", ""))
     except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Invalid webhook: {str(e)}")
+    request.app.state.room_index.apply(event)
+    return {"status": "ok"}
+
+@app.get("/api/rooms")
+async def list_rooms(
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0, description="Rooms to skip"),
+    limit: int = Query(100, ge=1, le=1000, description="Rooms to return"),
+    prefix: Optional[str] = Query(None, description="Only rooms whose name starts with this"),
+    min_participants: int = Query(0, ge=0, description="Only rooms with at least this many participants"),
+):
+    """List active rooms (for debugging/monitoring), served from the webhook-maintained index"""
+    index = request.app.state.room_index
+    if index is None:
+        raise HTTPException(status_code=500, detail="LiveKit API credentials not configured")
+    if not index.ready.is_set():
+        raise HTTPException(status_code=503, detail="Room index is still loading", headers={"Retry-After": "1"})
+
+    # Any change to the index changes the ETag, so an unchanged poll costs nothing
+    etag = index.etag
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    rooms, total = index.page(offset, limit, prefix, min_participants)
+    response.headers["ETag"] = etag
+    return {
+        "rooms": rooms,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+    }
+
+@app.post("/api/rooms/{room_name}/profile")
+async def profile_room(
+    request: Request,
+    room_name: str,
+    seconds: float = Query(10, gt=0, le=300, description="How long to sample for"),
+):
+    """Ask the agent in a room to record a sampling profile (the agent needs PROFILING_ENABLED)"""
+    config = get_settings().profiling
+    # Sampling costs a live session CPU, so this is an admin call, off unless a token is set
+    if not config.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(authorization.encode("utf-8"), f"Bearer {config.admin_token}".encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+    livekit = request.app.state.livekit
+    if livekit is None:
+        raise HTTPException(status_code=500, detail="LiveKit API credentials not configured")
+
+    requests = request.app.state.profile_requests
+    now = time.monotonic()
+    last = requests.get(room_name)
+    if last is not None and now - last < config.min_interval:
+        retry_after = int(config.min_interval - (now - last)) + 1
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to list rooms: {str(e)}"
+            status_code=429,
+            detail=f"Room {room_name} was profiled recently",
+            headers={"Retry-After": str(retry_after)},
         )
+    for name in [name for name, at in requests.items() if now - at >= config.min_interval]:
+        del requests[name]
+    seconds = min(seconds, config.max_seconds)
+    try:
+        # Server-sent data is the only kind the agent's profiler acts on. The topic
+        # is profiling.PROFILER_TOPIC, not imported to keep livekit.agents out of the API
+        await livekit.room.send_data(SendDataRequest(
+            room=room_name,
+            data=json.dumps({"seconds": seconds}).encode("utf-8"),
+            kind=DataPacket.Kind.RELIABLE,
+            topic="profiler",
+        ))
+    except TwirpError as e:
+        if e.code == TwirpErrorCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail=f"Room not found: {room_name}")
+        raise HTTPException(status_code=500, detail=f"Failed to reach room: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reach room: {str(e)}")
+    requests[room_name] = now
+    return {"room": room_name, "seconds": seconds, "status": "requested"}
 
 if __name__ == "__main__":
-    # For development
+    # For development, with auto-reload; production runs python main.py api --workers N
     uvicorn.run(
         "api:app",
         host="0.0.0.0",
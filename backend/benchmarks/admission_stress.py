@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Find how many agent sessions a host holds before admission turns jobs away.
+
+Adds sessions one at a time, each in its own process like the agent
+worker's jobs, running VoiceCloningAgent against the fake services in
+benchmarks/fakes.py. Every session reports its loop lag and RSS the way a
+real job does, and the worker's AdmissionPolicy scores them before each
+new session; the ramp stops at the first session it would reject. The
+table shows, per step, the load, the limit closest to being hit and the
+p95 response time of turns completed since the previous step, so the
+limits can be tuned to the point where turn latency starts to climb.
+
+Run from the backend directory:
+    python benchmarks/admission_stress.py --max-loop-lag-ms 100 --step-s 4
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import AdmissionPolicy  # noqa: E402
+from turn_metrics import Histogram, MetricsRegistry, merge_snapshots, render_json  # noqa: E402
+
+
+async def run_job(index, args, metrics_dir):
+    """One session with a load reporter, as an agent job would run it."""
+    import voice_agent  # noqa: F401
+    from admission import start_load_reporter
+    from fakes import FakeVAD
+    from session_load import run_session
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("voice-cloning-agent").setLevel(logging.WARNING)
+    if args.vad == "silero":
+        from livekit.plugins import silero
+        vad = silero.VAD.load(min_silence_duration=0.8)
+    else:
+        vad = FakeVAD()
+
+    reporter = start_load_reporter()
+    try:
+        await run_session(index, args, vad, MetricsRegistry(metrics_dir))
+    finally:
+        if reporter is not None:
+            await reporter.aclose()
+
+
+def job_main(index, args, metrics_dir):
+    asyncio.run(run_job(index, args, metrics_dir))
+
+
+def since(current, previous):
+    """Turns recorded between two merged snapshots of the same histogram."""
+    if previous is None:
+        return current
+    return Histogram([a - b for a, b in zip(current.counts, previous.counts)], current.sum - previous.sum)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp agent sessions until the admission policy rejects one")
+    parser.add_argument("--max-sessions", type=int, default=0,
+                        help="Session ceiling, as AGENT_MAX_SESSIONS (default: 0, none)")
+    parser.add_argument("--max-loop-lag-ms", type=float, default=100.0,
+                        help="Loop lag limit, as AGENT_MAX_LOOP_LAG_MS (default: 100)")
+    parser.add_argument("--min-free-memory-mb", type=float, default=512.0,
+                        help="Memory to keep free, as AGENT_MIN_FREE_MEMORY_MB (default: 512)")
+    parser.add_argument("--limit", type=int, default=64,
+                        help="Stop after this many sessions even if all are admitted (default: 64)")
+    parser.add_argument("--step-s", type=float, default=4.0,
+                        help="Seconds between added sessions (default: 4)")
+    parser.add_argument("--hold-s", type=float, default=20.0,
+                        help="Seconds to keep the admitted sessions running after the ramp (default: 20)")
+    parser.add_argument("--profile", choices=["fast", "typical", "slow"], default="typical",
+                        help="Latency profile of the fake services (default: typical)")
+    parser.add_argument("--chunking", default="early",
+                        help="TTS chunking policy, as TTS_CHUNKING (default: early)")
+    parser.add_argument("--speech-s", type=float, default=2.0,
+                        help="Length of each synthetic user utterance (default: 2)")
+    parser.add_argument("--gap-s", type=float, default=6.0,
+                        help="Silence after each utterance while the agent answers (default: 6)")
+    parser.add_argument("--vad", choices=["energy", "silero"], default="energy",
+                        help="Voice activity detection (default: energy)")
+    args = parser.parse_args()
+    # Sessions keep talking until the ramp and hold are over, then are stopped
+    args.turns = 10**6
+
+    work_dir = tempfile.mkdtemp(prefix="admission-stress-")
+    metrics_dir = os.path.join(work_dir, "metrics")
+    policy = AdmissionPolicy(
+        args.max_sessions, args.max_loop_lag_ms, args.min_free_memory_mb, load_dir=os.path.join(work_dir, "load"),
+    )
+    policy.install()
+    context = multiprocessing.get_context("forkserver")
+    jobs = []
+    previous = None
+
+    print(f"{'sessions':>8} {'load':>5} {'closest':>8} {'lag p90':>8} {'RSS/sess':>9} {'turns':>6} {'turn p95':>9}")
+
+    def report():
+        nonlocal previous
+        alive = [job for job in jobs if job.is_alive()]
+        sample = policy.sample(len(alive))
+        total = merge_snapshots(metrics_dir).get("turn_total")
+        recent = since(total, previous) if total is not None else Histogram()
+        previous = total
+        p95 = recent.quantile(0.95)
+        print(f"{sample.sessions:>8} {sample.load:>5.2f} {sample.limit:>8} {sample.lag_ms:>6.0f}ms "
+              f"{sample.session_rss / 2**20:>7.0f}MB {recent.count:>6} "
+              f"{p95 * 1000 if p95 is not None else float('nan'):>7.0f}ms")
+        return alive
+
+    reason = None
+    try:
+        while True:
+            alive = report()
+            if len(alive) < len(jobs):
+                print(f"{len(jobs) - len(alive)} session(s) exited early")
+                break
+            reason = policy.admit()
+            if reason is not None or len(jobs) >= args.limit:
+                break
+            job = context.Process(target=job_main, args=(len(jobs), args, metrics_dir), daemon=True)
+            job.start()
+            jobs.append(job)
+            time.sleep(args.step_s)
+
+        if reason is not None:
+            print(f"Session {len(jobs) + 1} rejected at the {reason} limit: this host holds {len(jobs)} session(s)")
+        else:
+            print(f"All {len(jobs)} sessions admitted; raise --limit to look further")
+        hold_end = time.monotonic() + args.hold_s
+        while time.monotonic() < hold_end:
+            time.sleep(max(0.0, min(args.step_s, hold_end - time.monotonic())))
+            report()
+    finally:
+        for job in jobs:
+            job.terminate()
+        for job in jobs:
+            job.join()
+
+    print(f"{'stage':>22} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in render_json(merge_snapshots(metrics_dir)).items():
+        print(f"{name:>22} {row['count']:>6} {row['p50_ms'] or 0:>8.0f} {row['p95_ms'] or 0:>8.0f} "
+              f"{row['p99_ms'] or 0:>8.0f}")
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Compare TTS text-chunking policies on time to first audio.
+
+A scripted fake LLM streams a few typical replies token by token at a fixed
+rate, and each policy's tokenizer stream splits them into TTS chunks exactly
+as the agent would. A fake TTS then synthesizes the chunks one after another
+(fixed request overhead plus a per-word cost) and plays them back at a
+normal speaking rate. For each policy this reports the time from the first
+LLM token to the first audio, the number of chunks, and the total playout
+gap where audio was not ready in time (which larger later chunks avoid).
+
+The "default" row is the Resemble plugin's own sentence tokenizer.
+
+Usage:
+    python benchmarks/chunking_latency.py --tokens-per-s 40 --tts-base-ms 250
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from livekit.agents import tokenize  # noqa: E402
+
+from text_chunking import POLICIES, ChunkingTokenizer  # noqa: E402
+
+REPLIES = [
+    "Hi Alex, it's so good to hear from you! I was just thinking about our last chat. How has your week been so far?",
+    "Well, that depends on what you're in the mood for. If you want something relaxing, a walk by the river is lovely this time of year. "
+    "If you'd rather stay in, we could pick a movie together.",
+    "Honestly? I think the best part of learning an instrument is the first time a song actually sounds like the song. "
+    "It takes a while, but it's worth it.",
+    "That sounds like a really fun plan, and if the weather holds up this weekend I think you should absolutely go for it. "
+    "Just bring a jacket.",
+    "Oh I remember that one, it was the trip where everything that could go wrong went wrong and we still had a great time. "
+    "Do you still have the photos?",
+    "Sure. The short version is that the recording needs to be clean, at least a couple of minutes long, and full of natural, expressive speech.",
+]
+
+
+def llm_tokens(text):
+    """Split a reply into LLM-like deltas: words with their leading space, punctuation separate."""
+    return re.findall(r"\s*[\w'’]+|\s*[^\w\s]", text)
+
+
+async def chunk_times(tokenizer, reply, token_interval):
+    """Return (emit time, chunk) pairs for one reply streamed through `tokenizer`."""
+    stream = tokenizer.stream()
+    now = 0.0
+    chunks = []
+
+    async def collect():
+        async for data in stream:
+            chunks.append((now, data.token))
+
+    consumer = asyncio.create_task(collect())
+    for i, delta in enumerate(llm_tokens(reply)):
+        now = i * token_interval
+        stream.push_text(delta)
+        for _ in range(3):
+            await asyncio.sleep(0)
+    now = len(llm_tokens(reply)) * token_interval
+    stream.end_input()
+    await consumer
+    return chunks
+
+
+def simulate_tts(chunks, base_s, per_word_s, words_per_s):
+    """Sequential synthesis and playout: returns (first audio time, playout gap seconds)."""
+    synth_free = 0.0
+    play_end = None
+    first_audio = None
+    gaps = 0.0
+    for emitted, text in chunks:
+        words = len(text.split())
+        ready = max(emitted, synth_free) + base_s + per_word_s * words
+        synth_free = ready
+        if play_end is None:
+            first_audio = ready
+            play_end = ready
+        elif ready > play_end:
+            gaps += ready - play_end
+            play_end = ready
+        play_end += words / words_per_s
+    return first_audio, gaps
+
+
+async def run(args):
+    tokenizers = {"default": tokenize.basic.SentenceTokenizer(min_sentence_len=3)}
+    tokenizers.update({name: ChunkingTokenizer(policy) for name, policy in POLICIES.items()})
+    interval = 1.0 / args.tokens_per_s
+
+    print(f"{'policy':>9} {'first audio ms':>15} {'max ms':>9} {'chunks':>7} {'gap ms':>7}")
+    for name, tokenizer in tokenizers.items():
+        firsts, gaps, counts = [], [], []
+        for reply in REPLIES:
+            chunks = await chunk_times(tokenizer, reply, interval)
+            first, gap = simulate_tts(chunks, args.tts_base_ms / 1000, args.tts_per_word_ms / 1000, args.words_per_s)
+            firsts.append(first * 1000)
+            gaps.append(gap * 1000)
+            counts.append(len(chunks))
+        print(f"{name:>9} {statistics.mean(firsts):>15.0f} {max(firsts):>9.0f} "
+              f"{statistics.mean(counts):>7.1f} {statistics.mean(gaps):>7.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure first-audio latency of TTS chunking policies")
+    parser.add_argument("--tokens-per-s", type=float, default=40.0,
+                        help="Fake LLM streaming rate (default: 40)")
+    parser.add_argument("--tts-base-ms", type=float, default=250.0,
+                        help="Fake TTS time to first byte per request (default: 250)")
+    parser.add_argument("--tts-per-word-ms", type=float, default=15.0,
+                        help="Fake TTS extra latency per word in a request (default: 15)")
+    parser.add_argument("--words-per-s", type=float, default=2.6,
+                        help="Playout speaking rate (default: 2.6)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
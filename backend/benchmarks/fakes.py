@@ -0,0 +1,304 @@
+"""
+Local stand-ins for the agent's hosted services, for offline load testing.
+
+FakeSTT, FakeLLM and FakeTTS implement the livekit-agents plugin interfaces
+with configurable latency and throughput and no network access, and FakeVAD
+detects speech by frame energy so turns follow the synthetic audio exactly.
+SyntheticAudioInput plays a scripted user (speech, then silence) into a
+session in real time, and RealtimeAudioOutput consumes the agent's audio at
+playback speed like a room would.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import APIConnectOptions, llm, stt, tts, utils, vad
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN
+from livekit.agents.voice.io import AudioInput, AudioOutput
+
+from context_window import estimate_tokens, item_text
+
+SAMPLE_RATE = 24000
+FRAME_MS = 20
+
+QUESTIONS = [
+    "How does voice cloning actually work?",
+    "What are you using to generate your voice?",
+    "Can you tell me a fun fact about recording audio?",
+    "What should I say to make a good voice sample?",
+]
+
+REPLIES = [
+    "Great question! A model learns the character of a voice from a short recording, then speaks any new text in it.",
+    "Sure. A language model writes the reply, and a voice model trained on a few minutes of audio speaks it.",
+    "Here's one: the room matters almost as much as the microphone, so closets full of clothes make good studios.",
+]
+
+
+@dataclass
+class Profile:
+    """Latency and throughput of the fake services."""
+
+    stt_latency: float = 0.15
+    llm_ttft: float = 0.35
+    llm_tokens_per_s: float = 60.0
+    # Extra time to first token per 1000 prompt tokens (prefill)
+    llm_ms_per_1k_prompt: float = 60.0
+    tts_ttfb: float = 0.25
+    # Seconds of audio synthesized per second once a request is streaming
+    tts_realtime_factor: float = 5.0
+
+
+PROFILES = {
+    "fast": Profile(stt_latency=0.05, llm_ttft=0.15, llm_tokens_per_s=120.0, llm_ms_per_1k_prompt=20.0,
+                    tts_ttfb=0.1, tts_realtime_factor=10.0),
+    "typical": Profile(),
+    "slow": Profile(stt_latency=0.4, llm_ttft=0.9, llm_tokens_per_s=30.0, llm_ms_per_1k_prompt=150.0,
+                    tts_ttfb=0.6, tts_realtime_factor=2.0),
+}
+
+
+def speech_like(seconds: float, sample_rate: int = SAMPLE_RATE, seed: int = 0) -> np.ndarray:
+    """Voiced, syllable-shaped int16 audio: harmonics of a wandering pitch under vowel formants."""
+    rng = np.random.default_rng(seed)
+    vowels = [(730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480), (660, 1720, 2410)]
+    syllable = int(sample_rate * 0.25)
+    t = np.arange(syllable) / sample_rate
+    out = []
+    for _ in range(max(1, int(seconds / 0.25))):
+        formants = vowels[rng.integers(len(vowels))]
+        f0 = 110 + 30 * rng.random() + 10 * np.sin(2 * np.pi * 3 * t)
+        phase = np.cumsum(2 * np.pi * f0 / sample_rate)
+        x = np.zeros(syllable)
+        for k in range(1, 40):
+            amp = sum(np.exp(-((k * f0 - f) / 90) ** 2) / (j + 1) for j, f in enumerate(formants)) + 0.05 / k
+            x += amp * np.sin(k * phase)
+        out.append(x * np.sin(np.pi * t / t[-1]) ** 0.6)
+    x = np.concatenate(out)
+    return (x / np.abs(x).max() * 0.3 * 32767).astype(np.int16)
+
+
+class FakeVAD(vad.VAD):
+    """Energy-threshold VAD: any frame louder than `threshold` RMS counts as speech."""
+
+    def __init__(self, threshold: float = 300.0, min_speech: float = 0.1, min_silence: float = 0.5) -> None:
+        super().__init__(capabilities=vad.VADCapabilities(update_interval=FRAME_MS / 1000))
+        self.threshold = threshold
+        self.min_speech = min_speech
+        self.min_silence = min_silence
+
+    def stream(self) -> "FakeVADStream":
+        return FakeVADStream(self)
+
+
+class FakeVADStream(vad.VADStream):
+    async def _main_task(self) -> None:
+        fake: FakeVAD = self._vad
+        speaking = False
+        speech_frames: List[rtc.AudioFrame] = []
+        speech = silence = 0.0
+        samples = 0
+        async for frame in self._input_ch:
+            if not isinstance(frame, rtc.AudioFrame):
+                continue
+            samples += frame.samples_per_channel
+            data = np.frombuffer(frame.data, dtype=np.int16).astype(np.float32)
+            loud = float(np.sqrt(np.mean(data * data))) > fake.threshold
+            if loud:
+                speech += frame.duration
+                silence = 0.0
+            else:
+                silence += frame.duration
+                if not speaking:
+                    speech = 0.0
+            if speaking or loud:
+                speech_frames.append(frame)
+
+            def event(kind, **fields):
+                return vad.VADEvent(
+                    type=kind,
+                    samples_index=samples,
+                    timestamp=time.time(),
+                    speech_duration=speech,
+                    silence_duration=silence,
+                    **fields,
+                )
+
+            self._event_ch.send_nowait(event(
+                vad.VADEventType.INFERENCE_DONE, frames=[frame], probability=1.0 if loud else 0.0,
+                speaking=speaking, raw_accumulated_speech=speech, raw_accumulated_silence=silence,
+            ))
+            if not speaking and speech >= fake.min_speech:
+                speaking = True
+                self._event_ch.send_nowait(event(vad.VADEventType.START_OF_SPEECH, frames=list(speech_frames)))
+            elif speaking and silence >= fake.min_silence:
+                speaking = False
+                self._event_ch.send_nowait(event(vad.VADEventType.END_OF_SPEECH, frames=speech_frames))
+                speech_frames = []
+                speech = 0.0
+            elif not speaking and not loud:
+                speech_frames = []
+
+
+class FakeSTT(stt.STT):
+    """Batch STT (run behind the VAD) that returns the next scripted question after a delay."""
+
+    def __init__(self, profile: Profile) -> None:
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self.profile = profile
+        self._questions = itertools.cycle(QUESTIONS)
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options: APIConnectOptions) -> stt.SpeechEvent:
+        await asyncio.sleep(self.profile.stt_latency)
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            request_id=utils.shortuuid(),
+            alternatives=[stt.SpeechData(language="en", text=next(self._questions), confidence=1.0)],
+        )
+
+
+class FakeLLM(llm.LLM):
+    """Streams scripted replies word by word after a time to first token that grows with the prompt."""
+
+    def __init__(self, profile: Profile) -> None:
+        super().__init__()
+        self.profile = profile
+        self._replies = itertools.cycle(REPLIES)
+        # Estimated prompt size of every request, in order
+        self.prompt_tokens: List[int] = []
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> "FakeLLMStream":
+        return FakeLLMStream(self, next(self._replies), chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class FakeLLMStream(llm.LLMStream):
+    def __init__(self, fake: FakeLLM, reply: str, **kwargs) -> None:
+        super().__init__(fake, **kwargs)
+        self._reply = reply
+
+    async def _run(self) -> None:
+        profile = self._llm.profile
+        request_id = utils.shortuuid()
+        prompt_tokens = sum(estimate_tokens(item_text(item)) for item in self._chat_ctx.items)
+        self._llm.prompt_tokens.append(prompt_tokens)
+        await asyncio.sleep(profile.llm_ttft + prompt_tokens / 1000 * profile.llm_ms_per_1k_prompt / 1000)
+        for i, word in enumerate(self._reply.split(" ")):
+            if i:
+                await asyncio.sleep(1 / profile.llm_tokens_per_s)
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=request_id,
+                delta=llm.ChoiceDelta(role="assistant", content=word if i == 0 else " " + word),
+            ))
+
+
+class FakeTTS(tts.TTS):
+    """Synthesizes a quiet tone, about 70 ms per character, paced by the profile."""
+
+    def __init__(self, profile: Profile) -> None:
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.profile = profile
+
+    def synthesize(self, text: str, *, conn_options=DEFAULT_API_CONNECT_OPTIONS) -> "FakeChunkedStream":
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        profile = self._tts.profile
+        output_emitter.initialize(
+            request_id=utils.shortuuid(),
+            sample_rate=SAMPLE_RATE,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        await asyncio.sleep(profile.tts_ttfb)
+        duration = max(0.2, 0.07 * len(self._input_text))
+        chunk_s = 0.1
+        t = np.arange(int(SAMPLE_RATE * chunk_s)) / SAMPLE_RATE
+        tone = (np.sin(2 * np.pi * 220 * t) * 1000).astype(np.int16).tobytes()
+        for _ in range(int(duration / chunk_s)):
+            output_emitter.push(tone)
+            await asyncio.sleep(chunk_s / profile.tts_realtime_factor)
+        output_emitter.flush()
+
+
+class SyntheticAudioInput(AudioInput):
+    """A scripted user in real time: `speech_s` of speech, then `gap_s` of silence, for `turns` turns."""
+
+    def __init__(self, speech: np.ndarray, gap_s: float, turns: int, lead_s: float = 1.0) -> None:
+        self._frame_samples = SAMPLE_RATE * FRAME_MS // 1000
+        # One turn of audio, repeated by index so long scripts cost no memory
+        self._turn = np.concatenate([speech, np.zeros(int(SAMPLE_RATE * gap_s), dtype=np.int16)])
+        self._lead = int(SAMPLE_RATE * lead_s)
+        self._length = self._lead + len(self._turn) * turns
+        self._offset = 0
+        self._next_at: Optional[float] = None
+        self.finished = asyncio.Event()
+
+    async def __anext__(self) -> rtc.AudioFrame:
+        # Pace frames on an absolute schedule so slow wakeups do not accumulate drift
+        now = time.perf_counter()
+        if self._next_at is None:
+            self._next_at = now
+        if self._next_at > now:
+            await asyncio.sleep(self._next_at - now)
+        self._next_at += FRAME_MS / 1000
+
+        if self._offset >= self._length:
+            self.finished.set()
+            chunk = np.zeros(self._frame_samples, dtype=np.int16)
+        else:
+            positions = np.arange(self._offset, min(self._offset + self._frame_samples, self._length)) - self._lead
+            chunk = np.where(positions < 0, 0, self._turn[positions % len(self._turn)]).astype(np.int16)
+            self._offset += self._frame_samples
+        return rtc.AudioFrame(chunk.tobytes(), SAMPLE_RATE, 1, len(chunk))
+
+
+class RealtimeAudioOutput(AudioOutput):
+    """Audio sink that reports playout as finished at real playback speed."""
+
+    def __init__(self) -> None:
+        super().__init__(sample_rate=None)
+        self._segment_start: Optional[float] = None
+        self._pushed = 0.0
+        self._finish_task: Optional[asyncio.Task] = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+        await super().capture_frame(frame)
+        if self._segment_start is None:
+            self._segment_start = time.perf_counter()
+            self._pushed = 0.0
+        self._pushed += frame.duration
+
+    def flush(self) -> None:
+        super().flush()
+        if self._segment_start is None:
+            return
+        remaining = self._segment_start + self._pushed - time.perf_counter()
+        pushed = self._pushed
+        self._segment_start = None
+
+        async def _finish():
+            await asyncio.sleep(max(0.0, remaining))
+            self.on_playback_finished(playback_position=pushed, interrupted=False)
+
+        self._finish_task = asyncio.create_task(_finish())
+
+    def clear_buffer(self) -> None:
+        if self._finish_task is not None and not self._finish_task.done():
+            self._finish_task.cancel()
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        elif self._segment_start is not None:
+            played = time.perf_counter() - self._segment_start
+            self._segment_start = None
+            self.on_playback_finished(playback_position=min(played, self._pushed), interrupted=True)
+        self._finish_task = None
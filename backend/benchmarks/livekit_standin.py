@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the LiveKit server API, for load testing the token API.
+
+Implements the Twirp RoomService calls the backend uses (CreateRoom,
+ListRooms, DeleteRoom, UpdateRoomMetadata, SendData), plus AgentDispatchService
+CreateDispatch, against an in-memory room table.
+Two delays make it behave like a remote server: a per-call processing delay,
+and a one-off delay on the first request of every new connection that stands
+in for TCP and TLS setup, which is what a fresh HTTP session pays each time.
+
+Usage:
+    python benchmarks/livekit_standin.py --port 7880 --handshake-ms 60 --call-ms 20
+    LIVEKIT_URL=http://127.0.0.1:7880 LIVEKIT_API_KEY=devkey LIVEKIT_API_SECRET=secret python main.py api
+"""
+
+import argparse
+import asyncio
+import time
+import weakref
+
+from aiohttp import web
+from livekit.api import (
+    AgentDispatch,
+    CreateAgentDispatchRequest,
+    CreateRoomRequest,
+    DeleteRoomRequest,
+    DeleteRoomResponse,
+    ListRoomsRequest,
+    ListRoomsResponse,
+    Room,
+    SendDataRequest,
+    SendDataResponse,
+    UpdateRoomMetadataRequest,
+)
+
+SERVICE_PREFIX = "/twirp/livekit.RoomService/"
+DISPATCH_PREFIX = "/twirp/livekit.AgentDispatchService/"
+
+
+class StandIn:
+    """In-memory room table with simulated network and processing delays."""
+
+    def __init__(self, handshake_ms: float, call_ms: float) -> None:
+        self.handshake = handshake_ms / 1000
+        self.call = call_ms / 1000
+        self.rooms: dict[str, Room] = {}
+        self.calls: dict[str, int] = {}
+        self.connections = 0
+        self._seen_transports: weakref.WeakSet = weakref.WeakSet()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        transport = request.transport
+        if transport not in self._seen_transports:
+            self._seen_transports.add(transport)
+            self.connections += 1
+            await asyncio.sleep(self.handshake)
+        await asyncio.sleep(self.call)
+
+        body = await request.read()
+        if method == "CreateRoom":
+            req = CreateRoomRequest.FromString(body)
+            room = Room(
+                sid=f"RM_{len(self.rooms):06d}",
+                name=req.name,
+                empty_timeout=req.empty_timeout,
+                departure_timeout=req.departure_timeout,
+                max_participants=req.max_participants,
+                creation_time=int(time.time()),
+                metadata=req.metadata,
+            )
+            self.rooms[room.name] = room
+            return self._reply(room)
+        if method == "ListRooms":
+            req = ListRoomsRequest.FromString(body)
+            names = set(req.names)
+            rooms = [r for r in self.rooms.values() if not names or r.name in names]
+            return self._reply(ListRoomsResponse(rooms=rooms))
+        if method == "DeleteRoom":
+            req = DeleteRoomRequest.FromString(body)
+            self.rooms.pop(req.room, None)
+            return self._reply(DeleteRoomResponse())
+        if method == "UpdateRoomMetadata":
+            req = UpdateRoomMetadataRequest.FromString(body)
+            room = self.rooms.get(req.room)
+            if room is None:
+                return web.json_response({"code": "not_found", "msg": "room not found"}, status=404)
+            room.metadata = req.metadata
+            return self._reply(room)
+        if method == "SendData":
+            req = SendDataRequest.FromString(body)
+            if req.room not in self.rooms:
+                return web.json_response({"code": "not_found", "msg": "room not found"}, status=404)
+            return self._reply(SendDataResponse())
+        if method == "CreateDispatch":
+            req = CreateAgentDispatchRequest.FromString(body)
+            if req.room not in self.rooms:
+                return web.json_response({"code": "not_found", "msg": "room not found"}, status=404)
+            dispatch = AgentDispatch(
+                id=f"AD_{self.calls[method]:06d}", agent_name=req.agent_name, room=req.room, metadata=req.metadata,
+            )
+            return self._reply(dispatch)
+        return web.json_response({"code": "bad_route", "msg": f"no handler for {method}"}, status=404)
+
+    @staticmethod
+    def _reply(message) -> web.Response:
+        return web.Response(body=message.SerializeToString(), content_type="application/protobuf")
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"rooms": len(self.rooms), "connections": self.connections, "calls": self.calls})
+
+
+def make_app(handshake_ms: float = 60.0, call_ms: float = 20.0) -> web.Application:
+    standin = StandIn(handshake_ms, call_ms)
+    app = web.Application()
+    app.router.add_post(SERVICE_PREFIX + "{method}", standin.handle)
+    app.router.add_post(DISPATCH_PREFIX + "{method}", standin.handle)
+    app.router.add_get("/stats", standin.stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a minimal LiveKit RoomService stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7880)
+    parser.add_argument("--handshake-ms", type=float, default=60.0,
+                        help="Delay on the first request of each connection, standing in for TCP+TLS setup (default: 60)")
+    parser.add_argument("--call-ms", type=float, default=20.0,
+                        help="Server-side processing delay per call (default: 20)")
+    args = parser.parse_args()
+    web.run_app(make_app(args.handshake_ms, args.call_ms), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
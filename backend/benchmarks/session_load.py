@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Capacity test for the voice agent, offline and without a GPU.
+
+Runs VoiceCloningAgent in real AgentSessions against the local stand-ins in
+benchmarks/fakes.py: a scripted user speaks synthetic audio in real time,
+and fake STT, LLM and TTS services answer with the latency profile chosen.
+Sessions are started evenly over the ramp period until N run concurrently,
+split across worker processes the way the agent worker runs one job per
+process. Reports CPU, RSS per session, event-loop lag and the per-turn
+latency breakdown from turn_metrics.
+
+By default voice activity is detected from frame energy; --vad silero runs
+the real Silero model (with a longer minimum silence so the synthetic
+syllables are not split into several turns), which includes its CPU cost.
+
+Run from the backend directory:
+    python benchmarks/session_load.py --sessions 20 --processes 4 --turns 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil  # noqa: E402
+
+from turn_metrics import Histogram, MetricsRegistry, TurnRecorder, render_json  # noqa: E402
+
+# Seconds between event-loop lag probes
+_LAG_INTERVAL = 0.05
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_session(index, args, vad, registry):
+    from livekit.agents import AgentSession, tokenize
+    from livekit.agents import tts as agents_tts
+
+    from fakes import PROFILES, FakeLLM, FakeSTT, FakeTTS, RealtimeAudioOutput, SyntheticAudioInput, speech_like
+    from text_chunking import ChunkingTokenizer, get_policy
+    from characters import get_characters
+    from voice_agent import VoiceCloningAgent, track_turns
+
+    profile = PROFILES[args.profile]
+    fake_llm = FakeLLM(profile)
+    policy = get_policy(args.chunking)
+    tokenizer = ChunkingTokenizer(policy) if policy else tokenize.basic.SentenceTokenizer(min_sentence_len=3)
+    character = get_characters().default
+    agent = VoiceCloningAgent(
+        instructions=character.instructions,
+        intro_template=character.intro_template,
+        user_name=f"Load {index}",
+        vad=vad,
+        stt=FakeSTT(profile),
+        llm=fake_llm,
+        tts=agents_tts.StreamAdapter(tts=FakeTTS(profile), sentence_tokenizer=tokenizer),
+        turn_detection="vad",
+    )
+    agent.turns = TurnRecorder(registry)
+
+    audio_in = SyntheticAudioInput(
+        speech_like(args.speech_s, seed=index), gap_s=args.gap_s, turns=args.turns, lead_s=args.gap_s,
+    )
+    session = AgentSession()
+    session.input.audio = audio_in
+    session.output.audio = RealtimeAudioOutput()
+    track_turns(session, agent, f"load-{index}")
+    await session.start(agent=agent)
+    await audio_in.finished.wait()
+    await session.aclose()
+    return agent.turns.turns, fake_llm.prompt_tokens
+
+
+async def run_process(first, count, args):
+    """Run this process's share of the sessions and measure it."""
+    # Import everything up front so module loading is not measured as loop lag
+    import voice_agent  # noqa: F401
+    from fakes import FakeVAD
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("voice-cloning-agent").setLevel(logging.WARNING)
+
+    if args.vad == "silero":
+        from livekit.plugins import silero
+        vad = silero.VAD.load(min_silence_duration=0.8)
+    else:
+        vad = FakeVAD()
+
+    proc = psutil.Process()
+    registry = MetricsRegistry(None)
+    rss_base = proc.memory_info().rss
+    rss_peak = rss_base
+    lags = []
+    done = False
+
+    async def monitor():
+        nonlocal rss_peak
+        next_rss = 0.0
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(_LAG_INTERVAL)
+            lags.append(time.perf_counter() - start - _LAG_INTERVAL)
+            if start >= next_rss:
+                rss_peak = max(rss_peak, proc.memory_info().rss)
+                next_rss = start + 0.5
+
+    async def delayed(index):
+        await asyncio.sleep(args.ramp_s * index / max(1, args.sessions))
+        return await run_session(index, args, vad, registry)
+
+    monitor_task = asyncio.create_task(monitor())
+    cpu_start = proc.cpu_times()
+    wall_start = time.perf_counter()
+    results = await asyncio.gather(*(delayed(i) for i in range(first, first + count)), return_exceptions=True)
+    wall = time.perf_counter() - wall_start
+    cpu_end = proc.cpu_times()
+    done = True
+    await monitor_task
+
+    errors = [repr(r) for r in results if isinstance(r, BaseException)]
+    completed = [r for r in results if not isinstance(r, BaseException)]
+    return {
+        "sessions": count,
+        "turns": sum(turns for turns, _ in completed),
+        "prompt_tokens": [tokens for _, tokens in completed],
+        "errors": errors,
+        "cpu_s": (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system),
+        "wall_s": wall,
+        "rss_base": rss_base,
+        "rss_peak": rss_peak,
+        "lags": lags,
+        "histograms": registry.snapshot(),
+    }
+
+
+def process_main(first, count, args):
+    return asyncio.run(run_process(first, count, args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the voice agent against local fake services")
+    parser.add_argument("--sessions", "-n", type=int, default=10,
+                        help="Concurrent sessions at full ramp (default: 10)")
+    parser.add_argument("--processes", "-p", type=int, default=1,
+                        help="Worker processes to spread sessions over (default: 1)")
+    parser.add_argument("--ramp-s", type=float, default=10.0,
+                        help="Seconds over which sessions are started (default: 10)")
+    parser.add_argument("--turns", type=int, default=4,
+                        help="User turns per session (default: 4)")
+    parser.add_argument("--speech-s", type=float, default=2.0,
+                        help="Length of each synthetic user utterance (default: 2)")
+    parser.add_argument("--gap-s", type=float, default=10.0,
+                        help="Silence after each utterance while the agent answers (default: 10)")
+    parser.add_argument("--profile", choices=["fast", "typical", "slow"], default="typical",
+                        help="Latency profile of the fake services (default: typical)")
+    parser.add_argument("--chunking", default="early",
+                        help="TTS chunking policy, as TTS_CHUNKING (default: early)")
+    parser.add_argument("--context-max-tokens", type=int,
+                        help="Override CONTEXT_MAX_TOKENS for the agent (0 sends the whole conversation)")
+    parser.add_argument("--vad", choices=["energy", "silero"], default="energy",
+                        help="Voice activity detection (default: energy)")
+    args = parser.parse_args()
+
+    if args.context_max_tokens is not None:
+        # Read by the agent's settings in each worker process
+        os.environ["CONTEXT_MAX_TOKENS"] = str(args.context_max_tokens)
+
+    processes = max(1, min(args.processes, args.sessions))
+    shares = [args.sessions // processes + (1 if i < args.sessions % processes else 0) for i in range(processes)]
+    firsts = [sum(shares[:i]) for i in range(processes)]
+    print(f"Running {args.sessions} sessions in {processes} process(es), {args.turns} turns each, "
+          f"profile {args.profile}, vad {args.vad}...")
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(process_main, firsts, shares, [args] * processes))
+
+    turns = sum(r["turns"] for r in results)
+    errors = [e for r in results for e in r["errors"]]
+    cpu_s = sum(r["cpu_s"] for r in results)
+    wall_s = max(r["wall_s"] for r in results)
+    rss_growth = sum(r["rss_peak"] - r["rss_base"] for r in results)
+    rss_peak = sum(r["rss_peak"] for r in results)
+    lags = sorted(x * 1000 for r in results for x in r["lags"])
+    histograms = {}
+    for r in results:
+        for name, data in r["histograms"].items():
+            histograms.setdefault(name, Histogram()).merge(Histogram.from_dict(data))
+
+    print(f"{turns} turns completed ({args.sessions * args.turns} scripted), {len(errors)} session errors")
+    for error in errors[:5]:
+        print(f"  {error}")
+    print(f"CPU: {cpu_s / wall_s:.2f} cores over {wall_s:.0f}s, {cpu_s / args.sessions:.2f} CPU-s per session")
+    print(f"RSS: {rss_peak / 2**20:.0f} MB peak total, {rss_growth / args.sessions / 2**20:.1f} MB per session "
+          f"above each process's baseline")
+    print(f"Event loop lag ms: p50 {percentile(lags, 50):.1f}  p99 {percentile(lags, 99):.1f}  "
+          f"max {lags[-1] if lags else float('nan'):.1f}")
+    prompts = [tokens for r in results for tokens in r["prompt_tokens"] if tokens]
+    if prompts:
+        print(f"Prompt tokens per LLM call: first {sum(p[0] for p in prompts) / len(prompts):.0f}, "
+              f"last {sum(p[-1] for p in prompts) / len(prompts):.0f}, "
+              f"max {max(max(p) for p in prompts)}")
+    print(f"{'stage':>22} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in render_json(histograms).items():
+        print(f"{name:>22} {row['count']:>6} {row['p50_ms'] or 0:>8.0f} {row['p95_ms'] or 0:>8.0f} "
+              f"{row['p99_ms'] or 0:>8.0f}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Load test for the token API's /api/get-token endpoint.
+
+Fires a fixed number of token requests at a running API server with the
+given concurrency and reports throughput and latency percentiles. Point the
+API at benchmarks/livekit_standin.py to measure without a real LiveKit
+project, and compare ROOM_POOL_SIZE=0 (a room is created per request) with
+the default pool.
+
+With --workers, the benchmark instead starts its own stand-in and then the
+API once per worker count (python main.py api --workers N --per-worker-state),
+runs the same load against each and prints throughput side by side. Each
+worker then has its own room pool, so the pool is N times ROOM_POOL_SIZE.
+
+Usage:
+    python benchmarks/livekit_standin.py &
+    LIVEKIT_URL=http://127.0.0.1:7880 LIVEKIT_API_KEY=devkey LIVEKIT_API_SECRET=secret python main.py api &
+    python benchmarks/token_load.py --requests 500 --concurrency 50
+
+    python benchmarks/token_load.py --workers 1,2,4 --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_load(url, requests, concurrency):
+    """Issue `requests` GETs with at most `concurrency` in flight; return (latencies, errors, elapsed)."""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(session):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                async with session.get(url, params={"participant": f"load-{i}"}) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return sorted(latencies), errors, elapsed
+
+
+async def wait_until_up(url, timeout=30.0):
+    """Poll `url` until it answers 200, or raise after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+def stop(proc):
+    """Interrupt a server and wait for it to drain and exit."""
+    proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def sweep_workers(args):
+    """Run the load against a fresh API per worker count, all backed by one stand-in."""
+    counts = [int(n) for n in args.workers.split(",")]
+    env = dict(
+        os.environ,
+        LIVEKIT_URL=f"http://127.0.0.1:{args.standin_port}",
+        LIVEKIT_API_KEY="devkey",
+        LIVEKIT_API_SECRET="devsecret" * 4,
+    )
+    standin = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "livekit_standin.py"),
+         "--port", str(args.standin_port), "--call-ms", str(args.call_ms)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.api_port}/api/get-token"
+    rows = []
+    try:
+        for workers in counts:
+            api = subprocess.Popen(
+                [sys.executable, "main.py", "api", "--workers", str(workers), "--port", str(args.api_port),
+                 "--per-worker-state"],
+                cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                asyncio.run(wait_until_up(f"http://127.0.0.1:{args.api_port}/health"))
+                # Warm every worker's connections before measuring
+                asyncio.run(run_load(url, args.concurrency * workers, args.concurrency))
+                latencies, errors, elapsed = asyncio.run(run_load(url, args.requests, args.concurrency))
+            finally:
+                stop(api)
+            ms = [x * 1000 for x in latencies]
+            rows.append((workers, len(latencies) / elapsed, errors, percentile(ms, 50), percentile(ms, 99)))
+            print(f"{workers} worker(s): {rows[-1][1]:.0f} req/s")
+    finally:
+        stop(standin)
+
+    base = rows[0][1] if rows else 0
+    print(f"{'workers':>8} {'req/s':>8} {'speedup':>8} {'failed':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers, rate, errors, p50, p99 in rows:
+        print(f"{workers:>8} {rate:>8.0f} {rate / base if base else 0:>7.2f}x {errors:>7} {p50:>8.1f} {p99:>8.1f}")
+    print(f"({os.cpu_count()} CPUs available; scaling stops once workers exceed them)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the token endpoint")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/get-token",
+                        help="Token endpoint (default: http://127.0.0.1:8000/api/get-token)")
+    parser.add_argument("--requests", "-n", type=int, default=500,
+                        help="Total requests (default: 500)")
+    parser.add_argument("--concurrency", "-c", type=int, default=50,
+                        help="Requests in flight at once (default: 50)")
+    parser.add_argument("--workers",
+                        help="Comma-separated API worker counts to sweep, e.g. 1,2,4; starts its own "
+                             "stand-in and API for each instead of using --url")
+    parser.add_argument("--api-port", type=int, default=8100,
+                        help="Port for the API started by --workers (default: 8100)")
+    parser.add_argument("--standin-port", type=int, default=7890,
+                        help="Port for the stand-in started by --workers (default: 7890)")
+    parser.add_argument("--call-ms", type=float, default=20.0,
+                        help="Stand-in latency per LiveKit call with --workers (default: 20)")
+    args = parser.parse_args()
+
+    if args.workers:
+        sweep_workers(args)
+        return
+
+    latencies, errors, elapsed = asyncio.run(run_load(args.url, args.requests, args.concurrency))
+    ms = [x * 1000 for x in latencies]
+    print(f"{len(latencies)} ok, {errors} failed in {elapsed:.2f}s: {len(latencies) / elapsed:.0f} req/s")
+    print(f"latency ms: p50 {percentile(ms, 50):.1f}  p95 {percentile(ms, 95):.1f}  "
+          f"p99 {percentile(ms, 99):.1f}  max {ms[-1] if ms else float('nan'):.1f}")
+
+
+if __name__ == "__main__":
+    main()
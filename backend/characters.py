@@ -0,0 +1,160 @@
+"""
+Registry of agent characters, loaded once per process from the prompt files.
+
+A character is a pair of files in the prompts directory,
+<name>_instructions.md and <name>_intro.md. Jobs used to read one pair from
+disk on every dispatch, and changing character meant restarting the worker
+with other env vars. The registry reads every pair at startup and serves
+them from memory, so a job does no file I/O to pick its character, and a
+background thread polls the files and reloads them when they change.
+
+The VOICE_INSTRUCTIONS_FILE / VOICE_INTRO_FILE pair is registered as the
+"default" character, which rooms get when they ask for none or for one that
+doesn't exist.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("voice-cloning-agent")
+
+DEFAULT_CHARACTER = "default"
+_INSTRUCTIONS_SUFFIX = "_instructions.md"
+_INTRO_SUFFIX = "_intro.md"
+
+
+@dataclass(frozen=True)
+class Character:
+    """One character's prompts. Equal characters produce the same greetings and replies."""
+
+    name: str
+    instructions: str
+    intro_template: str
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+class CharacterRegistry:
+    """In-memory characters from a prompts directory, reloaded when the files change."""
+
+    def __init__(self, prompts_dir: str, default_instructions_file: str, default_intro_file: str) -> None:
+        self.prompts_dir = os.path.normpath(prompts_dir)
+        self.default_files = (default_instructions_file, default_intro_file)
+        self._characters: Dict[str, Character] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reload()
+
+    def _files(self) -> Dict[str, int]:
+        """Modification times of every prompt file the registry reads."""
+        paths = list(self.default_files)
+        try:
+            paths += [
+                os.path.join(self.prompts_dir, name) for name in os.listdir(self.prompts_dir)
+                if name.endswith(_INSTRUCTIONS_SUFFIX) or name.endswith(_INTRO_SUFFIX)
+            ]
+        except FileNotFoundError:
+            pass
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return mtimes
+
+    def reload(self) -> None:
+        """Read every character pair. Raises FileNotFoundError if the default pair is missing."""
+        mtimes = self._files()
+        characters = {}
+        for path in mtimes:
+            if os.path.dirname(path) != self.prompts_dir or not path.endswith(_INSTRUCTIONS_SUFFIX):
+                continue
+            name = os.path.basename(path)[:-len(_INSTRUCTIONS_SUFFIX)]
+            intro_path = os.path.join(self.prompts_dir, name + _INTRO_SUFFIX)
+            if intro_path not in mtimes:
+                logger.warning(f"Skipping character {name!r}: {intro_path} not found")
+                continue
+            characters[name] = Character(name, _read(path), _read(intro_path))
+
+        instructions_file, intro_file = self.default_files
+        for path in self.default_files:
+            if path not in mtimes:
+                raise FileNotFoundError(f"Character file not found: {path}")
+        characters[DEFAULT_CHARACTER] = Character(DEFAULT_CHARACTER, _read(instructions_file), _read(intro_file))
+
+        # Swapped whole, so readers never see a half-loaded registry
+        self._characters = characters
+        self._mtimes = mtimes
+        logger.info(f"Loaded characters: {', '.join(sorted(characters))}")
+
+    @property
+    def default(self) -> Character:
+        return self._characters[DEFAULT_CHARACTER]
+
+    def names(self) -> List[str]:
+        return sorted(self._characters)
+
+    def find(self, name: Optional[str]) -> Optional[Character]:
+        """The named character, or None if there is no such character."""
+        return self._characters.get(name or DEFAULT_CHARACTER)
+
+    def get(self, name: Optional[str]) -> Character:
+        """The named character, falling back to the default one."""
+        character = self.find(name)
+        if character is None:
+            logger.warning(f"Unknown character {name!r}, using {DEFAULT_CHARACTER!r}")
+            return self.default
+        return character
+
+    def watch(self, interval: float) -> None:
+        """Poll the prompt files every `interval` seconds and reload on change."""
+        if self._thread is not None or interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name="character-watch", daemon=True)
+        self._thread.start()
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            if self._files() == self._mtimes:
+                continue
+            try:
+                self.reload()
+            except (OSError, UnicodeDecodeError) as e:
+                # Keep serving the last good prompts, e.g. mid-save
+                logger.warning(f"Character reload failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+_characters: Optional[CharacterRegistry] = None
+
+
+def get_characters() -> CharacterRegistry:
+    """Process-wide character registry for the configured prompts, watched for changes."""
+    global _characters
+    if _characters is None:
+        from config import get_settings
+
+        voice = get_settings().voice
+        _characters = CharacterRegistry(voice.prompts_dir, voice.instructions_file, voice.intro_file)
+        _characters.watch(voice.character_reload_interval)
+    return _characters
+
+
+def character_from_metadata(metadata: str) -> Optional[str]:
+    """Character name from job metadata: JSON with a "character" key, set by the token API."""
+    try:
+        data = json.loads(metadata) if metadata else {}
+    except ValueError:
+        return None
+    return data.get("character") if isinstance(data, dict) else None
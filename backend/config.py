@@ -6,13 +6,11 @@ with validation and defaults.
 """
 
 import os
+import tempfile
 from typing import Optional
 
-from dotenv import load_dotenv
 from pydantic import BaseModel
 
-load_dotenv()
-
 
 class LiveKitConfig(BaseModel):
     """LiveKit configuration for real-time communication."""
@@ -20,6 +18,9 @@ class LiveKitConfig(BaseModel):
     api_key: str
     api_secret: str
     url: str
+    # Workers register under this name and are only dispatched explicitly, by the token API;
+    # empty restores LiveKit's automatic dispatch to every new room
+    agent_name: str = "voice-clone-agent"
 
 
 class ResembleConfig(BaseModel):
@@ -48,6 +49,10 @@ class LangfuseConfig(BaseModel):
     public_key: Optional[str] = None
     secret_key: Optional[str] = None
     host: str = "https://cloud.langfuse.com"
+    # Events buffered for background export before the oldest are dropped
+    buffer_size: int = 2048
+    # Seconds between background export batches
+    flush_interval: float = 1.0
     
     @property
     def enabled(self) -> bool:
@@ -60,6 +65,109 @@ class VoiceConfig(BaseModel):
     
     instructions_file: str = "prompts/default_instructions.md"
     intro_file: str = "prompts/default_intro.md"
+    # Every <name>_instructions.md / <name>_intro.md pair here is a character rooms can ask for
+    prompts_dir: str = "prompts"
+    # Seconds between checks of the prompt files for changes; 0 loads them once
+    character_reload_interval: float = 2.0
+    # How LLM text is chunked for TTS: early, eager, sentence or default (plugin tokenizer)
+    tts_chunking: str = "early"
+    # Seconds a dispatched agent waits for the user to join before ending the job
+    participant_timeout: float = 120.0
+
+
+class GreetingConfig(BaseModel):
+    """Pre-rendered intro audio played when a session starts."""
+    
+    enabled: bool = True
+    cache_dir: str = os.path.join("~", ".cache", "voice-clone", "greetings")
+    # Play the generic greeting when the user's name has no personalized one
+    generic_fallback: bool = True
+    # After a miss, render the generic greeting in the background for later sessions
+    render_on_miss: bool = True
+
+
+class ContextConfig(BaseModel):
+    """How much conversation each LLM call sends."""
+    
+    # Token budget for instructions, summary and recent turns (0 sends everything)
+    max_tokens: int = 3000
+    # Fold turns that leave the window into a rolling summary
+    summarize: bool = True
+
+
+class ResponseCacheConfig(BaseModel):
+    """Opt-in cache of replies (text and audio) to repeated user questions."""
+    
+    enabled: bool = False
+    cache_dir: str = os.path.join("~", ".cache", "voice-clone", "responses")
+    # Seconds a cached reply is served before it is regenerated
+    ttl: float = 86400.0
+    max_entries: int = 256
+    # Cosine similarity for matching a differently worded question (0 = exact matches only)
+    similarity: float = 0.92
+
+
+class ApiConfig(BaseModel):
+    """Token API settings."""
+    
+    host: str = "0.0.0.0"
+    port: int = 8000
+    # Server processes; each would have its own room pool and room index, so
+    # main.py api refuses more than one while LiveKit is configured
+    workers: int = 1
+    # uvicorn event loop and HTTP parser: auto picks uvloop / httptools when installed
+    loop: str = "auto"
+    http: str = "auto"
+    # Seconds in-flight requests get to finish on shutdown before connections are closed
+    graceful_timeout: float = 10.0
+    # Rooms created ahead of time so a token request only has to sign a JWT (0 disables)
+    room_pool_size: int = 4
+    # Pooled rooms older than this are discarded; keep it below room_empty_timeout
+    room_max_age: float = 240.0
+    # Seconds LiveKit keeps a room that nobody has joined
+    room_empty_timeout: int = 300
+    # Timeout for LiveKit server API calls
+    livekit_timeout: float = 10.0
+    # Seconds between full ListRooms refreshes of the webhook-maintained room index
+    room_reconcile_interval: float = 60.0
+
+
+class MetricsConfig(BaseModel):
+    """Per-turn latency metrics served by the agent worker."""
+    
+    enabled: bool = True
+    port: int = 9102
+    # Each worker's job processes write histogram snapshots to a subdirectory here
+    dir: str = os.path.join(tempfile.gettempdir(), "voice-agent-metrics")
+
+
+class AdmissionConfig(BaseModel):
+    """Which jobs the agent worker accepts, by session count, loop lag and memory."""
+    
+    enabled: bool = True
+    # Concurrent sessions per worker host (0 for no ceiling)
+    max_sessions: int = 10
+    # Worst recent event-loop lag in any job process before new jobs are turned away
+    max_loop_lag_ms: float = 100.0
+    # Memory kept free on the host, beyond what the next session is expected to need
+    min_free_memory_mb: float = 512.0
+
+
+class ProfilingConfig(BaseModel):
+    """Opt-in profiling of live agent sessions: node counters, loop stalls, stack sampling."""
+    
+    enabled: bool = False
+    # Sampled stacks (.folded) and counters (.json) are written here
+    dir: str = os.path.join(tempfile.gettempdir(), "voice-agent-profiles")
+    # Loop stalls longer than this are counted and their stack logged
+    stall_threshold_ms: float = 100.0
+    sample_interval_ms: float = 5.0
+    # Longest sampling run a request can ask for
+    max_seconds: float = 60.0
+    # Bearer token for the token API's profile endpoint; the endpoint is off without one
+    admin_token: Optional[str] = None
+    # Seconds before the same room can be profiled again
+    min_interval: float = 300.0
 
 
 class AppConfig(BaseModel):
@@ -79,6 +187,13 @@ class Settings(BaseModel):
     deepgram: DeepgramConfig
     langfuse: LangfuseConfig
     voice: VoiceConfig
+    greeting: GreetingConfig
+    context: ContextConfig
+    response_cache: ResponseCacheConfig
+    api: ApiConfig
+    metrics: MetricsConfig
+    admission: AdmissionConfig
+    profiling: ProfilingConfig
     app: AppConfig
 
 
@@ -90,7 +205,8 @@ def get_settings() -> Settings:
     """
     Get the application settings.
     
-    Loads configuration from environment variables with sensible defaults.
+    Loads configuration from environment variables (and .env, read on the
+    first call rather than at import) with sensible defaults.
     Uses a singleton pattern for performance.
     
     Returns:
@@ -101,12 +217,16 @@ def get_settings() -> Settings:
     """
     global _settings
     if _settings is None:
+        from dotenv import load_dotenv
+
+        load_dotenv()
         # Load from environment variables
         _settings = Settings(
             livekit=LiveKitConfig(
                 api_key=os.getenv("LIVEKIT_API_KEY", ""),
                 api_secret=os.getenv("LIVEKIT_API_SECRET", ""),
                 url=os.getenv("LIVEKIT_URL", ""),
+                agent_name=os.getenv("LIVEKIT_AGENT_NAME", "voice-clone-agent"),
             ),
             resemble=ResembleConfig(
                 api_key=os.getenv("RESEMBLE_API_KEY", ""),
@@ -123,10 +243,66 @@ def get_settings() -> Settings:
                 public_key=os.getenv("LANGFUSE_PUBLIC_KEY"),
                 secret_key=os.getenv("LANGFUSE_SECRET_KEY"),
                 host=os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com"),
+                buffer_size=int(os.getenv("LANGFUSE_BUFFER_SIZE", "2048")),
+                flush_interval=float(os.getenv("LANGFUSE_FLUSH_INTERVAL", "1.0")),
             ),
             voice=VoiceConfig(
                 instructions_file=os.getenv("VOICE_INSTRUCTIONS_FILE", "prompts/default_instructions.md"),
                 intro_file=os.getenv("VOICE_INTRO_FILE", "prompts/default_intro.md"),
+                prompts_dir=os.getenv("VOICE_PROMPTS_DIR", "prompts"),
+                character_reload_interval=float(os.getenv("VOICE_CHARACTER_RELOAD_INTERVAL", "2")),
+                tts_chunking=os.getenv("TTS_CHUNKING", "early"),
+                participant_timeout=float(os.getenv("VOICE_PARTICIPANT_TIMEOUT", "120")),
+            ),
+            greeting=GreetingConfig(
+                enabled=os.getenv("GREETING_CACHE_ENABLED", "true").lower() in ("true", "1", "yes"),
+                cache_dir=os.getenv("GREETING_CACHE_DIR", os.path.join("~", ".cache", "voice-clone", "greetings")),
+                generic_fallback=os.getenv("GREETING_GENERIC_FALLBACK", "true").lower() in ("true", "1", "yes"),
+                render_on_miss=os.getenv("GREETING_RENDER_ON_MISS", "true").lower() in ("true", "1", "yes"),
+            ),
+            context=ContextConfig(
+                max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "3000")),
+                summarize=os.getenv("CONTEXT_SUMMARIZE", "true").lower() in ("true", "1", "yes"),
+            ),
+            response_cache=ResponseCacheConfig(
+                enabled=os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ("true", "1", "yes"),
+                cache_dir=os.getenv("RESPONSE_CACHE_DIR", os.path.join("~", ".cache", "voice-clone", "responses")),
+                ttl=float(os.getenv("RESPONSE_CACHE_TTL", "86400")),
+                max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+                similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92")),
+            ),
+            api=ApiConfig(
+                host=os.getenv("API_HOST", "0.0.0.0"),
+                port=int(os.getenv("API_PORT", "8000")),
+                workers=int(os.getenv("API_WORKERS", "1")),
+                loop=os.getenv("API_LOOP", "auto"),
+                http=os.getenv("API_HTTP", "auto"),
+                graceful_timeout=float(os.getenv("API_GRACEFUL_TIMEOUT", "10")),
+                room_pool_size=int(os.getenv("ROOM_POOL_SIZE", "4")),
+                room_max_age=float(os.getenv("ROOM_POOL_MAX_AGE", "240")),
+                room_empty_timeout=int(os.getenv("ROOM_EMPTY_TIMEOUT", "300")),
+                livekit_timeout=float(os.getenv("LIVEKIT_API_TIMEOUT", "10")),
+                room_reconcile_interval=float(os.getenv("ROOM_RECONCILE_INTERVAL", "60")),
+            ),
+            metrics=MetricsConfig(
+                enabled=os.getenv("METRICS_ENABLED", "true").lower() in ("true", "1", "yes"),
+                port=int(os.getenv("METRICS_PORT", "9102")),
+                dir=os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-metrics")),
+            ),
+            admission=AdmissionConfig(
+                enabled=os.getenv("ADMISSION_ENABLED", "true").lower() in ("true", "1", "yes"),
+                max_sessions=int(os.getenv("AGENT_MAX_SESSIONS", "10")),
+                max_loop_lag_ms=float(os.getenv("AGENT_MAX_LOOP_LAG_MS", "100")),
+                min_free_memory_mb=float(os.getenv("AGENT_MIN_FREE_MEMORY_MB", "512")),
+            ),
+            profiling=ProfilingConfig(
+                enabled=os.getenv("PROFILING_ENABLED", "false").lower() in ("true", "1", "yes"),
+                dir=os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "voice-agent-profiles")),
+                stall_threshold_ms=float(os.getenv("PROFILING_STALL_THRESHOLD_MS", "100")),
+                sample_interval_ms=float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5")),
+                max_seconds=float(os.getenv("PROFILING_MAX_SECONDS", "60")),
+                admin_token=os.getenv("PROFILING_ADMIN_TOKEN") or None,
+                min_interval=float(os.getenv("PROFILING_MIN_INTERVAL", "300")),
             ),
             app=AppConfig(
                 environment=os.getenv("ENVIRONMENT", "development"),
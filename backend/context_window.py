@@ -0,0 +1,153 @@
+"""
+Token-budgeted chat context for the voice agent's LLM calls.
+
+The agent keeps the whole conversation, but sending all of it on every turn
+makes each reply slower and more expensive than the last. ContextWindow
+builds the context actually sent: the instructions, a rolling summary of
+older turns, and as many of the newest items as fit in the token budget.
+
+When items fall out of the window they are folded into the summary by a
+background LLM call, so summarizing never delays a reply; until it lands,
+the dropped items are simply left out. Token counts are estimated once per
+message and cached by message id.
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from livekit.agents import llm
+
+logger = logging.getLogger("voice-cloning-agent")
+
+# Rough per-message overhead of the chat format (role, separators)
+_MESSAGE_OVERHEAD = 4
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a voice conversation between a user and an assistant. "
+    "Update the summary with the new messages below. Keep names, facts the user shared, "
+    "questions still open and anything the assistant promised. Write at most {max_words} words "
+    "of plain prose, without preamble."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def item_text(item: llm.ChatItem) -> str:
+    if item.type == "message":
+        return item.text_content or ""
+    if item.type == "function_call":
+        return f"{item.name}({item.arguments})"
+    if item.type == "function_call_output":
+        return item.output
+    return ""
+
+
+class ContextWindow:
+    """Sliding, token-budgeted view of a chat context with a rolling summary of what slid out."""
+
+    def __init__(
+        self,
+        max_tokens: int,
+        summarizer: Optional[llm.LLM] = None,
+        summary_max_words: int = 150,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.summary_max_words = summary_max_words
+        self.summary = ""
+        self._summarized: set = set()
+        self._tokens: Dict[str, int] = {}
+        self._summary_task: Optional[asyncio.Task] = None
+        self.last_tokens = 0
+
+    def tokens(self, item: llm.ChatItem) -> int:
+        """Estimated tokens for `item`, computed once per message id."""
+        count = self._tokens.get(item.id)
+        if count is None:
+            count = estimate_tokens(item_text(item)) + _MESSAGE_OVERHEAD
+            self._tokens[item.id] = count
+        return count
+
+    def apply(self, chat_ctx: llm.ChatContext) -> llm.ChatContext:
+        """Return the context to send: instructions, summary and the newest items that fit."""
+        items = chat_ctx.items
+        pinned = []
+        start = 0
+        # Instructions sit at the front as system messages and are always sent
+        while start < len(items) and items[start].type == "message" and items[start].role in ("system", "developer"):
+            pinned.append(items[start])
+            start += 1
+        conversation = items[start:]
+
+        budget = self.max_tokens - sum(self.tokens(item) for item in pinned)
+        if self.summary:
+            budget -= estimate_tokens(self.summary) + _MESSAGE_OVERHEAD
+        kept: List[llm.ChatItem] = []
+        for item in reversed(conversation):
+            cost = self.tokens(item)
+            # The newest item is always sent, whatever its size
+            if kept and cost > budget:
+                break
+            kept.append(item)
+            budget -= cost
+        kept.reverse()
+        # A tool result without its call would be rejected by the API
+        while len(kept) > 1 and kept[0].type == "function_call_output":
+            kept.pop(0)
+
+        dropped = conversation[:len(conversation) - len(kept)]
+        new_dropped = [item for item in dropped if item.id not in self._summarized]
+        if new_dropped:
+            self._summarize_in_background(new_dropped)
+
+        window = list(pinned)
+        if self.summary:
+            window.append(llm.ChatMessage(
+                role="system",
+                content=[f"Summary of the earlier conversation: {self.summary}"],
+            ))
+        window.extend(kept)
+        self.last_tokens = self.max_tokens - budget
+        return llm.ChatContext(window)
+
+    def _summarize_in_background(self, items: List[llm.ChatItem]) -> None:
+        if self.summarizer is None:
+            self._summarized.update(item.id for item in items)
+            return
+        if self._summary_task is not None and not self._summary_task.done():
+            # The next turn picks these up once the running summary lands
+            return
+        self._summary_task = asyncio.create_task(self._summarize(items))
+
+    async def _summarize(self, items: List[llm.ChatItem]) -> None:
+        lines = []
+        for item in items:
+            if item.type == "message" and item.role in ("user", "assistant"):
+                lines.append(f"{item.role}: {item_text(item)}")
+        ctx = llm.ChatContext()
+        ctx.add_message(role="system", content=SUMMARY_PROMPT.format(max_words=self.summary_max_words))
+        ctx.add_message(
+            role="user",
+            content=f"Summary so far: {self.summary or '(none)'}\n\nNew messages:\n" + "\n".join(lines),
+        )
+        summary = ""
+        try:
+            async with self.summarizer.chat(chat_ctx=ctx) as stream:
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        summary += chunk.delta.content
+        except Exception as e:
+            # Leave the items unsummarized; the next turn retries
+            logger.warning(f"Context summary failed: {e}")
+            return
+        self.summary = summary.strip()
+        self._summarized.update(item.id for item in items)
+        logger.info(f"Summarized {len(items)} earlier items into {estimate_tokens(self.summary)} tokens")
+
+    async def aclose(self) -> None:
+        if self._summary_task is not None:
+            self._summary_task.cancel()
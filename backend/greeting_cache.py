@@ -0,0 +1,251 @@
+"""
+Pre-rendered greeting audio for the agent's intro.
+
+Every session used to open with a full LLM round trip plus Resemble TTS for a
+greeting that is nearly identical each time. GreetingCache renders the intro
+once per character (instructions and intro template), voice and model, and
+stores the text and 16-bit PCM on disk. At join the agent plays the cached
+audio straight into the session and only falls back to live generation when
+nothing is cached.
+
+Greetings come in name buckets: a generic one that addresses nobody by name,
+and optional personalized ones for names rendered ahead of time with
+`python main.py greetings NAME...`. Editing a prompt file, switching voice or
+changing the LLM model changes the key, so stale greetings are never played.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+import aiohttp
+from livekit import rtc
+
+logger = logging.getLogger("voice-cloning-agent")
+
+GENERIC_BUCKET = ""
+# A background render claimed by another process is retried after this long
+_RENDER_CLAIM_S = 120.0
+# Frame size used when replaying cached audio into the session
+_FRAME_MS = 20
+
+
+def name_bucket(name: Optional[str]) -> str:
+    """Normalize a participant name to the bucket its greeting is stored under."""
+    return " ".join((name or "").split()).lower()
+
+
+def generic_intro_prompt(intro_template: str) -> str:
+    """Intro instructions for a greeting that works for any user."""
+    return intro_template.format(name="the user") + " You don't know their name yet, so don't use one."
+
+
+@dataclass
+class Greeting:
+    """A rendered greeting: what was said and its mono PCM."""
+
+    text: str
+    pcm: bytes
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / 2 / self.sample_rate
+
+    def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        return pcm_frames(self.pcm, self.sample_rate)
+
+
+async def pcm_frames(pcm: bytes, sample_rate: int) -> AsyncIterator[rtc.AudioFrame]:
+    """Replay mono 16-bit PCM as short audio frames."""
+    step = sample_rate * _FRAME_MS // 1000 * 2
+    for offset in range(0, len(pcm), step):
+        chunk = pcm[offset:offset + step]
+        yield rtc.AudioFrame(chunk, sample_rate, 1, len(chunk) // 2)
+
+
+class GreetingCache:
+    """Greetings on disk, keyed by character, voice, model and name bucket."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        instructions: str,
+        intro_template: str,
+        voice_uuid: str,
+        model: str,
+    ) -> None:
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.instructions = instructions
+        self.intro_template = intro_template
+        self.voice_uuid = voice_uuid
+        self.model = model
+        self._loaded: Dict[str, Greeting] = {}
+        self._rendering: Dict[str, asyncio.Task] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, bucket: str) -> str:
+        payload = json.dumps([self.instructions, self.intro_template, self.voice_uuid, self.model, bucket])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".pcm", base + ".json"
+
+    def get(self, bucket: str) -> Optional[Greeting]:
+        """Return the greeting for `bucket`, reading it from disk on first use."""
+        key = self.key(bucket)
+        greeting = self._loaded.get(key)
+        if greeting is not None:
+            return greeting
+        pcm_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(pcm_path, "rb") as f:
+                pcm = f.read()
+        except (OSError, ValueError):
+            return None
+        greeting = Greeting(text=meta["text"], pcm=pcm, sample_rate=meta["sample_rate"])
+        self._loaded[key] = greeting
+        return greeting
+
+    def lookup(self, name: Optional[str], generic_fallback: bool = True) -> Optional[Greeting]:
+        """Personalized greeting for `name` if rendered, else the generic one."""
+        bucket = name_bucket(name)
+        greeting = self.get(bucket) if bucket else None
+        if greeting is None and generic_fallback:
+            greeting = self.get(GENERIC_BUCKET)
+        return greeting
+
+    def put(self, bucket: str, greeting: Greeting) -> None:
+        key = self.key(bucket)
+        pcm_path, meta_path = self._paths(key)
+        meta = {
+            "text": greeting.text,
+            "sample_rate": greeting.sample_rate,
+            "bucket": bucket,
+            "voice_uuid": self.voice_uuid,
+            "model": self.model,
+            "created": time.time(),
+        }
+        # PCM first: the metadata file is what marks an entry as complete
+        for path, data, mode in ((pcm_path, greeting.pcm, "wb"), (meta_path, json.dumps(meta), "w")):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._loaded[key] = greeting
+
+    async def render(
+        self,
+        bucket: str,
+        http_session: Optional[aiohttp.ClientSession] = None,
+    ) -> Greeting:
+        """Generate the greeting text with the LLM, synthesize it and store it."""
+        from livekit.agents import llm
+        from livekit.plugins import openai, resemble
+
+        if bucket:
+            prompt = self.intro_template.format(name=bucket.title())
+        else:
+            prompt = generic_intro_prompt(self.intro_template)
+        chat_ctx = llm.ChatContext()
+        chat_ctx.add_message(role="system", content=self.instructions)
+        chat_ctx.add_message(role="system", content=prompt)
+
+        text = ""
+        async with openai.LLM(model=self.model).chat(chat_ctx=chat_ctx) as stream:
+            async for chunk in stream:
+                if chunk.delta and chunk.delta.content:
+                    text += chunk.delta.content
+        text = text.strip()
+
+        tts = resemble.TTS(voice_uuid=self.voice_uuid, http_session=http_session, use_streaming=False)
+        frames = [event.frame async for event in tts.synthesize(text)]
+        await tts.aclose()
+        audio = rtc.combine_audio_frames(frames)
+        if audio.num_channels != 1:
+            raise ValueError(f"Expected mono TTS audio, got {audio.num_channels} channels")
+
+        greeting = Greeting(text=text, pcm=audio.data.tobytes(), sample_rate=audio.sample_rate)
+        self.put(bucket, greeting)
+        return greeting
+
+    def _claim_render(self, bucket: str) -> Optional[str]:
+        """Take the cross-process render claim for `bucket`; returns its path, or None if held."""
+        claim_path = os.path.join(self.cache_dir, self.key(bucket) + ".rendering")
+        try:
+            if time.time() - os.path.getmtime(claim_path) > _RENDER_CLAIM_S:
+                # Left behind by a job that died mid-render
+                os.remove(claim_path)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return None
+        return claim_path
+
+    def render_in_background(self, bucket: str) -> None:
+        """Render a missing greeting for later sessions without delaying this one.
+
+        Concurrent cold sessions in this process share one render, and a claim
+        file next to the entries keeps other job processes from starting their own.
+        """
+        if bucket in self._rendering:
+            return
+        claim_path = self._claim_render(bucket)
+        if claim_path is None:
+            return
+
+        async def _render():
+            try:
+                greeting = await self.render(bucket)
+                logger.info(f"Cached greeting for bucket {bucket or '<generic>'} ({greeting.duration:.1f}s)")
+            except Exception as e:
+                logger.warning(f"Could not render greeting for bucket {bucket or '<generic>'}: {e}")
+            finally:
+                self._rendering.pop(bucket, None)
+                try:
+                    os.remove(claim_path)
+                except OSError:
+                    pass
+
+        self._rendering[bucket] = asyncio.create_task(_render())
+
+
+def open_greeting_cache(instructions: str, intro_template: str) -> Optional[GreetingCache]:
+    """Greeting cache for the configured voice and model, or None when disabled."""
+    from config import get_settings
+
+    settings = get_settings()
+    if not settings.greeting.enabled:
+        return None
+    return GreetingCache(
+        settings.greeting.cache_dir,
+        instructions,
+        intro_template,
+        settings.resemble.voice_uuid,
+        settings.openai.model,
+    )
+
+
+async def prerender(instructions: str, intro_template: str, names) -> None:
+    """Render the generic greeting and one per name, outside of any agent job."""
+    cache = open_greeting_cache(instructions, intro_template)
+    if cache is None:
+        print("Greeting cache is disabled (GREETING_CACHE_ENABLED=false)")
+        return
+    async with aiohttp.ClientSession() as http_session:
+        for bucket in [GENERIC_BUCKET] + [name_bucket(n) for n in names]:
+            start = time.perf_counter()
+            greeting = await cache.render(bucket, http_session=http_session)
+            print(f"{bucket or '<generic>'}: {greeting.duration:.1f}s of audio in "
+                  f"{time.perf_counter() - start:.1f}s - {greeting.text!r}")
+    print(f"Greetings cached in {cache.cache_dir}")
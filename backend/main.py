@@ -5,12 +5,22 @@ Voice Cloning Demo - Main Entry Point
 This module provides entry points for running the voice cloning demo:
 - Run the LiveKit agent worker for voice conversations
 - Run the FastAPI server for token generation
+
+Each command imports what it needs inside its run_* function, so the CLI
+itself starts without loading LiveKit, FastAPI or the service plugins.
 """
 
-import asyncio
 import sys
 from typing import Optional
 
+# What each command imports before doing any work, for profile-imports
+COMMAND_IMPORTS = {
+    "agent": "import voice_agent; voice_agent.load_plugins()",
+    "api": "import api",
+    "greetings": "import characters, greeting_cache",
+    "help": "import main",
+}
+
 def main():
     """Main entry point with command selection"""
     if len(sys.argv) < 2:
@@ -23,6 +33,10 @@ def main():
         run_agent()
     elif command == "api":
         run_api()
+    elif command == "greetings":
+        run_greetings()
+    elif command == "profile-imports":
+        run_profile_imports()
     elif command == "help":
         print_usage()
     else:
@@ -40,11 +54,19 @@ Usage:
 Commands:
     agent    Start the LiveKit agent worker (for voice conversations)
     api      Start the FastAPI server (for token generation)
+             [--workers N] [--loop uvloop] [--http httptools] [--graceful-timeout S]
+    greetings [NAME...]
+             Pre-render each character's intro greeting (generic, plus one per name)
+    profile-imports [agent|api|greetings|help] [--top N]
+             Show what importing a command's modules costs, by module and package
     help     Show this help message
 
 Examples:
     python main.py agent    # Start voice cloning agent worker
     python main.py api      # Start API server on port 8000
+    python main.py api --workers 4      # Production: four server processes
+    python main.py greetings Alex Sam   # Cache greetings before going live
+    python main.py profile-imports agent   # Where worker startup time goes
 
 Environment Setup:
     Copy .env.example to .env and configure your API keys:
@@ -59,13 +81,15 @@ For more information, see the README.md file.
 def run_agent():
     """Run the voice cloning LiveKit agent worker"""
     try:
-        from voice_agent import cli, WorkerOptions, entrypoint
+        from voice_agent import cli, worker_options
+        from turn_metrics import start_worker_metrics
         print("🎤 Starting Voice Cloning Agent Worker...")
         print("Ready to demonstrate voice cloning...")
         # Pass remaining args to the LiveKit CLI (e.g., 'dev', 'download-files')
         agent_args = sys.argv[2:] if len(sys.argv) > 2 else ['dev']
         sys.argv = ['voice_agent'] + agent_args
-        cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+        start_worker_metrics()
+        cli.run_app(worker_options())
     except ImportError as e:
         print(f"Error importing agent modules: {e}")
         print("Make sure all dependencies are installed: uv sync")
@@ -75,14 +99,42 @@ def run_agent():
 def run_api():
     """Run the FastAPI server for token generation"""
     try:
+        import argparse
         import uvicorn
-        from api import app
+        from config import get_settings
+        settings = get_settings().api
+        parser = argparse.ArgumentParser(prog="main.py api", description="Serve the token API")
+        parser.add_argument("--host", default=settings.host)
+        parser.add_argument("--port", type=int, default=settings.port)
+        parser.add_argument("--workers", type=int, default=settings.workers,
+                            help="Server processes sharing the port (default: API_WORKERS or 1)")
+        parser.add_argument("--per-worker-state", action="store_true",
+                            help="Allow --workers > 1 with LiveKit configured, each worker keeping its own "
+                                 "room pool and room index (for load testing, not production)")
+        parser.add_argument("--loop", choices=["auto", "asyncio", "uvloop"], default=settings.loop)
+        parser.add_argument("--http", choices=["auto", "h11", "httptools"], default=settings.http)
+        parser.add_argument("--graceful-timeout", type=float, default=settings.graceful_timeout,
+                            help="Seconds to drain in-flight requests on shutdown")
+        args = parser.parse_args(sys.argv[2:])
+        livekit = get_settings().livekit
+        if args.workers > 1 and livekit.url and livekit.api_key and livekit.api_secret and not args.per_worker_state:
+            # LiveKit posts each webhook to one worker, so per-worker room indexes
+            # drift apart, and ROOM_POOL_SIZE would become workers x rooms
+            print(f"Error: --workers {args.workers} would give each worker its own room pool and room index.")
+            print("Run one worker per host, or pass --per-worker-state to accept the split state.")
+            sys.exit(1)
         print("🚀 Starting Voice Cloning Demo API Server...")
-        print("Ready to generate tokens for voice cloning demos...")
+        print(f"Ready to generate tokens for voice cloning demos with {args.workers} worker(s)...")
+        # An import string, so each worker process builds its own app and
+        # lifespan state (LiveKit client, room pool, room index)
         uvicorn.run(
-            app,
-            host="0.0.0.0",
-            port=8000,
+            "api:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            loop=args.loop,
+            http=args.http,
+            timeout_graceful_shutdown=args.graceful_timeout,
             log_level="info"
         )
     except ImportError as e:
@@ -91,5 +143,67 @@ def run_api():
     except Exception as e:
         print(f"Error starting API server: {e}")
 
+def run_profile_imports():
+    """Report the import cost of a command, measured in a fresh interpreter"""
+    import argparse
+    import os
+    import subprocess
+    parser = argparse.ArgumentParser(prog="main.py profile-imports",
+                                     description="Show what importing a command's modules costs")
+    parser.add_argument("command", nargs="?", choices=sorted(COMMAND_IMPORTS), default="agent")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table (default: 15)")
+    args = parser.parse_args(sys.argv[2:])
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", COMMAND_IMPORTS[args.command]],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    if result.returncode != 0 or not modules:
+        print(f"Error profiling imports for {args.command}:")
+        print("\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:")))
+        sys.exit(1)
+
+    packages = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    total = sum(self_us for _, self_us, _ in modules)
+    print(f"Importing for '{args.command}': {total / 1000:.0f} ms in {len(modules)} modules")
+    print(f"\n{'package':<40} {'ms':>8} {'share':>6}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<40} {self_us / 1000:>8.1f} {self_us / total:>6.0%}")
+    print(f"\n{'module':<56} {'self ms':>8} {'total ms':>9}")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"{name:<56} {self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}")
+
+def run_greetings():
+    """Pre-render greeting audio for every character in the configured voice"""
+    try:
+        import asyncio
+        from characters import get_characters
+        from greeting_cache import prerender
+        characters = get_characters()
+
+        async def render_all():
+            for name in characters.names():
+                character = characters.get(name)
+                print(f"🎙️ Rendering greetings for {name}...")
+                await prerender(character.instructions, character.intro_template, sys.argv[2:])
+
+        asyncio.run(render_all())
+    except ImportError as e:
+        print(f"Error importing agent modules: {e}")
+        print("Make sure all dependencies are installed: uv sync")
+    except Exception as e:
+        print(f"Error rendering greetings: {e}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+Opt-in profiling of running agent sessions.
+
+When a session stutters in production, the pipeline nodes are async
+generators that nothing outside them can see into. SessionProfiler adds
+three views, all off unless PROFILING_ENABLED is set (the agent then never
+wraps a node or starts a thread, so the cost when off is one None check per
+node call):
+
+- Node counters. instrument() wraps a node's stream and counts items and
+  bytes per second and how long each item took to arrive.
+- A loop watchdog. A heartbeat task measures how late the event loop wakes
+  it, and a thread captures the loop thread's stack while it is stalled, so
+  the slow callback is named in the log and not only its duration.
+- An on-demand sampling profiler. It samples the job's threads for a few
+  seconds and writes collapsed stacks (<room>-<time>.folded, one
+  "frame;frame;frame count" line per stack) for flamegraph.pl or
+  speedscope, with the node counters and stalls in a .json next to it.
+
+Each job process runs one room, so profiling the process profiles that
+room. A run is triggered by a data message on the "profiler" topic sent
+through the server API (the token API's POST /api/rooms/{room}/profile);
+messages from participants are ignored.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, Optional, TypeVar
+
+from livekit import rtc
+from livekit.agents import llm, stt
+
+logger = logging.getLogger("voice-cloning-agent")
+
+PROFILER_TOPIC = "profiler"
+
+# Seconds between watchdog heartbeats
+_HEARTBEAT_INTERVAL = 0.02
+
+T = TypeVar("T")
+
+
+def item_size(item) -> int:
+    """Payload bytes of an item flowing through a pipeline node."""
+    if isinstance(item, rtc.AudioFrame):
+        return item.data.nbytes
+    if isinstance(item, str):
+        return len(item.encode("utf-8"))
+    if isinstance(item, llm.ChatChunk):
+        return len(item.delta.content.encode("utf-8")) if item.delta and item.delta.content else 0
+    if isinstance(item, stt.SpeechEvent):
+        return len(item.alternatives[0].text.encode("utf-8")) if item.alternatives else 0
+    return 0
+
+
+class NodeStats:
+    """Item and byte counts for one node, with the time each item took to arrive."""
+
+    __slots__ = ("items", "bytes", "wait", "max_wait", "first", "last")
+
+    def __init__(self) -> None:
+        self.items = 0
+        self.bytes = 0
+        self.wait = 0.0
+        self.max_wait = 0.0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+
+    def add(self, wait: float, size: int, now: float) -> None:
+        self.items += 1
+        self.bytes += size
+        self.wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if self.first is None:
+            self.first = now - wait
+        self.last = now
+
+    def to_dict(self) -> dict:
+        elapsed = (self.last - self.first) if self.items else 0.0
+        return {
+            "items": self.items,
+            "bytes": self.bytes,
+            "items_per_s": round(self.items / elapsed, 1) if elapsed > 0 else None,
+            "bytes_per_s": round(self.bytes / elapsed, 1) if elapsed > 0 else None,
+            "mean_wait_ms": round(self.wait / self.items * 1000, 2) if self.items else None,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+        }
+
+
+class LoopWatchdog:
+    """Detects event-loop stalls and logs the stack that caused them."""
+
+    def __init__(self, threshold: float) -> None:
+        self.threshold = threshold
+        self.stalls = 0
+        self.max_stall = 0.0
+        self._beat = time.perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start watching the running loop; call from the loop's thread."""
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.perf_counter()
+            await asyncio.sleep(_HEARTBEAT_INTERVAL)
+            late = time.perf_counter() - self._beat - _HEARTBEAT_INTERVAL
+            if late > self.threshold:
+                self.stalls += 1
+                self.max_stall = max(self.max_stall, late)
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            if beat == reported_beat or time.perf_counter() - beat - _HEARTBEAT_INTERVAL <= self.threshold:
+                continue
+            # Once per stall: the stack of whatever is holding the loop
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                stack = " <- ".join(_frame_name(f) for f in _walk(frame))
+                logger.warning(f"Event loop stalled over {self.threshold * 1000:.0f} ms in: {stack}")
+
+    def to_dict(self) -> dict:
+        return {"stalls": self.stalls, "max_stall_ms": round(self.max_stall * 1000, 1)}
+
+    async def aclose(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def _walk(frame):
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float) -> Dict[str, int]:
+    """Sample every thread's stack for `seconds`; returns collapsed stack -> sample count."""
+    me = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    counts: Dict[str, int] = {}
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            # Function-level frames, root first, under the thread's name
+            stack = [f"{f.f_code.co_qualname} ({os.path.basename(f.f_code.co_filename)})" for f in _walk(frame)]
+            stack.append(names.get(ident, f"thread-{ident}"))
+            key = ";".join(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+        time.sleep(interval)
+    return counts
+
+
+class SessionProfiler:
+    """Node counters, loop watchdog and on-demand stack sampling for one job's session."""
+
+    def __init__(
+        self,
+        room_name: str,
+        output_dir: str,
+        stall_threshold: float,
+        sample_interval: float,
+        max_seconds: float,
+    ) -> None:
+        self.room_name = room_name
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.max_seconds = max_seconds
+        self.nodes: Dict[str, NodeStats] = {}
+        self.watchdog = LoopWatchdog(stall_threshold)
+        self._sampling: Optional[asyncio.Task] = None
+
+    def start(self, room: Optional[rtc.Room] = None) -> None:
+        """Start the watchdog and, given a room, listen there for profiling requests."""
+        self.watchdog.start()
+        if room is not None:
+            room.on("data_received", self._on_data)
+
+    async def instrument(self, node: str, stream: AsyncIterable[T]) -> AsyncIterator[T]:
+        """Pass `stream` through, counting what it yields under `node`."""
+        stats = self.nodes.get(node)
+        if stats is None:
+            stats = self.nodes[node] = NodeStats()
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                now = time.perf_counter()
+                stats.add(now - start, item_size(item), now)
+                yield item
+        finally:
+            # An interrupted reply closes the wrapper; close the node with it
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    def snapshot(self) -> dict:
+        return {
+            "room": self.room_name,
+            "nodes": {name: stats.to_dict() for name, stats in self.nodes.items()},
+            "loop": self.watchdog.to_dict(),
+        }
+
+    def _on_data(self, packet: rtc.DataPacket) -> None:
+        # Only the server API can start a run; participants cannot
+        if packet.topic != PROFILER_TOPIC or packet.participant is not None:
+            return
+        try:
+            seconds = float(json.loads(packet.data.decode("utf-8")).get("seconds", 10))
+        except (ValueError, AttributeError):
+            seconds = 10.0
+        self.profile_in_background(seconds)
+
+    def profile_in_background(self, seconds: float) -> bool:
+        """Start a sampling run unless one is already going."""
+        if self._sampling is not None and not self._sampling.done():
+            return False
+        self._sampling = asyncio.create_task(self.profile(seconds))
+        return True
+
+    async def profile(self, seconds: float) -> str:
+        """Sample for `seconds` (capped) and write the .folded stacks and .json counters; returns the base path."""
+        seconds = max(0.1, min(seconds, self.max_seconds))
+        logger.info(f"Profiling {self.room_name} for {seconds:g}s")
+        counts = await asyncio.to_thread(sample_stacks, seconds, self.sample_interval)
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.room_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in sorted(counts.items()):
+                f.write(f"{stack} {count}\n")
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        logger.info(f"Wrote profile of {self.room_name} to {base}.folded ({sum(counts.values())} samples)")
+        return base
+
+    async def aclose(self) -> None:
+        if self._sampling is not None:
+            self._sampling.cancel()
+        await self.watchdog.aclose()
+        logger.info(f"Session profile for {self.room_name}", extra={"profile": self.snapshot()})
+
+
+def open_profiler(room_name: str) -> Optional[SessionProfiler]:
+    """Profiler for a job's session, or None when profiling is disabled."""
+    from config import get_settings
+
+    config = get_settings().profiling
+    if not config.enabled:
+        return None
+    return SessionProfiler(
+        room_name,
+        config.dir,
+        stall_threshold=config.stall_threshold_ms / 1000,
+        sample_interval=config.sample_interval_ms / 1000,
+        max_seconds=config.max_seconds,
+    )
@@ -0,0 +1,262 @@
+"""
+Opt-in cache of agent replies to repeated user questions.
+
+Demo visitors ask the same handful of questions over and over, and each one
+used to cost an OpenAI completion plus Resemble synthesis. ResponseCache sits
+in front of the LLM node: it is keyed by the normalized last user message
+within a namespace of the character instructions, voice and model, and stores
+the reply's text chunks together with the audio the TTS produced for them.
+A hit replays both, so neither OpenAI nor Resemble is called.
+
+Lookup is exact first; with a similarity threshold set, a miss then embeds
+the question and takes the closest cached question above the threshold.
+Entries expire after a TTL and the least recently used are evicted past
+max_entries. Entries live on disk, shared by every job process of a worker
+host, and each process keeps an index of them that it reloads when the
+directory changes.
+
+Replies are assumed not to depend on earlier turns, which holds for the
+repeated head of demo traffic ("how does voice cloning work?") but not in
+general, so the cache is off unless RESPONSE_CACHE_ENABLED is set.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from livekit import rtc
+
+logger = logging.getLogger("voice-cloning-agent")
+
+_EMBEDDING_MODEL = "text-embedding-3-small"
+_EMBEDDING_DIMENSIONS = 256
+# A slow embedding call must not hold up the turn: give up and go to the LLM
+_EMBEDDING_TIMEOUT = 0.5
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+@dataclass
+class CachedResponse:
+    """A cached reply: LLM text chunks and, once a full playout was captured, its audio."""
+
+    question: str
+    chunks: List[str]
+    pcm: Optional[bytes] = None
+    sample_rate: int = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+
+@dataclass
+class PendingResponse:
+    """A live reply being captured for the cache during one turn."""
+
+    question: str
+    embedding: Optional[List[float]]
+    chunks: List[str] = field(default_factory=list)
+    frames: List[rtc.AudioFrame] = field(default_factory=list)
+    # Set once the LLM stream ended normally without tool calls
+    llm_complete: bool = False
+
+
+class ResponseCache:
+    """Disk-backed reply cache with exact and embedding-similarity lookup."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        instructions: str,
+        voice_uuid: str,
+        model: str,
+        ttl: float = 86400.0,
+        max_entries: int = 256,
+        similarity: float = 0.0,
+    ) -> None:
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.namespace = hashlib.sha256(
+            json.dumps([instructions, voice_uuid, model]).encode("utf-8")
+        ).hexdigest()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.hits = 0
+        self.misses = 0
+        # key -> metadata of every live entry in this namespace
+        self._index: Dict[str, dict] = {}
+        self._embeddings: Optional[np.ndarray] = None
+        self._embedding_keys: List[str] = []
+        self._index_mtime = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, question: str) -> str:
+        payload = json.dumps([self.namespace, normalize_question(question)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".pcm"
+
+    def _refresh_index(self) -> None:
+        """Reload entry metadata if another process added or removed entries."""
+        mtime = os.stat(self.cache_dir).st_mtime_ns
+        if mtime == self._index_mtime:
+            return
+        index = {}
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get("namespace") == self.namespace:
+                index[entry.name[:-len(".json")]] = meta
+        self._index = index
+        self._embedding_keys = [k for k, meta in index.items() if meta.get("embedding")]
+        self._embeddings = (
+            np.array([index[k]["embedding"] for k in self._embedding_keys], dtype=np.float32)
+            if self._embedding_keys else None
+        )
+        self._index_mtime = mtime
+
+    def _expired(self, meta: dict) -> bool:
+        return time.time() - meta["created"] > self.ttl
+
+    def _load(self, key: str) -> Optional[CachedResponse]:
+        meta = self._index.get(key)
+        if meta is None or self._expired(meta):
+            return None
+        meta_path, pcm_path = self._paths(key)
+        pcm = None
+        if meta.get("sample_rate"):
+            try:
+                with open(pcm_path, "rb") as f:
+                    pcm = f.read()
+            except OSError:
+                pass
+        try:
+            # Recently used entries survive eviction
+            os.utime(meta_path)
+        except OSError:
+            return None
+        return CachedResponse(meta["question"], meta["chunks"], pcm, meta.get("sample_rate", 0))
+
+    async def _embed(self, question: str) -> Optional[List[float]]:
+        from livekit.plugins import openai
+
+        try:
+            data = await asyncio.wait_for(
+                openai.create_embeddings(
+                    input=[normalize_question(question)],
+                    model=_EMBEDDING_MODEL,
+                    dimensions=_EMBEDDING_DIMENSIONS,
+                ),
+                _EMBEDDING_TIMEOUT,
+            )
+        except Exception as e:
+            logger.debug(f"Response cache embedding failed: {e}")
+            return None
+        return data[0].embedding
+
+    async def lookup(self, question: str) -> Tuple[Optional[CachedResponse], PendingResponse]:
+        """Return a cached reply (or None) and the capture to fill in on a miss."""
+        self._refresh_index()
+        response = self._load(self.key(question))
+        embedding = None
+        if response is None and self.similarity > 0:
+            embedding = await self._embed(question)
+            if embedding is not None and self._embeddings is not None:
+                query = np.asarray(embedding, dtype=np.float32)
+                scores = self._embeddings @ query / (
+                    np.linalg.norm(self._embeddings, axis=1) * np.linalg.norm(query) + 1e-9
+                )
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity:
+                    response = self._load(self._embedding_keys[best])
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response, PendingResponse(question, embedding)
+
+    def put(self, pending: PendingResponse) -> None:
+        """Store a fully played reply."""
+        key = self.key(pending.question)
+        meta_path, pcm_path = self._paths(key)
+        meta = {
+            "namespace": self.namespace,
+            "question": normalize_question(pending.question),
+            "chunks": pending.chunks,
+            "embedding": pending.embedding,
+            "created": time.time(),
+        }
+        if pending.frames:
+            audio = rtc.combine_audio_frames(pending.frames)
+            if audio.num_channels == 1:
+                tmp_path = pcm_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(audio.data.tobytes())
+                os.replace(tmp_path, pcm_path)
+                meta["sample_rate"] = audio.sample_rate
+        # Metadata last: it is what makes an entry visible
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        self._refresh_index()
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        expired = [k for k, meta in self._index.items() if self._expired(meta)]
+        live = [k for k in self._index if k not in expired]
+        if len(live) > self.max_entries:
+            def last_used(key):
+                try:
+                    return os.path.getmtime(self._paths(key)[0])
+                except OSError:
+                    return 0.0
+
+            live.sort(key=last_used)
+            expired += live[:len(live) - self.max_entries]
+        for key in expired:
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        if expired:
+            self._refresh_index()
+
+
+def open_response_cache(instructions: str) -> Optional[ResponseCache]:
+    """Reply cache for the configured character, voice and model, or None when disabled."""
+    from config import get_settings
+
+    settings = get_settings()
+    config = settings.response_cache
+    if not config.enabled:
+        return None
+    return ResponseCache(
+        config.cache_dir,
+        instructions,
+        settings.resemble.voice_uuid,
+        settings.openai.model,
+        ttl=config.ttl,
+        max_entries=config.max_entries,
+        similarity=config.similarity,
+    )
@@ -0,0 +1,158 @@
+"""
+In-memory index of live LiveKit rooms for the token API.
+
+/api/rooms used to call ListRooms and build the whole list on every poll,
+which gets slow with thousands of live rooms and dashboards polling it.
+RoomIndex is seeded with one ListRooms call, then kept current from the
+webhook events LiveKit posts to the API (room started and finished,
+participant joined and left), so a poll is answered from memory.
+
+Webhooks can be lost or arrive out of order, so the index is also replaced
+by a fresh ListRooms at a fixed interval. Every change bumps a version,
+which the API uses as the ETag: a poll with a matching If-None-Match is
+answered 304 without touching the index.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from uuid import uuid4
+from typing import Dict, List, Optional, Tuple
+
+from livekit.api import ListRoomsRequest, LiveKitAPI
+from livekit.protocol.webhook import WebhookEvent
+
+logger = logging.getLogger("voice-cloning-api")
+
+# Back-off between failed reconciliations, in seconds
+_RETRY_MIN = 1.0
+_RETRY_MAX = 30.0
+# Event ids remembered to drop webhook redeliveries
+_SEEN_EVENTS = 4096
+
+
+class RoomIndex:
+    """Room name -> summary, seeded from ListRooms and updated from webhooks."""
+
+    def __init__(self, client: LiveKitAPI, reconcile_interval: float) -> None:
+        self.client = client
+        self.reconcile_interval = reconcile_interval
+        self._rooms: Dict[str, dict] = {}
+        self._sorted: Optional[List[dict]] = None
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.ready = asyncio.Event()
+        # With several API workers each has its own index; tags must not collide
+        self._instance = uuid4().hex[:8]
+        self.version = 0
+        self.events = 0
+        self.reconciles = 0
+
+    @property
+    def etag(self) -> str:
+        return f'"rooms-{self._instance}-{self.version}"'
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._reconcile_loop())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._sorted = None
+
+    async def reconcile(self) -> None:
+        """Replace the index with the server's current room list.
+
+        An event applied while ListRooms is in flight can be overwritten by the
+        older listing; the next reconciliation or event corrects it.
+        """
+        response = await self.client.room.list_rooms(ListRoomsRequest())
+        rooms = {
+            room.name: {"name": room.name, "participants": room.num_participants, "created_at": room.creation_time}
+            for room in response.rooms
+        }
+        self.reconciles += 1
+        if rooms != self._rooms:
+            self._rooms = rooms
+            self._changed()
+        self.ready.set()
+
+    async def _reconcile_loop(self) -> None:
+        retry = _RETRY_MIN
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning(f"Room index reconcile failed: {e}")
+                await asyncio.sleep(retry)
+                retry = min(retry * 2, _RETRY_MAX)
+                continue
+            retry = _RETRY_MIN
+            await asyncio.sleep(self.reconcile_interval)
+
+    def apply(self, event: WebhookEvent) -> None:
+        """Update the index from one verified webhook event."""
+        if event.id:
+            if event.id in self._seen:
+                return
+            self._seen[event.id] = None
+            if len(self._seen) > _SEEN_EVENTS:
+                self._seen.popitem(last=False)
+        self.events += 1
+
+        name = event.room.name
+        if not name:
+            return
+        if event.event == "room_started":
+            self._rooms[name] = {
+                "name": name,
+                "participants": event.room.num_participants,
+                "created_at": event.room.creation_time or event.created_at,
+            }
+            self._changed()
+        elif event.event == "room_finished":
+            if self._rooms.pop(name, None) is not None:
+                self._changed()
+        elif event.event in ("participant_joined", "participant_left"):
+            room = self._rooms.get(name)
+            if room is None:
+                # Joined a room we have not heard of yet; reconciliation fills in its details
+                if event.event == "participant_left":
+                    return
+                room = self._rooms[name] = {
+                    "name": name, "participants": 0, "created_at": event.room.creation_time or event.created_at,
+                }
+            delta = 1 if event.event == "participant_joined" else -1
+            room["participants"] = max(0, room["participants"] + delta)
+            self._changed()
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: int = 100,
+        prefix: Optional[str] = None,
+        min_participants: int = 0,
+    ) -> Tuple[List[dict], int]:
+        """Rooms matching the filters, oldest first, and the number that matched."""
+        if self._sorted is None:
+            self._sorted = sorted(self._rooms.values(), key=lambda room: (room["created_at"], room["name"]))
+        rooms = self._sorted
+        if prefix or min_participants:
+            rooms = [
+                room for room in rooms
+                if (not prefix or room["name"].startswith(prefix)) and room["participants"] >= min_participants
+            ]
+        # Copies, so a response being serialized never sees a later webhook's update
+        return [dict(room) for room in rooms[offset:offset + limit]], len(rooms)
+
+    def __len__(self) -> int:
+        return len(self._rooms)
@@ -0,0 +1,176 @@
+"""
+Pool of pre-created LiveKit rooms for the token API.
+
+Creating a room is a round trip to the LiveKit server, and it used to sit in
+front of every token request. The pool keeps a few empty rooms ready and
+refills them in the background, so handing out a room is a queue pop.
+
+Agents are dispatched explicitly when a room is handed out, so pooled rooms
+stay empty and hold no agent job. The dispatch runs in the background: the
+token does not wait for it, so the agent may join just before or just after
+the user. Pooled rooms are created with an empty timeout as
+a backstop, and rooms older than the configured max age are deleted instead
+of returned, which keeps the pool from handing out a room the server is
+about to close.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+from uuid import uuid4
+
+from livekit.api import CreateAgentDispatchRequest, CreateRoomRequest, DeleteRoomRequest, LiveKitAPI
+
+logger = logging.getLogger("voice-cloning-api")
+
+ROOM_PREFIX = "voice-clone-demo"
+
+# Back-off between failed refill attempts, in seconds
+_RETRY_MIN = 1.0
+_RETRY_MAX = 30.0
+# Attempts at dispatching an agent before giving up on a room
+_DISPATCH_ATTEMPTS = 3
+
+
+class RoomPool:
+    """Keeps up to `size` fresh rooms ready and refills them asynchronously."""
+
+    def __init__(
+        self,
+        client: LiveKitAPI,
+        size: int,
+        max_age: float,
+        empty_timeout: int,
+    ) -> None:
+        self.client = client
+        self.size = size
+        self.max_age = max_age
+        self.empty_timeout = empty_timeout
+        self._ready: Deque[Tuple[str, float]] = deque()
+        self._wakeup = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task] = None
+        # Background deletes and dispatches, awaited on close
+        self._background: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.dispatches = 0
+
+    async def create_room(self) -> str:
+        """Create one room on the server and return its name."""
+        room = await self.client.room.create_room(
+            CreateRoomRequest(
+                name=f"{ROOM_PREFIX}-{uuid4().hex[:8]}",
+                empty_timeout=self.empty_timeout,
+                departure_timeout=60,  # Room cleanup after participant leaves
+                max_participants=2,    # Participant and voice clone agent
+            ),
+        )
+        return room.name
+
+    async def acquire(self) -> str:
+        """Take a ready room, or create one on demand if the pool is empty."""
+        now = time.monotonic()
+        while self._ready:
+            name, created = self._ready.popleft()
+            if now - created <= self.max_age:
+                self.hits += 1
+                self._wakeup.set()
+                return name
+            self._delete_later(name)
+        self.misses += 1
+        self._wakeup.set()
+        return await self.create_room()
+
+    @property
+    def ready(self) -> int:
+        return len(self._ready)
+
+    def start(self) -> None:
+        """Start the background refill loop (no-op when the pool is disabled)."""
+        if self.size > 0 and self._refill_task is None:
+            self._refill_task = asyncio.create_task(self._refill_loop(), name="room-pool-refill")
+
+    async def close(self) -> None:
+        """Stop refilling. Unused rooms are left for LiveKit's empty timeout to reap."""
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+        self._ready.clear()
+
+    def _discard_stale(self) -> None:
+        now = time.monotonic()
+        while self._ready and now - self._ready[0][1] > self.max_age:
+            self._delete_later(self._ready.popleft()[0])
+
+    def _delete_later(self, name: str) -> None:
+        """Delete a discarded room in the background; its empty timeout covers failures."""
+
+        async def _delete():
+            try:
+                await self.client.room.delete_room(DeleteRoomRequest(room=name))
+            except Exception as e:
+                logger.debug(f"Could not delete stale room {name}: {e}")
+
+        self._spawn(_delete())
+
+    def dispatch_later(self, name: str, agent_name: str, metadata: str = "") -> None:
+        """Dispatch an agent to a handed-out room without holding up the token response."""
+
+        async def _dispatch():
+            request = CreateAgentDispatchRequest(agent_name=agent_name, room=name, metadata=metadata)
+            retry = _RETRY_MIN
+            for attempt in range(1, _DISPATCH_ATTEMPTS + 1):
+                try:
+                    await self.client.agent_dispatch.create_dispatch(request)
+                    return
+                except Exception as e:
+                    if attempt == _DISPATCH_ATTEMPTS:
+                        logger.error(f"Could not dispatch agent {agent_name} to room {name}: {e}")
+                        return
+                    logger.warning(f"Dispatch to room {name} failed, retrying: {e}")
+                    await asyncio.sleep(retry)
+                    retry = min(retry * 2, _RETRY_MAX)
+
+        self.dispatches += 1
+        self._spawn(_dispatch())
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _refill_loop(self) -> None:
+        retry = _RETRY_MIN
+        while True:
+            self._discard_stale()
+            missing = self.size - len(self._ready)
+            if missing > 0:
+                results = await asyncio.gather(
+                    *(self.create_room() for _ in range(missing)),
+                    return_exceptions=True,
+                )
+                created = time.monotonic()
+                failures = [r for r in results if isinstance(r, BaseException)]
+                self._ready.extend((name, created) for name in results if isinstance(name, str))
+                if failures:
+                    logger.warning(f"Room pool refill failed for {len(failures)} rooms: {failures[0]}")
+                    await asyncio.sleep(retry)
+                    retry = min(retry * 2, _RETRY_MAX)
+                    continue
+                retry = _RETRY_MIN
+
+            # Sleep until a room is taken, or until the oldest room needs replacing
+            self._wakeup.clear()
+            timeout = self.max_age - (time.monotonic() - self._ready[0][1]) if self._ready else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0.1) if timeout is not None else None)
+            except asyncio.TimeoutError:
+                pass
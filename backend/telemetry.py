@@ -0,0 +1,174 @@
+"""
+Non-blocking Langfuse export for the voice agent.
+
+The pipeline nodes run on the realtime audio loop, so they must never wait on
+tracing. Nodes hand finished observations (a trace, an LLM generation with
+its timestamps, a TTS span) to a TelemetrySink, which only appends them to a
+bounded ring buffer. A background thread drains the buffer in batches and
+makes the Langfuse calls. When export falls behind, the oldest events are
+overwritten and counted as dropped rather than slowing the agent down.
+
+With Langfuse disabled in the configuration, get_telemetry() returns a no-op
+sink and the Langfuse client is never created.
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger("voice-cloning-agent")
+
+
+class NullTelemetry:
+    """Sink used when tracing is disabled: every call is a no-op."""
+
+    enabled = False
+
+    def new_trace(self, name: str, session_id: str, **fields: Any) -> str:
+        return ""
+
+    def generation(self, trace_id: str, **fields: Any) -> None:
+        pass
+
+    def span(self, trace_id: str, **fields: Any) -> None:
+        pass
+
+    def wake(self) -> None:
+        pass
+
+    def close(self, timeout: float = 5.0) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class TelemetrySink(NullTelemetry):
+    """Ring buffer of observations exported to Langfuse by a background thread."""
+
+    enabled = True
+
+    def __init__(
+        self,
+        public_key: str,
+        secret_key: str,
+        host: str,
+        buffer_size: int = 2048,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self._client_args = {"public_key": public_key, "secret_key": secret_key, "host": host}
+        self._buffer: Deque[Tuple[str, Dict[str, Any]]] = deque(maxlen=buffer_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueued = 0
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="telemetry-export", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, kind: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                # The deque discards the oldest event on append
+                self.dropped += 1
+            self._buffer.append((kind, fields))
+            self.enqueued += 1
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def new_trace(self, name: str, session_id: str, **fields: Any) -> str:
+        """Start a trace and return its id for later observations."""
+        trace_id = uuid4().hex
+        self._enqueue("trace", {"id": trace_id, "name": name, "session_id": session_id, **fields})
+        return trace_id
+
+    def generation(self, trace_id: str, **fields: Any) -> None:
+        """Record a finished LLM generation (start, completion start and end times included)."""
+        self._enqueue("generation", {"trace_id": trace_id, **fields})
+
+    def span(self, trace_id: str, **fields: Any) -> None:
+        """Record a finished span."""
+        self._enqueue("span", {"trace_id": trace_id, **fields})
+
+    def wake(self) -> None:
+        """Export what is buffered now instead of at the next interval."""
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "enqueued": self.enqueued,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "buffered": len(self._buffer),
+        }
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        from langfuse import Langfuse
+
+        client = Langfuse(**self._client_args)
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                for kind, fields in batch:
+                    try:
+                        getattr(client, kind)(**fields)
+                        self.exported += 1
+                    except Exception as e:
+                        self.failed += 1
+                        logger.debug(f"Telemetry export failed: {e}")
+            if self._stopping:
+                client.flush()
+                return
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Export everything still buffered, waiting at most `timeout` seconds."""
+        if not self._thread.is_alive():
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        if self.dropped:
+            logger.warning(f"Telemetry dropped {self.dropped} of {self.enqueued} events under backpressure")
+
+
+_telemetry: Optional[NullTelemetry] = None
+
+
+def get_telemetry() -> NullTelemetry:
+    """Process-wide sink for the configured Langfuse project, or a no-op sink."""
+    global _telemetry
+    if _telemetry is None:
+        from config import get_settings
+
+        langfuse = get_settings().langfuse
+        if langfuse.enabled:
+            _telemetry = TelemetrySink(
+                langfuse.public_key,
+                langfuse.secret_key,
+                langfuse.host,
+                buffer_size=langfuse.buffer_size,
+                flush_interval=langfuse.flush_interval,
+            )
+            atexit.register(_telemetry.close)
+        else:
+            _telemetry = NullTelemetry()
+    return _telemetry
+
@@ -0,0 +1,163 @@
+"""
+Text chunking between the streaming LLM output and Resemble TTS.
+
+The Resemble plugin only sends text to synthesis once its sentence tokenizer
+has a complete sentence and has seen the start of the next one, so the first
+audio of every reply waits for the LLM to finish its whole first sentence.
+A ChunkingPolicy lets the first chunk go out at the first clause boundary (or
+after a handful of words), then switches to larger, sentence-sized chunks,
+which keep prosody natural and give synthesis time to stay ahead of playout.
+
+ChunkingTokenizer plugs the policy into the TTS as its sentence tokenizer, so
+every chunk is still sent over the plugin's single streaming connection.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+from livekit.agents import tokenize
+from livekit.agents.tokenize.tokenizer import TokenData
+from livekit.agents.utils import shortuuid
+
+# Punctuation followed by whitespace; a trailing period is only a boundary
+# once the next token shows it was not part of "3.5" or similar
+_SENTENCE_END = re.compile(r"[.!?…][\"')\]]*\s")
+_CLAUSE_END = re.compile(r"(?:[,;:]|\s[—–-])\s")
+
+
+@dataclass(frozen=True)
+class ChunkingPolicy:
+    """When to hand buffered LLM text to the TTS."""
+
+    # First chunk: cut at the first sentence end, or at the first clause
+    # boundary with at least first_min_words, or force it out at first_max_words
+    first_min_words: int = 3
+    first_max_words: int = 10
+    # Later chunks: cut at a sentence boundary with at least min_words, or at
+    # the last clause boundary (else word) once max_words are buffered
+    min_words: int = 8
+    max_words: int = 40
+    # Whether the first chunk may end at a clause boundary
+    first_clause: bool = True
+
+
+POLICIES = {
+    # First clause goes out as soon as it has three words, then sentences
+    "early": ChunkingPolicy(),
+    # Very first words out immediately; costs more prosody breaks at the start
+    "eager": ChunkingPolicy(first_min_words=2, first_max_words=5, min_words=6),
+    # Whole sentences only, emitted as soon as each one ends
+    "sentence": ChunkingPolicy(first_clause=False, first_max_words=40, min_words=3),
+}
+
+
+def _word_count(text: str) -> int:
+    return len(text.split())
+
+
+class TextChunker:
+    """Incremental splitter applying a ChunkingPolicy to streamed text."""
+
+    def __init__(self, policy: ChunkingPolicy) -> None:
+        self.policy = policy
+        self._buf = ""
+        self._first = True
+
+    def push(self, text: str) -> List[str]:
+        """Add streamed text and return any chunks that are ready."""
+        self._buf += text
+        chunks = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            chunk, self._buf = self._buf[:cut].strip(), self._buf[cut:].lstrip()
+            if chunk:
+                chunks.append(chunk)
+                self._first = False
+        return chunks
+
+    def flush(self) -> List[str]:
+        """Return whatever is buffered as a final chunk."""
+        chunk, self._buf = self._buf.strip(), ""
+        self._first = True
+        return [chunk] if chunk else []
+
+    def _find_cut(self) -> Optional[int]:
+        policy = self.policy
+        buf = self._buf
+        if self._first:
+            min_words, max_words = policy.first_min_words, policy.first_max_words
+            # A complete first sentence always goes out, however short
+            boundaries = [(m.end(), 1) for m in _SENTENCE_END.finditer(buf)]
+            if policy.first_clause:
+                boundaries += [(m.end(), min_words) for m in _CLAUSE_END.finditer(buf)]
+        else:
+            min_words, max_words = policy.min_words, policy.max_words
+            boundaries = [(m.end(), min_words) for m in _SENTENCE_END.finditer(buf)]
+
+        for end, needed in sorted(boundaries):
+            if _word_count(buf[:end]) >= needed:
+                return end
+
+        words = list(re.finditer(r"\S+", buf))
+        # The last word may still be growing, so it never counts towards the cap
+        if len(words) <= max_words:
+            return None
+        if not self._first:
+            clauses = [m.end() for m in _CLAUSE_END.finditer(buf) if m.end() <= words[max_words].start()]
+            if clauses and _word_count(buf[:clauses[-1]]) >= min_words:
+                return clauses[-1]
+        return words[max_words].start()
+
+
+class ChunkingSentenceStream(tokenize.SentenceStream):
+    """SentenceStream that emits TextChunker chunks as tokens."""
+
+    def __init__(self, policy: ChunkingPolicy) -> None:
+        super().__init__()
+        self._chunker = TextChunker(policy)
+        self._segment_id = shortuuid()
+
+    def push_text(self, text: str) -> None:
+        self._check_not_closed()
+        for chunk in self._chunker.push(text):
+            self._event_ch.send_nowait(TokenData(token=chunk, segment_id=self._segment_id))
+
+    def flush(self) -> None:
+        self._check_not_closed()
+        for chunk in self._chunker.flush():
+            self._event_ch.send_nowait(TokenData(token=chunk, segment_id=self._segment_id))
+        self._segment_id = shortuuid()
+
+    def end_input(self) -> None:
+        self.flush()
+        self._do_close()
+
+    async def aclose(self) -> None:
+        self._do_close()
+
+
+class ChunkingTokenizer(tokenize.SentenceTokenizer):
+    """Sentence tokenizer for TTS plugins that applies a ChunkingPolicy."""
+
+    def __init__(self, policy: ChunkingPolicy) -> None:
+        self.policy = policy
+
+    def tokenize(self, text: str, *, language: Optional[str] = None) -> List[str]:
+        chunker = TextChunker(self.policy)
+        return chunker.push(text) + chunker.flush()
+
+    def stream(self, *, language: Optional[str] = None) -> ChunkingSentenceStream:
+        return ChunkingSentenceStream(self.policy)
+
+
+def get_policy(name: str) -> Optional[ChunkingPolicy]:
+    """Look up a named policy; "default" keeps the TTS plugin's own tokenizer."""
+    if name == "default":
+        return None
+    try:
+        return POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS chunking policy {name!r}; choose from default, {', '.join(POLICIES)}")
@@ -0,0 +1,287 @@
+"""
+Per-turn latency breakdown for the voice pipeline.
+
+Each user turn is timestamped at the points that make up response lag:
+
+    end of speech -> final transcript -> turn committed -> first LLM token
+                  -> first TTS audio frame -> playout starts
+
+TurnRecorder collects these marks for one session and, once the agent starts
+speaking, folds the stage durations into fixed-bucket histograms. Histograms
+are plain bucket counts, so the snapshots written by every job process can be
+summed by the worker's metrics server, which serves them in Prometheus text
+format on /metrics and as JSON (with p50/p95/p99 estimates) on /metrics.json.
+Each worker gets its own snapshot directory, so several workers on one host
+never count or clear each other's jobs.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("voice-cloning-agent")
+
+# Set by the worker process, inherited by its job processes
+METRICS_DIR_ENV = "VOICE_AGENT_METRICS_DIR"
+
+# Upper bucket bounds in seconds; the last bucket is +Inf
+BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5,
+    0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0,
+)
+
+# Stage name -> (start mark, end mark)
+TURN_STAGES = {
+    "stt_final": ("end_of_speech", "final_transcript"),
+    "end_of_turn": ("end_of_speech", "turn_completed"),
+    "llm_first_token": ("turn_completed", "llm_first_token"),
+    "tts_first_audio": ("llm_first_token", "tts_first_frame"),
+    "playout_start": ("tts_first_frame", "playout"),
+    "total": ("end_of_speech", "playout"),
+}
+
+
+class Histogram:
+    """Fixed-bucket latency histogram that can be merged across processes."""
+
+    def __init__(self, counts: Optional[List[int]] = None, total: float = 0.0) -> None:
+        self.counts = counts or [0] * (len(BUCKETS) + 1)
+        self.sum = total
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n > 0:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                # Values past the last bound are reported at that bound
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def to_dict(self) -> dict:
+        return {"counts": self.counts, "sum": self.sum}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        return cls(list(data["counts"]), data["sum"])
+
+
+class MetricsRegistry:
+    """Named histograms for this process, persisted as a snapshot file for the metrics server."""
+
+    def __init__(self, metrics_dir: Optional[str] = None) -> None:
+        self.histograms: Dict[str, Histogram] = {}
+        self.metrics_dir = metrics_dir
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).observe(seconds)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: h.to_dict() for name, h in self.histograms.items()}
+
+    def flush(self) -> None:
+        """Write this process's histograms where the metrics server can merge them."""
+        if not self.metrics_dir:
+            return
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        path = os.path.join(self.metrics_dir, f"{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_registry() -> MetricsRegistry:
+    """Process-wide registry, writing snapshots where this process's worker serves them from."""
+    global _registry
+    if _registry is None:
+        # Unset when metrics are off or the worker could not serve them
+        _registry = MetricsRegistry(os.environ.get(METRICS_DIR_ENV) or None)
+    return _registry
+
+
+class TurnRecorder:
+    """Timestamps the stages of each user turn in one session."""
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.registry = registry
+        self.marks: Dict[str, float] = {}
+        self.turns = 0
+
+    def mark(self, event: str, first_only: bool = True) -> None:
+        """Record when `event` happened in the current turn.
+
+        Only the first occurrence counts unless `first_only` is False (final
+        transcripts keep updating until the turn is committed).
+        """
+        if "end_of_speech" not in self.marks:
+            # Outside a user turn, e.g. while the agent greets
+            return
+        if first_only and event in self.marks:
+            return
+        self.marks[event] = time.perf_counter()
+
+    def start_turn(self) -> None:
+        """The user stopped speaking: begin a new timeline."""
+        self.marks = {"end_of_speech": time.perf_counter()}
+
+    def cancel_turn(self) -> None:
+        """The user resumed speaking before the agent replied."""
+        self.marks = {}
+
+    def finish_turn(self) -> Optional[Dict[str, float]]:
+        """Playout started: record every stage with both ends marked."""
+        self.mark("playout")
+        if "playout" not in self.marks:
+            return None
+        stages = {}
+        for stage, (start, end) in TURN_STAGES.items():
+            if start in self.marks and end in self.marks:
+                stages[stage] = self.marks[end] - self.marks[start]
+                self.registry.observe(f"turn_{stage}", stages[stage])
+        self.marks = {}
+        self.turns += 1
+        self.registry.flush()
+        return stages
+
+
+def merge_snapshots(metrics_dir: str) -> Dict[str, Histogram]:
+    """Sum the histograms from every process snapshot in `metrics_dir`."""
+    merged: Dict[str, Histogram] = {}
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, data in snapshot.items():
+            merged.setdefault(name, Histogram()).merge(Histogram.from_dict(data))
+    return merged
+
+
+def render_prometheus(histograms: Dict[str, Histogram]) -> str:
+    lines = []
+    for name in sorted(histograms):
+        h = histograms[name]
+        metric = f"voice_agent_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS, h.counts):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+        lines.append(f"{metric}_sum {h.sum:.6f}")
+        lines.append(f"{metric}_count {h.count}")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(histograms: Dict[str, Histogram]) -> dict:
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        name: {
+            "count": h.count,
+            "mean_ms": ms(h.sum / h.count) if h.count else None,
+            "p50_ms": ms(h.quantile(0.50)),
+            "p95_ms": ms(h.quantile(0.95)),
+            "p99_ms": ms(h.quantile(0.99)),
+        }
+        for name, h in sorted(histograms.items())
+    }
+
+
+def start_metrics_server(metrics_dir: str, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve merged job-process metrics from a background thread of the worker process.
+
+    Raises OSError if the port cannot be bound.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            histograms = merge_snapshots(metrics_dir)
+            if self.path == "/metrics":
+                body = render_prometheus(histograms).encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body = json.dumps(render_json(histograms), indent=2).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    # Bind first: a worker that cannot serve must not clear anything
+    server = ThreadingHTTPServer((host, port), Handler)
+    os.makedirs(metrics_dir, exist_ok=True)
+    # Snapshots from a previous worker run would be counted again
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.remove(path)
+    threading.Thread(target=server.serve_forever, name="turn-metrics", daemon=True).start()
+    logger.info(f"Turn metrics on http://{host}:{port}/metrics and /metrics.json")
+    return server
+
+
+def start_worker_metrics() -> Optional[ThreadingHTTPServer]:
+    """Serve this worker's job metrics, or None if they are disabled or the port is taken.
+
+    Call before any job process is started, so they all inherit the snapshot directory.
+    """
+    from config import get_settings
+
+    config = get_settings().metrics
+    if not config.enabled:
+        return None
+    # Per worker, so a second worker on the host neither merges nor wipes this one's snapshots
+    metrics_dir = os.path.join(config.dir, f"worker-{os.getpid()}")
+    try:
+        server = start_metrics_server(metrics_dir, config.port)
+    except OSError as e:
+        logger.warning(f"Turn metrics disabled, port {config.port} is unavailable ({e}); set METRICS_PORT per worker")
+        return None
+    atexit.register(shutil.rmtree, metrics_dir, True)
+    os.environ[METRICS_DIR_ENV] = metrics_dir
+    return server
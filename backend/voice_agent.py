@@ -2,9 +2,8 @@ import asyncio
 import logging
 import time
 from datetime import UTC, datetime
-from typing import Union, AsyncIterable, Optional, List
+from typing import Union, AsyncIterable, Optional, List, Tuple
 from uuid import uuid4
-from pathlib import Path
 import os
 
 from livekit import rtc
@@ -14,88 +13,197 @@ from livekit.agents import (
     ChatContext,
     ChatMessage,
     JobContext,
+    JobProcess,
     FunctionTool,
     ModelSettings,
     RoomInputOptions,
     RoomOutputOptions,
     WorkerOptions,
     UserStateChangedEvent,
+    AgentStateChangedEvent,
     cli,
     stt,
     llm,
+    tts,
+    vad,
 )
 from livekit.agents.llm import ImageContent, AudioContent
-from livekit.plugins import resemble, deepgram, openai, silero
-from livekit.plugins.turn_detector.english import EnglishModel
 
 from config import get_settings
-from langfuse import Langfuse
-from langfuse.client import StatefulClient
+from characters import Character, character_from_metadata, get_characters
+from turn_metrics import TurnRecorder, get_registry
+from telemetry import get_telemetry
+from text_chunking import ChunkingPolicy, ChunkingTokenizer, get_policy
+from greeting_cache import GENERIC_BUCKET, GreetingCache, open_greeting_cache, pcm_frames
+from context_window import ContextWindow
+from response_cache import CachedResponse, PendingResponse, ResponseCache, open_response_cache
+from admission import open_admission_policy, start_load_reporter
+from profiling import SessionProfiler, open_profiler
 
 logger = logging.getLogger("voice-cloning-agent")
 logger.setLevel(logging.INFO)
 
-_langfuse = Langfuse()
-
-def load_instructions_from_env() -> str:
-    """Load agent instructions from configuration."""
-    settings = get_settings()
-    instructions_file = settings.voice.instructions_file
-    instructions_path = Path(instructions_file)
-    
-    if not instructions_path.exists():
-        raise FileNotFoundError(f"Instructions file not found: {instructions_file}")
-    
-    with open(instructions_path, 'r', encoding='utf-8') as f:
-        instructions = f.read().strip()
-    
-    logger.info(f"Loaded instructions from: {instructions_file}")
-    return instructions
-
-def load_intro_template_from_env() -> str:
-    """Load intro prompt template from configuration."""
-    settings = get_settings()
-    intro_file = settings.voice.intro_file
-    intro_path = Path(intro_file)
-    
-    if not intro_path.exists():
-        raise FileNotFoundError(f"Intro template file not found: {intro_file}")
-    
-    with open(intro_path, 'r', encoding='utf-8') as f:
-        intro_template = f.read().strip()
-    
-    logger.info(f"Loaded intro template from: {intro_file}")
-    return intro_template
-
 def intro_prompt(name: str, intro_template: str) -> str:
     """Generate intro prompt using template with user name substitution."""
     return intro_template.format(name=name)
 
+def last_user_text(chat_ctx: llm.ChatContext) -> Optional[str]:
+    """Text of the message being answered, if it is a user message."""
+    for item in reversed(chat_ctx.items):
+        if item.type != "message":
+            continue
+        return item.text_content if item.role == "user" else None
+    return None
+
+def character_caches(
+    proc: JobProcess, character: Character,
+) -> Tuple[Optional[GreetingCache], Optional[ResponseCache]]:
+    """Greeting and response caches for `character`, opened once per process.
+
+    Sessions of a character share loaded audio and in-flight renders. A
+    character whose prompts were edited gets new caches, since the prompts
+    are part of every cache key.
+    """
+    caches = proc.userdata.setdefault("caches", {})
+    entry = caches.get(character.name)
+    if entry is None or entry[0] != character:
+        entry = (
+            character,
+            open_greeting_cache(character.instructions, character.intro_template),
+            open_response_cache(character.instructions),
+        )
+        caches[character.name] = entry
+    return entry[1], entry[2]
+
+def load_plugins() -> None:
+    """Import the hosted-service plugins.
+
+    They are only needed by the agent worker, so importing this module (the
+    CLI, the benchmarks) does not pay for them. Plugins register with the
+    agents framework on import, which must happen on a main thread: the
+    worker's, before it starts (the turn detector registers its inference
+    runner there), and each job process's, in prewarm rather than on a job.
+    """
+    from livekit.plugins import deepgram, openai, resemble, silero  # noqa: F401
+    from livekit.plugins.turn_detector import english  # noqa: F401
+
+def prewarm(proc: JobProcess) -> None:
+    """Load the plugins, VAD, characters and default greeting once per job process, before any job arrives.
+
+    The turn detector needs no prewarm: its ONNX model already runs in the
+    worker's shared inference process, and EnglishModel() only binds to it.
+    """
+    start = time.perf_counter()
+    load_plugins()
+    logger.info(f"Imported plugins in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    from livekit.plugins import silero
+
+    start = time.perf_counter()
+    proc.userdata["vad"] = silero.VAD.load()
+    logger.info(f"Prewarmed VAD in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    try:
+        characters = get_characters()
+    except FileNotFoundError as e:
+        # The entrypoint reports missing prompt files for each job
+        logger.warning(f"Characters unavailable: {e}")
+        return
+    greetings, _ = character_caches(proc, characters.default)
+    if greetings is not None:
+        greetings.get(GENERIC_BUCKET)
+
 class VoiceCloningAgent(Agent):
-    def __init__(self, instructions: str, intro_template: str, user_name: str) -> None:
+    def __init__(
+        self,
+        instructions: str,
+        intro_template: str,
+        user_name: str,
+        vad: Optional[vad.VAD] = None,
+        chunking: Optional[ChunkingPolicy] = None,
+        greetings: Optional[GreetingCache] = None,
+        responses: Optional[ResponseCache] = None,
+        stt: Optional[stt.STT] = None,
+        llm: Optional[llm.LLM] = None,
+        tts: Optional[tts.TTS] = None,
+        turn_detection=None,
+        context: Optional[ContextWindow] = None,
+        profiler: Optional[SessionProfiler] = None,
+    ) -> None:
+        # stt, llm, tts and turn_detection replace the hosted services, e.g.
+        # with the local stand-ins in benchmarks/fakes.py; plugins are only
+        # imported for the services not replaced
         settings = get_settings()
-        
+        if chunking is None:
+            chunking = get_policy(settings.voice.tts_chunking)
+        if llm is None:
+            from livekit.plugins import openai
+            llm = openai.LLM(model=settings.openai.model)
+        if stt is None:
+            from livekit.plugins import deepgram
+            stt = deepgram.STT()
+        if tts is None:
+            from livekit.plugins import resemble
+            tts = resemble.TTS(
+                voice_uuid=settings.resemble.voice_uuid,
+                # Flush the first clause early so the first audio does not wait for a full sentence
+                tokenizer=ChunkingTokenizer(chunking) if chunking else None,
+            )
+        if vad is None:
+            # Normally the shared VAD from prewarm; loading it here delays the session
+            from livekit.plugins import silero
+            vad = silero.VAD.load()
+        if turn_detection is None:
+            from livekit.plugins.turn_detector.english import EnglishModel
+            turn_detection = EnglishModel()
+
         super().__init__(
             instructions=instructions,
-            llm=openai.LLM(model=settings.openai.model),
-            stt=deepgram.STT(),
-            tts=resemble.TTS(
-                voice_uuid=settings.resemble.voice_uuid,
-            ),
-            vad=silero.VAD.load(),
-            turn_detection=EnglishModel(),
+            llm=llm,
+            stt=stt,
+            tts=tts,
+            vad=vad,
+            turn_detection=turn_detection,
         )
         self.user_name = user_name
         self.intro_template = intro_template
+        self.greetings = greetings
+        self.responses = responses
+        if context is None and settings.context.max_tokens > 0:
+            context = ContextWindow(
+                settings.context.max_tokens,
+                summarizer=self.llm if settings.context.summarize else None,
+            )
+        # Bounds what each LLM call sends, so long conversations don't get slower
+        self.context = context
+        # Counts items through each node; None (the default) leaves nodes unwrapped
+        self.profiler = profiler
+        # Reply being served from or captured for the response cache this turn
+        self._cached_response: Optional[CachedResponse] = None
+        self._pending_response: Optional[PendingResponse] = None
         self.session_id = str(uuid4())
         self.current_trace = None
+        self.turns = TurnRecorder(get_registry())
+        self.telemetry = get_telemetry()
 
     def close(self) -> None:
         if self.current_trace:
             self.current_trace = None
-        _langfuse.flush()
+        # Export promptly without blocking the session's shutdown on it
+        self.telemetry.wake()
 
     async def on_enter(self) -> None:
+        greeting_settings = get_settings().greeting
+        if self.greetings is not None:
+            greeting = self.greetings.lookup(self.user_name, greeting_settings.generic_fallback)
+            if greeting is not None:
+                # Pre-rendered intro: no LLM or TTS round trip before the first audio
+                logger.info(f"Playing cached greeting ({greeting.duration:.1f}s)")
+                self.session.say(greeting.text, audio=greeting.frames())
+                return
+            if greeting_settings.render_on_miss and self.greetings.get(GENERIC_BUCKET) is None:
+                self.greetings.render_in_background(GENERIC_BUCKET)
+
         # Start with a natural greeting using the loaded template
         await self.session.generate_reply(
             instructions=intro_prompt(self.user_name, self.intro_template),
@@ -103,11 +211,13 @@ class VoiceCloningAgent(Agent):
 
     async def on_exit(self) -> None:
         self.close()
+        if self.context is not None:
+            await self.context.aclose()
 
-    def get_current_trace(self) -> StatefulClient:
+    def get_current_trace(self) -> str:
         if self.current_trace:
             return self.current_trace
-        self.current_trace = _langfuse.trace(name="voice_cloning_agent", session_id=self.session_id)
+        self.current_trace = self.telemetry.new_trace(name="voice_cloning_agent", session_id=self.session_id)
         return self.current_trace
 
     async def on_user_turn_completed(
@@ -116,17 +226,26 @@ class VoiceCloningAgent(Agent):
         # Reset the span when a new user turn is completed
         if self.current_trace:
             self.current_trace = None
-        self.current_trace = _langfuse.trace(name="voice_cloning_agent", session_id=self.session_id)
-        trace = self.get_current_trace()
-        logger.info(f"User turn completed {trace.trace_id}")
+        self.current_trace = self.telemetry.new_trace(name="voice_cloning_agent", session_id=self.session_id)
+        trace_id = self.get_current_trace()
+        self.turns.mark("turn_completed")
+        logger.info(f"User turn completed {trace_id}")
 
     async def stt_node(
         self, audio: AsyncIterable[rtc.AudioFrame], model_settings: ModelSettings
     ) -> Optional[AsyncIterable[stt.SpeechEvent]]:
-        trace = self.get_current_trace()
-        logger.info(f"STT node called {trace.trace_id}")
-        async for event in Agent.default.stt_node(self, audio, model_settings):
+        trace_id = self.get_current_trace()
+        logger.info(f"STT node called {trace_id}")
+        if self.profiler is not None:
+            audio = self.profiler.instrument("stt_input", audio)
+        events = Agent.default.stt_node(self, audio, model_settings)
+        if self.profiler is not None:
+            events = self.profiler.instrument("stt", events)
+        async for event in events:
             logger.info(f"STT event: {event.type} {event.request_id}")
+            if event.type == stt.SpeechEventType.FINAL_TRANSCRIPT:
+                # A turn can span several final transcripts; the last one counts
+                self.turns.mark("final_transcript", first_only=False)
             yield event
 
     async def llm_node(
@@ -135,70 +254,197 @@ class VoiceCloningAgent(Agent):
         tools: List[FunctionTool],
         model_settings: ModelSettings
     ) -> AsyncIterable[llm.ChatChunk]:
-        trace = self.get_current_trace()
-        logger.info(f"LLM node called {trace.trace_id}")
+        trace_id = self.get_current_trace()
+        logger.info(f"LLM node called {trace_id}")
+
+        if self.context is not None:
+            chat_ctx = self.context.apply(chat_ctx)
+
+        self._cached_response = self._pending_response = None
+        question = last_user_text(chat_ctx) if self.responses is not None else None
+        if question:
+            lookup_start = datetime.now(UTC)
+            cached, pending = await self.responses.lookup(question)
+            if cached is not None:
+                logger.info(f"Response cache hit for {cached.question!r}")
+                self.telemetry.span(
+                    trace_id,
+                    name="voice_clone_response_cache_hit",
+                    metadata={"question": cached.question, "audio": cached.pcm is not None},
+                    start_time=lookup_start,
+                    end_time=datetime.now(UTC),
+                )
+                self._cached_response = cached
+                if cached.pcm is None:
+                    # Text only so far: keep the audio this playout produces
+                    pending.chunks = list(cached.chunks)
+                    pending.llm_complete = True
+                    self._pending_response = pending
+                for i, content in enumerate(cached.chunks):
+                    self.turns.mark("llm_first_token")
+                    yield llm.ChatChunk(
+                        id=f"cached-{i}",
+                        delta=llm.ChoiceDelta(role="assistant", content=content),
+                    )
+                return
+            self._pending_response = pending
 
         settings = get_settings()
-        generation = trace.generation(
-            name="voice_clone_llm_generation",
-            model=settings.openai.model,
-            input=chat_ctx.to_provider_format("openai"),
-        )
+        telemetry = self.telemetry
+        pending = self._pending_response
+        start_time = datetime.now(UTC)
+        completion_start_time = None
+        level = "DEFAULT"
         output = ""
-        set_completion_start_time = False
+        chunks = Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+        if self.profiler is not None:
+            chunks = self.profiler.instrument("llm", chunks)
         try:
-            async for chunk in Agent.default.llm_node(self, chat_ctx, tools, model_settings):
-                if not set_completion_start_time:
-                    generation.update(
-                        completion_start_time=datetime.now(UTC),
-                    )
-                    set_completion_start_time = True
+            async for chunk in chunks:
+                self.turns.mark("llm_first_token")
+                if completion_start_time is None:
+                    completion_start_time = datetime.now(UTC)
                 if chunk.delta and chunk.delta.content:
                     output += chunk.delta.content
+                    if pending is not None:
+                        pending.chunks.append(chunk.delta.content)
+                if pending is not None and chunk.delta and chunk.delta.tool_calls:
+                    # Tool results are not replayable
+                    pending = self._pending_response = None
                 yield chunk
+            if pending is not None:
+                pending.llm_complete = True
         except Exception as e:
-            generation.update(level="ERROR")
+            level = "ERROR"
             logger.error(f"LLM error: {e}")
             raise
         finally:
-            generation.end(output=output)
+            telemetry.generation(
+                trace_id,
+                name="voice_clone_llm_generation",
+                model=settings.openai.model,
+                # Serialized once, after the reply and off the path to the
+                # first token; skipped entirely with tracing off
+                input=chat_ctx.to_provider_format("openai") if telemetry.enabled else None,
+                output=output,
+                start_time=start_time,
+                completion_start_time=completion_start_time,
+                end_time=datetime.now(UTC),
+                level=level,
+            )
 
     async def tts_node(
         self, text: AsyncIterable[str], model_settings: ModelSettings
     ) -> AsyncIterable[rtc.AudioFrame]:
-        trace = self.get_current_trace()
-        logger.info(f"TTS node called {trace.trace_id}")
-        span = trace.span(name="voice_clone_tts_node", metadata={"model": "resemble"})
+        trace_id = self.get_current_trace()
+        logger.info(f"TTS node called {trace_id}")
+        start_time = datetime.now(UTC)
+        level = "DEFAULT"
+        cached, self._cached_response = self._cached_response, None
+        if cached is not None and cached.pcm is not None:
+            # Cached reply with its audio: Resemble is not called at all
+            async for _ in text:
+                pass
+            async for frame in pcm_frames(cached.pcm, cached.sample_rate):
+                self.turns.mark("tts_first_frame")
+                yield frame
+            return
+
+        pending = self._pending_response
+        if self.profiler is not None:
+            text = self.profiler.instrument("tts_input", text)
+        frames = Agent.default.tts_node(self, text, model_settings)
+        if self.profiler is not None:
+            frames = self.profiler.instrument("tts", frames)
         try:
-            async for event in Agent.default.tts_node(self, text, model_settings):
+            async for event in frames:
+                self.turns.mark("tts_first_frame")
+                if pending is not None:
+                    pending.frames.append(event)
                 yield event
+            # Only replies that played to the end without interruption are kept
+            if pending is not None and pending.llm_complete and pending is self._pending_response:
+                self._pending_response = None
+                await asyncio.to_thread(self.responses.put, pending)
         except Exception as e:
-            span.update(level="ERROR")
+            level = "ERROR"
             logger.error(f"TTS error: {e}")
             raise
         finally:
-            span.end()
+            self.telemetry.span(
+                trace_id,
+                name="voice_clone_tts_node",
+                metadata={"model": "resemble"},
+                start_time=start_time,
+                end_time=datetime.now(UTC),
+                level=level,
+            )
+
+
+def track_turns(session: AgentSession, agent: VoiceCloningAgent, room_name: str) -> None:
+    """Feed the session's user and agent state changes into the agent's TurnRecorder."""
+
+    @session.on("user_state_changed")
+    def _on_user_state_changed(ev: UserStateChangedEvent) -> None:
+        if ev.new_state == "speaking":
+            agent.turns.cancel_turn()
+        elif ev.old_state == "speaking":
+            agent.turns.start_turn()
+
+    @session.on("agent_state_changed")
+    def _on_turn_playout(ev: AgentStateChangedEvent) -> None:
+        if ev.new_state == "speaking":
+            stages = agent.turns.finish_turn()
+            if stages:
+                logger.info(
+                    "Turn latency: " + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in stages.items()),
+                    extra={"room": room_name, "turn_stages_ms": {k: v * 1000 for k, v in stages.items()}},
+                )
 
 
 async def entrypoint(ctx: JobContext) -> None:
-    # Load instructions and intro template from environment variables
+    job_started = time.perf_counter()
+
+    # The character comes from the dispatch; its prompts are already in memory
     try:
-        instructions = load_instructions_from_env()
-        intro_template = load_intro_template_from_env()
+        characters = get_characters()
     except FileNotFoundError as e:
         logger.error(f"Failed to load files: {e}")
         print(f"Error: {e}")
         return
+    character = characters.get(character_from_metadata(ctx.job.metadata))
+    greetings, responses = character_caches(ctx.proc, character)
 
     # Connect to the room
     await ctx.connect()
 
+    # Loop lag and memory of this job feed the worker's admission policy
+    reporter = start_load_reporter()
+    if reporter is not None:
+        ctx.add_shutdown_callback(reporter.aclose)
+
+    # Off unless PROFILING_ENABLED; then profiled on request via the token API
+    profiler = open_profiler(ctx.room.name)
+    if profiler is not None:
+        profiler.start(ctx.room)
+        ctx.add_shutdown_callback(profiler.aclose)
+
     print(f"VOICE CLONING AGENT CONNECTED TO ROOM: {ctx.room.name}")
     print(f"LOCAL PARTICIPANT: {ctx.room.local_participant.identity}")
+    print(f"CHARACTER: {character.name}")
 
-    if len(ctx.room.remote_participants) == 0:
-        print("EXITING: No participants in the room for voice cloning demo")
+    # The token API dispatches the agent when it hands out the room, so the
+    # agent usually arrives before the user; give up if they never join
+    wait_started = time.perf_counter()
+    try:
+        participant = await asyncio.wait_for(
+            ctx.wait_for_participant(), timeout=get_settings().voice.participant_timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.info(f"No participant joined {ctx.room.name}, ending the job")
+        ctx.shutdown(reason="participant never joined")
         return
+    participant_wait = time.perf_counter() - wait_started
 
     print(f"REMOTE PARTICIPANTS: {len(ctx.room.remote_participants)}")
     
@@ -206,13 +452,36 @@ async def entrypoint(ctx: JobContext) -> None:
     session = AgentSession()
 
     # Configure voice cloning agent
-    participant = list(ctx.room.remote_participants.values())[0]
     
     agent = VoiceCloningAgent(
-        instructions=instructions,
-        intro_template=intro_template,
-        user_name=participant.name
+        instructions=character.instructions,
+        intro_template=character.intro_template,
+        user_name=participant.name,
+        vad=ctx.proc.userdata.get("vad"),
+        greetings=greetings,
+        responses=responses,
+        profiler=profiler,
     )
+
+    track_turns(session, agent, ctx.room.name)
+
+    @session.on("agent_state_changed")
+    def _on_agent_state_changed(ev: AgentStateChangedEvent) -> None:
+        # Startup latency: from accepting the job until the agent can hear the
+        # user, not counting time spent waiting for the user to join
+        if ev.new_state == "listening":
+            session.off("agent_state_changed", _on_agent_state_changed)
+            latency_ms = (time.perf_counter() - job_started - participant_wait) * 1000
+            get_registry().observe("first_listen", latency_ms / 1000)
+            get_registry().flush()
+            logger.info(
+                f"Job accept to first listen: {latency_ms:.0f} ms",
+                extra={
+                    "room": ctx.room.name,
+                    "first_listen_ms": latency_ms,
+                    "participant_wait_ms": participant_wait * 1000,
+                },
+            )
     
     # Set up room input/output - enable audio and transcripts
     room_input = RoomInputOptions(
@@ -233,5 +502,26 @@ async def entrypoint(ctx: JobContext) -> None:
     )
 
 
+def worker_options() -> WorkerOptions:
+    """Worker options for this agent, with load-aware admission unless it is disabled."""
+    load_plugins()
+    options = WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        agent_name=get_settings().livekit.agent_name,
+    )
+    policy = open_admission_policy()
+    if policy is not None:
+        # Before any job process is started, so they all inherit the report directory
+        policy.install()
+        options.load_fnc = policy.load_fnc
+        options.request_fnc = policy.request_fnc
+        # The policy's load reaches 1.0 exactly at a limit
+        options.load_threshold = 1.0
+    return options
+
+
 if __name__ == "__main__":
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+    from turn_metrics import start_worker_metrics
+    start_worker_metrics()
+    cli.run_app(worker_options())
@@ -0,0 +1,232 @@
+"""
+Lazy audio sources for large reference and source recordings.
+
+Opening an AudioSource only parses the file header, so validating an hour
+long recording costs a few small reads instead of a full decode. For PCM and
+float WAV files the sample data is memory-mapped and converted to float32
+one window at a time, which is what the preparation tools use for block
+streaming and segment selection. Other formats, and WAV encodings the header
+reader does not handle (mu-law, A-law, ADPCM), fall back to a single
+torchaudio decode. It runs on the first access to the samples or the stream
+properties and is kept for the lifetime of the source, so a file that is only
+sniffed (see sniff_format) is never decoded here.
+
+Usage:
+    source = AudioSource("podcast.wav")            # header only
+    print(source.duration, source.sample_rate)
+    window = source.read_seconds(125.0, 170.0)     # mono float32 window
+    for block in source.blocks(source.sample_rate * 30):
+        ...
+"""
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+# Leading bytes of the containers torchaudio is expected to decode
+_MAGIC = (
+    (b"fLaC", "flac"),
+    (b"OggS", "ogg"),
+    (b"ID3", "mp3"),
+    (b"FORM", "aiff"),
+)
+# Attributes of a decoded source that are only known once it has been decoded
+_DECODED_ATTRS = ("sample_rate", "channels", "num_frames", "sample_width")
+
+
+class AudioFormatError(ValueError):
+    """Raised when a file is not a readable audio file."""
+
+
+def sniff_format(path):
+    """Name the container from the file's leading bytes without decoding it, or None."""
+    with open(path, "rb") as f:
+        head = f.read(12)
+    if len(head) >= 12 and head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+        return "wav"
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    if len(head) >= 8 and head[4:8] == b"ftyp":
+        return "mp4"
+    # Bare MPEG audio frame sync
+    if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        return "mp3"
+    return None
+
+
+def _parse_wav_header(f):
+    """Walk RIFF chunks and return (format tag, channels, rate, bits, data offset, data size)."""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] not in (b"RIFF", b"RF64") or riff[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            body = f.read(size)
+            tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (tag, channels, rate, bits)
+            if size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioFormatError("WAV data chunk appears before its fmt chunk")
+            offset = f.tell()
+            # Streamed WAVs carry a placeholder size; trust the file length instead
+            available = os.fstat(f.fileno()).st_size - offset
+            if size == 0xFFFFFFFF or size > available:
+                size = available
+            return fmt + (offset, size)
+        else:
+            f.seek(size + (size % 2), os.SEEK_CUR)
+    raise AudioFormatError("WAV file has no data chunk")
+
+
+class AudioSource:
+    """Header-only view of an audio file with windowed float32 reads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._mmap = None
+        self._samples = None
+        self._decoded = None
+
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Audio file {path} not found")
+
+        with open(path, "rb") as f:
+            try:
+                header = _parse_wav_header(f)
+            except struct.error as e:
+                raise AudioFormatError(f"Corrupt WAV header: {e}")
+
+        if header is None:
+            self._kind = "decoded"
+            return
+
+        tag, channels, sample_rate, bits, self._offset, size = header
+        if tag == _WAVE_FORMAT_PCM and bits in (8, 16, 24, 32):
+            self._kind = "pcm"
+        elif tag == _WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+            self._kind = "float"
+        else:
+            # mu-law, A-law, ADPCM and the like: let torchaudio decode them
+            self._kind = "decoded"
+            return
+        self.channels, self.sample_rate = channels, sample_rate
+        if not self.channels or not self.sample_rate:
+            raise AudioFormatError("WAV header has no channels or sample rate")
+        self.sample_width = bits // 8
+        self.num_frames = size // (self.sample_width * self.channels)
+
+    @property
+    def is_mapped(self):
+        """True when samples are read from a memory map rather than a full decode."""
+        return self._kind != "decoded"
+
+    def __getattr__(self, name):
+        # Only reached for attributes not set yet: a decoded source's stream properties
+        if name in _DECODED_ATTRS and self.__dict__.get("_kind") == "decoded" and self._decoded is None:
+            self._open_decoded()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def _open_decoded(self):
+        """Decode the file once with torchaudio and keep the result."""
+        import torchaudio as ta
+
+        try:
+            wav, self.sample_rate = ta.load(self.path)
+        except Exception as e:
+            raise AudioFormatError(f"Could not decode audio: {e}")
+        self._kind = "decoded"
+        self._decoded = wav.numpy().T.astype(np.float32, copy=False)
+        self.num_frames, self.channels = self._decoded.shape
+        self.sample_width = 4
+
+    @property
+    def duration(self):
+        return self.num_frames / self.sample_rate
+
+    def _frames_view(self):
+        """Map the data chunk on first use and return an (frames, channels[, bytes]) view."""
+        if self._samples is None:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            nbytes = self.num_frames * self.channels * self.sample_width
+            if self._kind == "float":
+                dtype = "<f4" if self.sample_width == 4 else "<f8"
+            elif self.sample_width == 3:
+                dtype = np.uint8
+            else:
+                dtype = {1: np.uint8, 2: "<i2", 4: "<i4"}[self.sample_width]
+            flat = np.frombuffer(self._mmap, dtype=dtype, count=nbytes // np.dtype(dtype).itemsize, offset=self._offset)
+            if self.sample_width == 3:
+                self._samples = flat.reshape(self.num_frames, self.channels, 3)
+            else:
+                self._samples = flat.reshape(self.num_frames, self.channels)
+        return self._samples
+
+    def read(self, start=0, num_frames=None, mono=True):
+        """Return float32 samples for a frame window, downmixed to mono by default."""
+        start = max(0, min(start, self.num_frames))
+        stop = self.num_frames if num_frames is None else min(start + num_frames, self.num_frames)
+
+        if self._kind == "decoded":
+            window = self._decoded[start:stop]
+        else:
+            window = self._frames_view()[start:stop]
+            if self._kind == "float":
+                window = window.astype(np.float32)
+            elif self.sample_width == 1:
+                window = (window.astype(np.float32) - 128.0) / 128.0
+            elif self.sample_width == 2:
+                window = window.astype(np.float32) / 32768.0
+            elif self.sample_width == 3:
+                b = window.astype(np.int32)
+                ints = b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)
+                window = np.where(ints & 0x800000, ints - 0x1000000, ints).astype(np.float32) / 8388608.0
+            else:
+                window = window.astype(np.float32) / 2147483648.0
+
+        return window.mean(axis=1) if mono else window
+
+    def read_seconds(self, start, end=None, mono=True):
+        """Return float32 samples between `start` and `end` seconds."""
+        first = int(start * self.sample_rate)
+        count = None if end is None else max(0, int(end * self.sample_rate) - first)
+        return self.read(first, count, mono)
+
+    def blocks(self, block_frames, start=0.0, end=None, mono=True):
+        """Yield consecutive float32 blocks between `start` and `end` seconds."""
+        first = int(start * self.sample_rate)
+        last = self.num_frames if end is None else min(int(end * self.sample_rate), self.num_frames)
+        for pos in range(first, last, block_frames):
+            yield self.read(pos, min(block_frames, last - pos), mono)
+
+    def close(self):
+        """Release the memory map."""
+        self._samples = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,212 @@
+"""
+Batch synthesis for the voice clone template.
+
+Renders many lines from a manifest with a single loaded model. Each manifest
+row names the text, the voice prompt, an optional exaggeration value and the
+output path:
+
+    JSONL: {"text": "Hello there", "audio": "voices/alice.wav", "exaggeration": 0.6, "output": "out/hello.wav"}
+    CSV:   text,audio,exaggeration,output
+
+Relative paths are resolved against the manifest's directory. Jobs are grouped
+by voice prompt so speaker conditionals are computed once per voice, every
+result is written to disk as soon as it is rendered, and each item's outcome
+is appended to a JSONL report. Outputs that already exist are skipped, so an
+interrupted run can simply be started again.
+
+Usage:
+    python voice_clone_template.py --manifest lines.jsonl --report report.jsonl
+"""
+
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from itertools import groupby
+
+import torchaudio as ta
+
+
+@dataclass
+class BatchJob:
+    """One line of a batch manifest."""
+
+    index: int
+    text: str
+    audio: str
+    exaggeration: float
+    output: str
+
+
+def _resolve(base_dir, path):
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(base_dir, path))
+
+
+def load_manifest(manifest_path, default_exaggeration=0.5):
+    """Parse a JSONL or CSV manifest into a list of BatchJob entries."""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        if manifest_path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for index, row in enumerate(rows):
+        missing = [field for field in ("text", "audio", "output") if not row.get(field)]
+        if missing:
+            raise ValueError(f"Manifest row {index + 1} is missing: {', '.join(missing)}")
+        exaggeration = row.get("exaggeration")
+        jobs.append(BatchJob(
+            index=index,
+            text=row["text"],
+            audio=_resolve(base_dir, row["audio"]),
+            exaggeration=float(exaggeration) if exaggeration not in (None, "") else default_exaggeration,
+            output=_resolve(base_dir, row["output"]),
+        ))
+    return jobs
+
+
+def group_jobs(jobs):
+    """Order jobs so that lines sharing a voice prompt are rendered back to back."""
+    ordered = sorted(jobs, key=lambda job: (job.audio, job.exaggeration, job.index))
+    return [list(group) for _, group in groupby(ordered, key=lambda job: (job.audio, job.exaggeration))]
+
+
+def write_output(wav, output_path, sample_rate):
+    """Save audio atomically so a partial file is never mistaken for a finished one."""
+    out_dir = os.path.dirname(output_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    root, ext = os.path.splitext(output_path)
+    tmp_path = f"{root}.tmp-{os.getpid()}{ext}"
+    try:
+        ta.save(tmp_path, wav, sample_rate)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class BatchReport:
+    """Append-only JSONL report of per-item outcomes."""
+
+    def __init__(self, report_path=None):
+        self.counts = {"ok": 0, "skipped": 0, "error": 0}
+        self._file = open(report_path, "a", encoding="utf-8") if report_path else None
+
+    def record(self, job, status, seconds=0.0, error=None):
+        self.counts[status] += 1
+        entry = {
+            "index": job.index,
+            "output": job.output,
+            "audio": job.audio,
+            "status": status,
+            "seconds": round(seconds, 3),
+        }
+        if error:
+            entry["error"] = error
+        if self._file:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def run_batch(model, jobs, synthesize, cond_cache, report_path=None, overwrite=False):
+    """
+    Render every job with an already-loaded model.
+
+    Args:
+        model: Loaded ChatterboxTTS model
+        jobs: BatchJob entries from load_manifest
+        synthesize: Callable(model, text, audio, exaggeration, cond_cache) -> wav tensor
+        cond_cache: ConditioningCache used to share conditionals across a voice group
+        report_path: Optional JSONL file that receives one entry per job
+        overwrite: Re-render outputs that already exist
+
+    Returns:
+        dict: Counts of ok, skipped and error items
+    """
+    report = BatchReport(report_path)
+    total = len(jobs)
+    done = 0
+    try:
+        for group in group_jobs(jobs):
+            voice = group[0].audio
+            print(f"Voice {voice} (exaggeration {group[0].exaggeration}): {len(group)} lines")
+            # Existing outputs are skipped first, so a resumed run reports them as
+            # skipped even if their voice has since gone missing
+            voice_found = os.path.exists(voice)
+
+            for job in group:
+                done += 1
+                if not overwrite and os.path.exists(job.output):
+                    report.record(job, "skipped")
+                    continue
+                if not voice_found:
+                    report.record(job, "error", error=f"Audio file {voice} not found")
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    wav = synthesize(model, job.text, job.audio, job.exaggeration, cond_cache)
+                    write_output(wav, job.output, model.sr)
+                except Exception as e:
+                    report.record(job, "error", time.perf_counter() - start, error=str(e))
+                    print(f"[{done}/{total}] FAILED {job.output}: {e}")
+                    continue
+                elapsed = time.perf_counter() - start
+                report.record(job, "ok", elapsed)
+                print(f"[{done}/{total}] {job.output} ({elapsed:.1f}s)")
+    finally:
+        report.close()
+
+    return report.counts
+
+
+def run_batch_pool(pool, jobs, report_path=None, overwrite=False):
+    """
+    Render every job on a started SynthesisPool, writing results as they arrive.
+
+    Jobs are queued in voice-group order so each worker's conditioning cache
+    stays warm; outputs that already exist are skipped before queueing.
+
+    Returns:
+        dict: Counts of ok, skipped and error items
+    """
+    report = BatchReport(report_path)
+    by_index = {}
+    try:
+        for group in group_jobs(jobs):
+            for job in group:
+                if not overwrite and os.path.exists(job.output):
+                    report.record(job, "skipped")
+                elif not os.path.exists(job.audio):
+                    report.record(job, "error", error=f"Audio file {job.audio} not found")
+                else:
+                    by_index[job.index] = job
+                    pool.submit(job.index, job.text, job.audio, job.exaggeration)
+
+        total = len(by_index)
+        for done, result in enumerate(pool.results(), start=1):
+            job = by_index[result.job_id]
+            if result.error is None:
+                try:
+                    write_output(result.wav, job.output, result.sample_rate)
+                except Exception as e:
+                    result.error = str(e)
+            if result.error is not None:
+                report.record(job, "error", result.seconds, error=result.error)
+                print(f"[{done}/{total}] FAILED {job.output}: {result.error}")
+                continue
+            report.record(job, "ok", result.seconds)
+            print(f"[{done}/{total}] {job.output} ({result.seconds:.1f}s, worker {result.worker_id})")
+    finally:
+        report.close()
+
+    return report.counts
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the multi-process synthesis pool.
+
+Renders the same set of lines with an increasing number of worker processes
+and reports lines per second, audio seconds per wall second and the speedup
+over a single worker. Model loading and a warm-up line per worker are timed
+separately and excluded from the throughput numbers.
+
+Usage:
+    python benchmark_pool.py --audio voice.wav --workers 1,2,4,8,16,32 --lines 64
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from synthesis_pool import SynthesisPool
+
+DEFAULT_LINES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Voice cloning lets you hear familiar voices say brand new things.",
+    "Please hold while we connect your call to the next available agent.",
+    "Rendering prompt libraries overnight keeps every core on the host busy.",
+]
+
+
+def run_once(num_workers, audio, lines, exaggeration, device):
+    """Render `lines` on a fresh pool and return timing figures."""
+    start = time.perf_counter()
+    # Every worker renders a warm-up line before reporting ready, so encoding
+    # the voice is not measured; with a shared queue some workers might miss it
+    with SynthesisPool(num_workers, device=device, cond_cache_dir=None,
+                       warmup=("Warm up.", audio, exaggeration)) as pool:
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i, text in enumerate(lines):
+            pool.submit(i, text, audio, exaggeration)
+        audio_seconds = 0.0
+        errors = 0
+        for result in pool.results():
+            if result.error:
+                errors += 1
+            else:
+                audio_seconds += result.wav.shape[-1] / result.sample_rate
+        elapsed = time.perf_counter() - start
+
+    return {
+        "workers": num_workers,
+        "startup": startup,
+        "elapsed": elapsed,
+        "lines_per_s": len(lines) / elapsed,
+        "audio_rtf": audio_seconds / elapsed,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SynthesisPool throughput by worker count")
+    parser.add_argument("--audio", "-a", required=True,
+                       help="Voice prompt used for every line")
+    parser.add_argument("--workers", default="1,2,4,8",
+                       help="Comma-separated worker counts to test (default: 1,2,4,8)")
+    parser.add_argument("--lines", "-n", type=int, default=32,
+                       help="Number of lines rendered per run (default: 32)")
+    parser.add_argument("--exaggeration", "-e", type=float, default=0.5,
+                       help="Exaggeration factor (default: 0.5)")
+    parser.add_argument("--device", "-d", default="cpu", choices=["cpu", "cuda"],
+                       help="Device to use for inference (default: cpu)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.audio):
+        print(f"Error: Audio file {args.audio} not found!")
+        sys.exit(1)
+
+    lines = [DEFAULT_LINES[i % len(DEFAULT_LINES)] for i in range(args.lines)]
+    counts = [int(n) for n in args.workers.split(",")]
+    print(f"{os.cpu_count()} CPUs available, {len(lines)} lines per run")
+
+    rows = []
+    for num_workers in counts:
+        rows.append(run_once(num_workers, args.audio, lines, args.exaggeration, args.device))
+
+    baseline = rows[0]["lines_per_s"] / rows[0]["workers"]
+    print()
+    print(f"{'workers':>7} {'startup s':>10} {'wall s':>8} {'lines/s':>8} {'audio x RT':>10} {'speedup':>8} {'efficiency':>10}")
+    for row in rows:
+        speedup = row["lines_per_s"] / baseline
+        print(f"{row['workers']:>7} {row['startup']:>10.1f} {row['elapsed']:>8.1f} {row['lines_per_s']:>8.2f} "
+              f"{row['audio_rtf']:>10.2f} {speedup:>8.2f} {speedup / row['workers']:>9.0%}"
+              + (f"  ({row['errors']} errors)" if row["errors"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark the warm-start artifact against the default model load.
+
+Each variant runs in a fresh subprocess so load time and memory are measured
+cold for the process (the Hugging Face cache is assumed to be populated, as
+it is on any host that has run the model before). For each variant this
+reports model load time, resident memory after loading, and the realtime
+factor of synthesizing the same text with the same seed. The outputs are
+compared by the cosine similarity of their average log-mel spectra and their
+duration ratio, as a sanity check that quantization did not change the voice.
+
+Usage:
+    python benchmark_warm_start.py --artifact artifacts/chatterbox-int8 --audio voice.wav
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_TEXT = (
+    "Voice cloning lets you hear familiar voices say brand new things, "
+    "and a fast start means short jobs spend their time talking instead of loading."
+)
+SIMILARITY_WARNING = 0.95
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KB on Linux and bytes on macOS; it is a peak, not current
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(args):
+    """Load one variant, synthesize once and print its measurements as JSON."""
+    import numpy as np
+    import torch
+
+    from voice_clone_template import load_model
+
+    start = time.perf_counter()
+    model = load_model("cpu", args.artifact if args.child == "artifact" else None)
+    load_s = time.perf_counter() - start
+    rss_mb = current_rss_mb()
+
+    # Prepare conditionals outside the timed region; only inference is compared
+    model.prepare_conditionals(args.audio, exaggeration=0.5)
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    wav = model.generate(args.text, exaggeration=0.5)
+    gen_s = time.perf_counter() - start
+
+    samples = wav.squeeze(0).detach().cpu().numpy()
+    np.save(args.save, samples)
+    audio_s = len(samples) / model.sr
+    print(json.dumps({
+        "variant": args.child,
+        "load_s": load_s,
+        "rss_mb": rss_mb,
+        "gen_s": gen_s,
+        "audio_s": audio_s,
+        "rtf": gen_s / audio_s if audio_s else float("inf"),
+        "sample_rate": model.sr,
+    }))
+
+
+def mel_similarity(a, b, sample_rate):
+    """Cosine similarity of the time-averaged log-mel spectra of two signals."""
+    import torch
+    import torchaudio
+
+    mel = torchaudio.transforms.MelSpectrogram(sample_rate=sample_rate, n_fft=1024, hop_length=256, n_mels=80)
+    profiles = [torch.log(mel(torch.from_numpy(x)) + 1e-6).mean(dim=-1) for x in (a, b)]
+    return torch.nn.functional.cosine_similarity(profiles[0], profiles[1], dim=0).item()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare warm-start artifact loading against from_pretrained")
+    parser.add_argument("--artifact", required=True,
+                       help="Artifact directory built with warm_start.py build")
+    parser.add_argument("--audio", "-a", required=True,
+                       help="Voice prompt used for both variants")
+    parser.add_argument("--text", "-t", default=DEFAULT_TEXT,
+                       help="Text to synthesize")
+    parser.add_argument("--child", choices=["default", "artifact"], help=argparse.SUPPRESS)
+    parser.add_argument("--save", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    import numpy as np
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in ("default", "artifact"):
+            save = os.path.join(tmp, f"{variant}.npy")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--artifact", args.artifact,
+                 "--audio", args.audio, "--text", args.text, "--child", variant, "--save", save],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"Error: {variant} run failed:\n{proc.stdout}{proc.stderr}")
+                sys.exit(1)
+            results[variant] = json.loads(proc.stdout.strip().splitlines()[-1])
+            results[variant]["samples"] = np.load(save)
+
+    default, artifact = results["default"], results["artifact"]
+    similarity = mel_similarity(default["samples"], artifact["samples"], default["sample_rate"])
+    duration_ratio = artifact["audio_s"] / default["audio_s"]
+
+    print(f"{'variant':>9} {'load s':>8} {'RSS MB':>8} {'gen s':>7} {'audio s':>8} {'RTF':>6}")
+    for row in (default, artifact):
+        print(f"{row['variant']:>9} {row['load_s']:>8.2f} {row['rss_mb']:>8.0f} {row['gen_s']:>7.2f} "
+              f"{row['audio_s']:>8.2f} {row['rtf']:>6.2f}")
+    print()
+    print(f"Load speedup: {default['load_s'] / artifact['load_s']:.1f}x, "
+          f"RSS change: {artifact['rss_mb'] - default['rss_mb']:+.0f} MB, "
+          f"RTF speedup: {default['rtf'] / artifact['rtf']:.2f}x")
+    print(f"Output similarity: log-mel cosine {similarity:.3f}, duration ratio {duration_ratio:.2f}")
+    if similarity < SIMILARITY_WARNING:
+        print(f"Warning: similarity below {SIMILARITY_WARNING}; listen to both outputs before switching")
+
+
+if __name__ == "__main__":
+    main()
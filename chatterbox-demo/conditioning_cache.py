@@ -0,0 +1,112 @@
+"""
+Speaker conditioning cache for ChatterboxTTS.
+
+Computing the conditionals for a voice prompt (loading and resampling the
+reference audio, running the voice encoder and the speech tokenizer) is the
+most expensive per-call step when many lines are rendered against the same
+few voices. This module keeps those conditionals in an in-memory LRU and
+persists them to disk, keyed by the audio file's content hash plus the
+exaggeration value, so repeated and restarted runs skip speaker encoding.
+
+Usage:
+    cache = ConditioningCache("~/.cache/voice-clone/conds")
+    model.conds = cache.get(model, "voice.wav", exaggeration=0.5)
+    wav = model.generate(text, exaggeration=0.5)
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+from chatterbox.tts import Conditionals
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "voice-clone", "conds")
+DEFAULT_MAX_ENTRIES = 16
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConditioningCache:
+    """In-memory LRU of speaker conditionals backed by a directory of .pt files."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # (path, size, mtime) -> content hash, so the prompt file is only
+        # re-read when it actually changes on disk
+        self._hashes = {}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def content_hash(self, audio_path):
+        """Return the content hash of an audio file, memoized on size and mtime."""
+        stat = os.stat(audio_path)
+        stamp = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(stamp)
+        if digest is None:
+            digest = file_sha256(audio_path)
+            self._hashes[stamp] = digest
+        return digest
+
+    def key(self, audio_path, exaggeration):
+        """Build the cache key for a voice prompt and exaggeration value."""
+        return f"{self.content_hash(audio_path)}-{float(exaggeration):.4f}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pt")
+
+    def _remember(self, key, conds):
+        self._entries[key] = conds
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, model, audio_path, exaggeration=0.5):
+        """Return conditionals for a voice prompt, computing them only on a miss."""
+        key = self.key(audio_path, exaggeration)
+
+        conds = self._entries.get(key)
+        if conds is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return conds
+
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                conds = Conditionals.load(self._disk_path(key), map_location="cpu").to(model.device)
+            except Exception as e:
+                print(f"Warning: ignoring unreadable conditioning cache entry {key}: {e}")
+                conds = None
+            if conds is not None:
+                self._remember(key, conds)
+                self.hits += 1
+                return conds
+
+        self.misses += 1
+        model.prepare_conditionals(audio_path, exaggeration=exaggeration)
+        conds = model.conds
+        if self.cache_dir:
+            # Write to a temporary name first so a crashed run never leaves a
+            # truncated entry behind for the next one to load
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+            try:
+                conds.save(tmp_path)
+                os.replace(tmp_path, self._disk_path(key))
+            except Exception as e:
+                print(f"Warning: could not persist conditionals for {audio_path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        self._remember(key, conds)
+        return conds
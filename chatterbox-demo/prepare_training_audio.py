@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Training audio preparation pipeline.
+
+Replaces the manual ffmpeg/Audacity passes of README step 1 (segment
+extraction, silence trimming, loudness normalization and concatenation)
+with a single streaming pass in Python:
+
+1. Source recordings are memory-mapped (see audio_source.py) and read in
+   fixed-size blocks, so multi-hour podcasts never have to fit in memory.
+2. An energy-based voice activity detector, computed per frame with
+   vectorized NumPy ops, splits each block into speech and silence runs.
+   Speech runs separated by short pauses are merged into segments, and long
+   silences are trimmed down to a small padding.
+3. Each finished segment is gain-adjusted to a target speech level (with a
+   peak ceiling) and appended to the output file straight away.
+
+Usage:
+    # Whole recordings
+    python prepare_training_audio.py podcast1.wav podcast2.wav --output training_audio.wav
+
+    # Only the time ranges picked in step 1c (CSV or JSONL with file,start,end)
+    python prepare_training_audio.py --segments plan.csv --output training_audio.wav
+
+PCM and float WAV inputs are streamed; other formats are decoded once with
+torchaudio.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+import torch
+import torchaudio.functional as AF
+
+from audio_source import AudioFormatError, AudioSource
+
+DEFAULT_BLOCK_SECONDS = 30.0
+FRAME_MS = 20
+
+
+@dataclass
+class PrepConfig:
+    """Tuning knobs for trimming and normalization."""
+
+    vad_threshold_db: float = -40.0   # frame RMS above this counts as speech
+    min_speech_ms: float = 300.0      # drop segments with less speech than this
+    max_pause_ms: float = 600.0       # pauses up to this long stay inside a segment
+    padding_ms: float = 100.0         # silence kept before and after each segment
+    max_segment_s: float = 30.0       # longer speech is split into several segments
+    target_db: float = -20.0          # RMS speech level each segment is normalized to
+    peak_db: float = -1.0             # gain is limited so peaks stay below this
+    gap_ms: float = 250.0             # silence inserted between segments in the output
+    block_seconds: float = DEFAULT_BLOCK_SECONDS
+
+
+def parse_time(value):
+    """Parse seconds, MM:SS or HH:MM:SS into seconds."""
+    seconds = 0.0
+    for part in str(value).strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def iter_blocks(source, start=0.0, end=None, block_seconds=DEFAULT_BLOCK_SECONDS):
+    """Yield mono float32 blocks of an AudioSource between `start` and `end` seconds."""
+    block = max(1, int(block_seconds * source.sample_rate))
+    yield from source.blocks(block, start, end)
+
+
+def frame_levels_db(samples, frame_len):
+    """RMS level in dBFS of each complete frame."""
+    frames = samples[: len(samples) // frame_len * frame_len].reshape(-1, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+def speech_runs(samples, sample_rate, threshold_db):
+    """Split a block into (is_speech, samples) runs using a frame-energy VAD."""
+    frame_len = max(1, sample_rate * FRAME_MS // 1000)
+    is_speech = frame_levels_db(samples, frame_len) > threshold_db
+    # A partial trailing frame inherits the decision of the last full frame
+    if len(samples) % frame_len:
+        is_speech = np.append(is_speech, is_speech[-1] if len(is_speech) else False)
+
+    if len(is_speech) == 0:
+        return []
+    edges = np.flatnonzero(np.diff(is_speech.astype(np.int8))) + 1
+    starts = np.concatenate([[0], edges]) * frame_len
+    ends = np.append(edges * frame_len, len(samples))
+    return [(bool(is_speech[s // frame_len]), samples[s:e]) for s, e in zip(starts, ends)]
+
+
+class SegmentCollector:
+    """Streams speech/silence runs into padded segments, merging short pauses."""
+
+    def __init__(self, sample_rate, config):
+        ms = sample_rate / 1000.0
+        self.pad = int(config.padding_ms * ms)
+        self.max_pause = int(config.max_pause_ms * ms)
+        self.max_len = int(config.max_segment_s * sample_rate)
+        self.min_speech = int(config.min_speech_ms * ms)
+        self._preroll = np.zeros(0, dtype=np.float32)
+        self._segment = None
+        self._segment_len = 0
+        self._speech_len = 0
+        self._pause = []
+        self._pause_len = 0
+        self.dropped = 0
+
+    def _close(self, trailing):
+        parts = self._segment + [trailing]
+        speech_len = self._speech_len
+        self._segment = None
+        self._pause, self._pause_len = [], 0
+        if speech_len < self.min_speech:
+            self.dropped += 1
+            return None
+        return np.concatenate(parts)
+
+    def feed(self, is_speech, samples):
+        """Consume one run; return a list of finished segments."""
+        finished = []
+        if is_speech:
+            if self._segment is None:
+                self._segment, self._segment_len, self._speech_len = [self._preroll], len(self._preroll), 0
+            else:
+                self._segment.extend(self._pause)
+                self._segment_len += self._pause_len
+            self._pause, self._pause_len = [], 0
+
+            while len(samples):
+                room = self.max_len - self._segment_len
+                take = samples[:room] if room > 0 else samples[:0]
+                self._segment.append(take)
+                self._segment_len += len(take)
+                self._speech_len += len(take)
+                samples = samples[len(take):]
+                if self._segment_len >= self.max_len:
+                    segment = self._close(np.zeros(0, dtype=np.float32))
+                    if segment is not None:
+                        finished.append(segment)
+                    if len(samples):
+                        self._segment, self._segment_len, self._speech_len = [], 0, 0
+            self._preroll = np.zeros(0, dtype=np.float32)
+        elif self._segment is None:
+            self._preroll = np.concatenate([self._preroll, samples])[-self.pad:] if self.pad else self._preroll
+        else:
+            self._pause.append(samples)
+            self._pause_len += len(samples)
+            if self._pause_len > self.max_pause:
+                pause = np.concatenate(self._pause)
+                segment = self._close(pause[: self.pad])
+                if segment is not None:
+                    finished.append(segment)
+                self._preroll = pause[-self.pad:] if self.pad else np.zeros(0, dtype=np.float32)
+        return finished
+
+    def flush(self):
+        """Finish the segment in progress at the end of an input."""
+        if self._segment is None:
+            return []
+        pause = np.concatenate(self._pause) if self._pause else np.zeros(0, dtype=np.float32)
+        segment = self._close(pause[: self.pad])
+        self._preroll = np.zeros(0, dtype=np.float32)
+        return [segment] if segment is not None else []
+
+
+def normalize_segment(samples, sample_rate, config):
+    """Apply one gain so the segment's speech frames hit the target level without clipping."""
+    frame_len = max(1, sample_rate * FRAME_MS // 1000)
+    levels = frame_levels_db(samples, frame_len)
+    speech = levels[levels > config.vad_threshold_db]
+    if len(speech) == 0:
+        return samples
+    # Average power over speech frames only, so padding does not skew the level
+    speech_db = 10.0 * np.log10(np.mean(np.power(10.0, speech / 10.0)))
+    gain_db = config.target_db - speech_db
+    peak = np.max(np.abs(samples))
+    if peak > 0:
+        gain_db = min(gain_db, config.peak_db - 20.0 * np.log10(peak))
+    return samples * np.float32(10.0 ** (gain_db / 20.0))
+
+
+class TrainingAudioWriter:
+    """Appends normalized segments to a 16-bit mono WAV file."""
+
+    def __init__(self, output_path, sample_rate, config):
+        self.sample_rate = sample_rate
+        self.config = config
+        self.segments = 0
+        self.frames = 0
+        self._gap = np.zeros(int(sample_rate * config.gap_ms / 1000), dtype=np.float32)
+        self._wav = wave.open(output_path, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def add(self, segment, source_rate):
+        if source_rate != self.sample_rate:
+            segment = AF.resample(torch.from_numpy(segment), source_rate, self.sample_rate).numpy()
+        segment = normalize_segment(segment, self.sample_rate, self.config)
+        if self.segments:
+            segment = np.concatenate([self._gap, segment])
+        pcm = (np.clip(segment, -1.0, 1.0) * 32767.0).astype("<i2")
+        self._wav.writeframes(pcm.tobytes())
+        self.segments += 1
+        self.frames += len(pcm)
+
+    def close(self):
+        self._wav.close()
+
+
+def load_segment_plan(path):
+    """Read (file, start, end) rows from a CSV or JSONL segment plan."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    plan = []
+    for row in rows:
+        source = row["file"] if os.path.isabs(row["file"]) else os.path.join(base_dir, row["file"])
+        start = parse_time(row.get("start") or 0)
+        end = parse_time(row["end"]) if row.get("end") else None
+        plan.append((source, start, end))
+    return plan
+
+
+def prepare(sources, output_path, config, sample_rate=None):
+    """
+    Run the whole pipeline over (file, start, end) sources in one pass.
+
+    Returns:
+        TrainingAudioWriter: The closed writer, for its segment and frame counts
+    """
+    writer = None
+    dropped = 0
+    try:
+        for path, start, end in sources:
+            print(f"Processing {path}" + (f" [{start:.1f}s - {end:.1f}s]" if end else ""))
+            with AudioSource(path) as source:
+                source_rate = source.sample_rate
+                if writer is None:
+                    writer = TrainingAudioWriter(output_path, sample_rate or source_rate, config)
+                collector = SegmentCollector(source_rate, config)
+                for block in iter_blocks(source, start, end, config.block_seconds):
+                    for is_speech, run in speech_runs(block, source_rate, config.vad_threshold_db):
+                        for segment in collector.feed(is_speech, run):
+                            writer.add(segment, source_rate)
+                for segment in collector.flush():
+                    writer.add(segment, source_rate)
+                dropped += collector.dropped
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is not None:
+        writer.dropped = dropped
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare clean, normalized training audio in one pass")
+    parser.add_argument("inputs", nargs="*",
+                       help="Source WAV files to process in full")
+    parser.add_argument("--segments", "-s",
+                       help="CSV/JSONL plan of file,start,end ranges to extract instead of whole files")
+    parser.add_argument("--output", "-o", default="training_audio.wav",
+                       help="Output file path (default: training_audio.wav)")
+    parser.add_argument("--sample-rate", type=int, default=None,
+                       help="Resample the output to this rate (default: keep the source rate)")
+    parser.add_argument("--vad-threshold-db", type=float, default=PrepConfig.vad_threshold_db,
+                       help=f"Frame level in dBFS that counts as speech (default: {PrepConfig.vad_threshold_db})")
+    parser.add_argument("--max-pause-ms", type=float, default=PrepConfig.max_pause_ms,
+                       help=f"Longest pause kept inside a segment (default: {PrepConfig.max_pause_ms})")
+    parser.add_argument("--target-db", type=float, default=PrepConfig.target_db,
+                       help=f"Speech level each segment is normalized to in dBFS (default: {PrepConfig.target_db})")
+    parser.add_argument("--gap-ms", type=float, default=PrepConfig.gap_ms,
+                       help=f"Silence between segments in the output (default: {PrepConfig.gap_ms})")
+    args = parser.parse_args()
+
+    if args.segments:
+        sources = load_segment_plan(args.segments)
+    else:
+        sources = [(path, 0.0, None) for path in args.inputs]
+    if not sources:
+        parser.error("Provide input files or --segments")
+
+    for path, _, _ in sources:
+        if not os.path.exists(path):
+            print(f"Error: Audio file {path} not found!")
+            sys.exit(1)
+
+    config = PrepConfig(
+        vad_threshold_db=args.vad_threshold_db,
+        max_pause_ms=args.max_pause_ms,
+        target_db=args.target_db,
+        gap_ms=args.gap_ms,
+    )
+    try:
+        writer = prepare(sources, args.output, config, args.sample_rate)
+    except AudioFormatError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if writer is None or not writer.segments:
+        print("Error: No speech found in the inputs")
+        sys.exit(1)
+    print(f"Wrote {writer.segments} segments ({writer.frames / writer.sample_rate:.1f}s, "
+          f"{writer.dropped} too short to keep) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Automatic voice prompt selection from long recordings.
+
+Replaces the manual transcript review of README step 1c. Each recording is
+streamed in blocks and cut into 40 ms analysis frames; for every frame the
+level, clipping and pitch (FFT autocorrelation) are computed in one batched
+NumPy pass. Sliding windows over those frames are then scored on:
+
+- SNR: speech level against the window's own noise floor
+- Clipping: fraction of samples at full scale
+- Speech ratio: share of frames above the voice activity threshold
+- Pitch variance: spread of voiced pitch in semitones, as a proxy for
+  expressive rather than monotone delivery
+
+The top-K non-overlapping windows across all inputs are written as a
+ready-to-use prompt WAV, together with a JSON report of every pick and a
+segment plan that prepare_training_audio.py --segments accepts.
+
+Usage:
+    python select_segments.py podcast*.wav --top-k 6 --window 10 --output voice_prompt.wav
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import torch
+import torchaudio.functional as AF
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_source import AudioFormatError, AudioSource
+from prepare_training_audio import PrepConfig, TrainingAudioWriter, frame_levels_db
+
+ANALYSIS_RATE = 16000
+FRAME_S = 0.04
+FRAME_LEN = int(ANALYSIS_RATE * FRAME_S)
+FFT_SIZE = 2048
+MIN_F0, MAX_F0 = 70.0, 400.0
+VOICING_THRESHOLD = 0.5
+CLIP_LEVEL = 0.99
+
+
+@dataclass
+class Candidate:
+    """A scored window of one recording."""
+
+    file: str
+    start: float
+    end: float
+    score: float
+    snr_db: float
+    clipping: float
+    speech_ratio: float
+    pitch_std: float
+
+
+def frame_pitch(frames):
+    """Estimate f0 per frame from the normalized FFT autocorrelation (0 where unvoiced)."""
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    spectrum = np.fft.rfft(frames * np.hanning(frames.shape[1]), n=FFT_SIZE, axis=1)
+    autocorr = np.fft.irfft(np.abs(spectrum) ** 2, n=FFT_SIZE, axis=1)
+    min_lag = int(ANALYSIS_RATE / MAX_F0)
+    max_lag = int(ANALYSIS_RATE / MIN_F0)
+    energy = np.maximum(autocorr[:, :1], 1e-12)
+    lags = autocorr[:, min_lag:max_lag] / energy
+    best = np.argmax(lags, axis=1)
+    strength = lags[np.arange(len(lags)), best]
+    return np.where(strength > VOICING_THRESHOLD, ANALYSIS_RATE / (best + min_lag), 0.0)
+
+
+def analyze(source, block_seconds=60.0):
+    """Return per-frame (level dB, clipped sample count, f0) arrays for a whole source."""
+    src_frame = int(round(source.sample_rate * FRAME_S))
+    block = src_frame * int(block_seconds / FRAME_S)
+    levels, clipped, pitch = [], [], []
+    for samples in source.blocks(block):
+        n = len(samples) // src_frame
+        if n == 0:
+            break
+        # Clipping is measured at the source rate, before resampling smooths it away
+        clipped.append((np.abs(samples[: n * src_frame]) >= CLIP_LEVEL).reshape(n, src_frame).sum(axis=1))
+
+        if source.sample_rate != ANALYSIS_RATE:
+            samples = AF.resample(torch.from_numpy(np.ascontiguousarray(samples)), source.sample_rate, ANALYSIS_RATE).numpy()
+        n = min(n, len(samples) // FRAME_LEN)
+        frames = samples[: n * FRAME_LEN].reshape(n, FRAME_LEN)
+        clipped[-1] = clipped[-1][:n]
+        levels.append(frame_levels_db(frames.reshape(-1), FRAME_LEN))
+        pitch.append(frame_pitch(frames))
+
+    if not levels:
+        return np.zeros(0), np.zeros(0), np.zeros(0), src_frame
+    return np.concatenate(levels), np.concatenate(clipped), np.concatenate(pitch), src_frame
+
+
+def _window_sums(values, width, hop):
+    """Sum of `values` over every window of `width` frames, stepping by `hop`."""
+    cumsum = np.concatenate([[0.0], np.cumsum(values, dtype=np.float64)])
+    starts = np.arange(0, len(values) - width + 1, hop)
+    return cumsum[starts + width] - cumsum[starts]
+
+
+def score_windows(path, levels, clipped, pitch, src_frame, window_s, hop_s, vad_threshold_db):
+    """Score every sliding window of one recording."""
+    width = int(window_s / FRAME_S)
+    hop = max(1, int(hop_s / FRAME_S))
+    if len(levels) < width:
+        return []
+
+    speech = levels > vad_threshold_db
+    voiced = speech & (pitch > 0)
+    semitones = np.where(voiced, 12.0 * np.log2(np.maximum(pitch, 1.0) / 100.0), 0.0)
+    power = np.power(10.0, levels / 10.0)
+
+    speech_frames = _window_sums(speech, width, hop)
+    speech_power = _window_sums(np.where(speech, power, 0.0), width, hop)
+    clipped_samples = _window_sums(clipped, width, hop)
+    voiced_frames = _window_sums(voiced, width, hop)
+    pitch_sum = _window_sums(semitones, width, hop)
+    pitch_sq = _window_sums(semitones ** 2, width, hop)
+
+    # Noise floor: 10th percentile of frame levels inside each window
+    noise_db = np.percentile(sliding_window_view(levels, width)[::hop], 10, axis=1)
+    speech_db = 10.0 * np.log10(np.maximum(speech_power / np.maximum(speech_frames, 1), 1e-12))
+    snr_db = np.where(speech_frames > 0, speech_db - noise_db, 0.0)
+    speech_ratio = speech_frames / width
+    clipping = clipped_samples / (width * src_frame)
+    pitch_mean = pitch_sum / np.maximum(voiced_frames, 1)
+    pitch_std = np.sqrt(np.maximum(pitch_sq / np.maximum(voiced_frames, 1) - pitch_mean ** 2, 0.0))
+
+    score = (
+        0.4 * np.clip((snr_db - 10.0) / 30.0, 0.0, 1.0)
+        + 0.3 * np.clip((speech_ratio - 0.5) / 0.4, 0.0, 1.0)
+        + 0.3 * np.clip(pitch_std / 3.0, 0.0, 1.0)
+        - np.clip(clipping * 1000.0, 0.0, 1.0)
+    )
+
+    starts = np.arange(0, len(levels) - width + 1, hop) * FRAME_S
+    return [
+        Candidate(path, float(start), float(start + window_s), float(s), float(snr), float(clip), float(ratio), float(std))
+        for start, s, snr, clip, ratio, std in zip(starts, score, snr_db, clipping, speech_ratio, pitch_std)
+    ]
+
+
+def pick_top(candidates, top_k):
+    """Greedily take the best-scoring windows that do not overlap an earlier pick."""
+    picked = []
+    for cand in sorted(candidates, key=lambda c: c.score, reverse=True):
+        if len(picked) == top_k:
+            break
+        if any(p.file == cand.file and cand.start < p.end and p.start < cand.end for p in picked):
+            continue
+        picked.append(cand)
+    return picked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the cleanest, most expressive windows for a voice prompt")
+    parser.add_argument("inputs", nargs="+",
+                       help="Source recordings to scan")
+    parser.add_argument("--output", "-o", default="voice_prompt.wav",
+                       help="Prompt file built from the picked windows (default: voice_prompt.wav)")
+    parser.add_argument("--top-k", "-k", type=int, default=6,
+                       help="Number of windows to keep (default: 6)")
+    parser.add_argument("--window", type=float, default=10.0,
+                       help="Window length in seconds (default: 10)")
+    parser.add_argument("--hop", type=float, default=1.0,
+                       help="Step between candidate windows in seconds (default: 1)")
+    parser.add_argument("--vad-threshold-db", type=float, default=PrepConfig.vad_threshold_db,
+                       help=f"Frame level in dBFS that counts as speech (default: {PrepConfig.vad_threshold_db})")
+    parser.add_argument("--report", default=None,
+                       help="JSON report of the picks (default: <output>.json)")
+    parser.add_argument("--plan", default=None,
+                       help="Also write the picks as a file,start,end CSV for prepare_training_audio.py")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    audio_seconds = 0.0
+    candidates = []
+    for path in args.inputs:
+        try:
+            with AudioSource(path) as source:
+                audio_seconds += source.duration
+                levels, clipped, pitch, src_frame = analyze(source)
+        except (FileNotFoundError, AudioFormatError) as e:
+            print(f"Error: {path}: {e}")
+            sys.exit(1)
+        found = score_windows(path, levels, clipped, pitch, src_frame, args.window, args.hop, args.vad_threshold_db)
+        print(f"Scanned {path}: {len(found)} candidate windows")
+        candidates.extend(found)
+
+    picked = pick_top(candidates, args.top_k)
+    if not picked:
+        print("Error: No window long enough to score; try a shorter --window")
+        sys.exit(1)
+
+    writer = None
+    for cand in sorted(picked, key=lambda c: (c.file, c.start)):
+        with AudioSource(cand.file) as source:
+            if writer is None:
+                writer = TrainingAudioWriter(args.output, source.sample_rate, PrepConfig(vad_threshold_db=args.vad_threshold_db))
+            writer.add(source.read_seconds(cand.start, cand.end), source.sample_rate)
+    writer.close()
+
+    report_path = args.report or os.path.splitext(args.output)[0] + ".json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"output": args.output, "picks": [asdict(c) for c in picked]}, f, indent=2)
+    if args.plan:
+        with open(args.plan, "w", encoding="utf-8", newline="") as f:
+            plan = csv.writer(f)
+            plan.writerow(["file", "start", "end"])
+            for cand in picked:
+                plan.writerow([os.path.abspath(cand.file), f"{cand.start:.2f}", f"{cand.end:.2f}"])
+
+    elapsed = time.perf_counter() - start_time
+    for cand in picked:
+        print(f"  {cand.file} {cand.start:8.1f}s-{cand.end:.1f}s score {cand.score:.2f} "
+              f"(SNR {cand.snr_db:.1f} dB, speech {cand.speech_ratio:.0%}, pitch std {cand.pitch_std:.1f} st)")
+    print(f"Wrote {len(picked)} windows to {args.output} and {report_path} "
+          f"({audio_seconds / max(elapsed, 1e-9):.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
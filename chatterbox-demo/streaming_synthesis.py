@@ -0,0 +1,165 @@
+"""
+Sentence-level streaming synthesis for ChatterboxTTS.
+
+Instead of rendering a whole text into one tensor, the text is split into
+sentences (long sentences are split again at clause boundaries) and each
+piece is synthesized and appended to an open sink as soon as it is ready.
+Neighbouring chunks are joined with a short crossfade. Memory stays bounded
+by the longest sentence rather than the length of the text, and the first
+audio is playable after one sentence's worth of inference.
+
+Sinks write 16-bit PCM either as raw samples or as a WAV stream. When the
+destination is seekable the WAV header sizes are patched on close; on pipes
+such as stdout the header carries the "unknown length" sizes that streaming
+players accept.
+
+Usage:
+    python voice_clone_template.py --audio voice.wav --text-file book.txt --stream --output book.wav
+    python voice_clone_template.py --audio voice.wav --text "..." --stream --output - --format raw | aplay -f S16_LE -r 24000
+"""
+
+import re
+import struct
+import time
+
+import numpy as np
+
+DEFAULT_MAX_CHARS = 300
+DEFAULT_CROSSFADE_MS = 20
+
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:—])\s+")
+_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def _split_long(piece, max_chars):
+    """Split an over-long sentence at clause boundaries, then at word boundaries."""
+    chunks = []
+    current = ""
+    for clause in _CLAUSE_END.split(piece):
+        words = clause.split(" ") if len(clause) > max_chars else [clause]
+        for word in words:
+            candidate = f"{current} {word}".strip()
+            if current and len(candidate) > max_chars:
+                chunks.append(current)
+                current = word
+            else:
+                current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_sentences(text, max_chars=DEFAULT_MAX_CHARS):
+    """Yield synthesis-sized chunks of text, one sentence or clause at a time."""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        for sentence in _SENTENCE_END.split(paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            if len(sentence) <= max_chars:
+                yield sentence
+            else:
+                yield from _split_long(sentence, max_chars)
+
+
+class Crossfader:
+    """Joins consecutive chunks with a linear crossfade, holding back only the fade tail."""
+
+    def __init__(self, sample_rate, crossfade_ms=DEFAULT_CROSSFADE_MS):
+        self.fade_len = int(sample_rate * crossfade_ms / 1000)
+        self._tail = np.zeros(0, dtype=np.float32)
+        if self.fade_len:
+            self._fade_in = np.linspace(0.0, 1.0, self.fade_len, dtype=np.float32)
+
+    def push(self, chunk):
+        """Add a chunk and return the samples that are now final."""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if not self.fade_len:
+            return chunk
+
+        overlap = min(len(self._tail), len(chunk))
+        if overlap:
+            fade_in = self._fade_in[:overlap] if overlap == self.fade_len else np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            chunk = chunk.copy()
+            chunk[:overlap] = self._tail[-overlap:] * (1.0 - fade_in) + chunk[:overlap] * fade_in
+            ready = np.concatenate([self._tail[:-overlap], chunk])
+        else:
+            ready = np.concatenate([self._tail, chunk])
+
+        hold = min(self.fade_len, len(ready))
+        self._tail = ready[len(ready) - hold:]
+        return ready[:len(ready) - hold]
+
+    def finish(self):
+        """Return the held-back tail once no more chunks will arrive."""
+        tail, self._tail = self._tail, np.zeros(0, dtype=np.float32)
+        return tail
+
+
+class PcmSink:
+    """Appends float audio as 16-bit mono PCM to a binary stream, optionally as WAV."""
+
+    def __init__(self, stream, sample_rate, fmt="wav"):
+        self.stream = stream
+        self.sample_rate = sample_rate
+        self.fmt = fmt
+        self.frames = 0
+        if fmt == "wav":
+            self._write_header(_UNKNOWN_SIZE)
+
+    def _write_header(self, data_size):
+        riff_size = _UNKNOWN_SIZE if data_size == _UNKNOWN_SIZE else 36 + data_size
+        self.stream.write(struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", riff_size, b"WAVE",
+            b"fmt ", 16, 1, 1, self.sample_rate, self.sample_rate * 2, 2, 16,
+            b"data", data_size,
+        ))
+
+    def write(self, samples):
+        """Append samples in [-1, 1] and flush them to the stream."""
+        if len(samples) == 0:
+            return
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+        self.stream.write(pcm.tobytes())
+        self.stream.flush()
+        self.frames += len(pcm)
+
+    def close(self):
+        """Patch the WAV header with the final sizes when the stream allows it."""
+        if self.fmt == "wav" and self.stream.seekable():
+            self.stream.seek(0)
+            self._write_header(self.frames * 2)
+            self.stream.seek(0, 2)
+        self.stream.flush()
+
+
+def stream_voice_clone(model, chunks, audio_prompt_path, sink, exaggeration=0.5,
+                       cond_cache=None, crossfade_ms=DEFAULT_CROSSFADE_MS):
+    """
+    Synthesize text chunks one after another, writing each to `sink` as soon as it is ready.
+
+    Speaker conditionals are prepared once up front rather than per chunk.
+
+    Returns:
+        tuple: (number of chunks, seconds until the first audio was written)
+    """
+    if cond_cache is not None:
+        model.conds = cond_cache.get(model, audio_prompt_path, exaggeration)
+    else:
+        model.prepare_conditionals(audio_prompt_path, exaggeration=exaggeration)
+
+    crossfader = Crossfader(model.sr, crossfade_ms)
+    start = time.perf_counter()
+    first_audio = None
+    count = 0
+    for count, chunk in enumerate(chunks, start=1):
+        print(f"[{count}] {chunk[:80]}{'...' if len(chunk) > 80 else ''}")
+        wav = model.generate(chunk, exaggeration=exaggeration)
+        sink.write(crossfader.push(wav.squeeze(0).detach().cpu().numpy()))
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+    sink.write(crossfader.finish())
+    return count, first_audio
@@ -0,0 +1,290 @@
+"""
+Multi-process CPU synthesis pool for ChatterboxTTS.
+
+A single inference process leaves most cores of a large render host idle, and
+torch's intra-op threading stops scaling well long before 32 cores. This pool
+starts N worker processes that each hold their own model, pins each one to a
+slice of the available CPUs with a matching torch thread count, and feeds them
+from one shared job queue so faster workers simply take more jobs.
+
+Rendered audio comes back through shared memory: the worker copies the
+samples into a SharedMemory block and only sends its name over the result
+queue, so tensors are never pickled. Each worker holds a full model, so plan
+for the model's memory footprint per worker. A worker that dies mid-job
+(e.g. killed for memory) turns its job into an error result rather than
+leaving results() waiting for it.
+
+Usage:
+    with SynthesisPool(num_workers=8) as pool:
+        pool.submit("line-1", "Hello there", "voice.wav", 0.5)
+        for result in pool.results(1):
+            save(result.wav, result.sample_rate)
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import torch
+
+from conditioning_cache import DEFAULT_CACHE_DIR, ConditioningCache
+from utterance_cache import DEFAULT_MAX_MB, model_tag_for
+
+# How long to wait for a worker to load its model before giving up
+WORKER_START_TIMEOUT = 600
+# Seconds between worker liveness checks while waiting for results
+_POLL_INTERVAL = 1.0
+
+
+@dataclass
+class PoolResult:
+    """Outcome of one pooled synthesis job."""
+
+    job_id: object
+    wav: Optional[torch.Tensor]
+    sample_rate: int
+    worker_id: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def split_cpus(num_workers, cpus=None):
+    """Divide the CPUs this process may run on into one contiguous slice per worker."""
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    per_worker = max(1, len(cpus) // num_workers)
+    slices = []
+    for i in range(num_workers):
+        start = (i * per_worker) % len(cpus)
+        slices.append(cpus[start:start + per_worker])
+    return slices
+
+
+def _worker_main(worker_id, device, cpus, threads, cond_cache_dir, artifact, utterance_cache, warmup, jobs, results):
+    """Worker process: load the model once, then render jobs until told to stop."""
+    import time
+
+    from chatterbox.tts import ChatterboxTTS
+    from utterance_cache import UtteranceCache
+    from voice_clone_template import synthesize
+
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already fixed if anything ran a parallel op during import
+        pass
+
+    try:
+        if artifact:
+            from warm_start import load_artifact
+            model = load_artifact(artifact, device=device)
+        else:
+            model = ChatterboxTTS.from_pretrained(device=device)
+    except Exception as e:
+        results.put(("failed", worker_id, f"Error loading model: {e}"))
+        return
+    cond_cache = ConditioningCache(cond_cache_dir)
+    utt_cache = UtteranceCache(*utterance_cache) if utterance_cache else None
+    if warmup is not None:
+        # Rendered here so every worker is warm, not whichever took the job; never from the utterance cache
+        text, audio, exaggeration = warmup
+        try:
+            synthesize(model, text, audio, exaggeration, cond_cache, None)
+        except Exception as e:
+            results.put(("failed", worker_id, f"Error warming up: {e}"))
+            return
+    results.put(("ready", worker_id, model.sr))
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            if utt_cache is not None:
+                utt_cache.save_stats()
+            break
+        job_id, text, audio, exaggeration = job
+        # Lets the parent fail this job, and only this one, if the worker dies
+        results.put(("started", worker_id, job_id))
+        start = time.perf_counter()
+        try:
+            wav = synthesize(model, text, audio, exaggeration, cond_cache, utt_cache)
+            samples = np.ascontiguousarray(wav.detach().cpu().numpy(), dtype=np.float32)
+        except Exception as e:
+            results.put(("error", worker_id, job_id, str(e), time.perf_counter() - start))
+            continue
+
+        shm = shared_memory.SharedMemory(create=True, size=max(samples.nbytes, 1))
+        np.ndarray(samples.shape, dtype=np.float32, buffer=shm.buf)[...] = samples
+        # The parent attaches, copies and unlinks; the worker only drops its mapping
+        results.put(("ok", worker_id, job_id, shm.name, samples.shape, time.perf_counter() - start))
+        shm.close()
+
+
+class SynthesisPool:
+    """Pool of model-holding worker processes fed from a shared job queue."""
+
+    def __init__(self, num_workers, device="cpu", threads_per_worker=None,
+                 cond_cache_dir=DEFAULT_CACHE_DIR, pin_cpus=True, artifact=None,
+                 utterance_cache_dir=None, utterance_cache_mb=DEFAULT_MAX_MB, warmup=None):
+        self.num_workers = num_workers
+        self.device = device
+        self.cpu_slices = split_cpus(num_workers)
+        self.threads_per_worker = threads_per_worker or len(self.cpu_slices[0])
+        self.cond_cache_dir = cond_cache_dir
+        self.pin_cpus = pin_cpus
+        self.artifact = artifact
+        # Workers share one on-disk utterance cache; entries are written atomically
+        self.utterance_cache = None
+        if utterance_cache_dir:
+            self.utterance_cache = (utterance_cache_dir, utterance_cache_mb, model_tag_for(artifact))
+        # (text, audio_prompt_path, exaggeration) each worker renders before reporting ready
+        self.warmup = warmup
+        self.sample_rate = None
+        self.pending = 0
+        # Submitted jobs no worker has taken yet, and the job each worker is rendering
+        self._queued = {}
+        self._running = {}
+        self._dead = set()
+
+        # Spawn keeps workers independent of the parent's torch thread pools
+        self._ctx = mp.get_context("spawn")
+        self._jobs = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._workers = []
+
+    def start(self):
+        """Start the workers and block until every one has loaded its model."""
+        print(f"Starting {self.num_workers} synthesis workers "
+              f"({self.threads_per_worker} torch threads each)...")
+        for worker_id in range(self.num_workers):
+            proc = self._ctx.Process(
+                target=_worker_main,
+                args=(
+                    worker_id,
+                    self.device,
+                    self.cpu_slices[worker_id] if self.pin_cpus else None,
+                    self.threads_per_worker,
+                    self.cond_cache_dir,
+                    self.artifact,
+                    self.utterance_cache,
+                    self.warmup,
+                    self._jobs,
+                    self._results,
+                ),
+                daemon=True,
+            )
+            proc.start()
+            self._workers.append(proc)
+
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        for _ in range(self.num_workers):
+            while True:
+                try:
+                    message = self._results.get(timeout=_POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    pass
+                # A worker killed while loading (e.g. out of memory) never reports
+                dead = [(i, proc.exitcode) for i, proc in enumerate(self._workers) if not proc.is_alive()]
+                if dead:
+                    # A worker that failed cleanly sent its reason just before exiting
+                    try:
+                        message = self._results.get(timeout=_POLL_INTERVAL)
+                        break
+                    except queue.Empty:
+                        pass
+                    self.close()
+                    worker_id, exitcode = dead[0]
+                    raise RuntimeError(f"Worker {worker_id} exited with code {exitcode} while loading the model")
+                if time.monotonic() > deadline:
+                    self.close()
+                    raise RuntimeError("Timed out waiting for synthesis workers to load the model")
+            if message[0] == "failed":
+                self.close()
+                raise RuntimeError(f"Worker {message[1]} failed to start: {message[2]}")
+            self.sample_rate = message[2]
+        print("Synthesis workers ready")
+        return self
+
+    def submit(self, job_id, text, audio_prompt_path, exaggeration=0.5):
+        """Queue one line for synthesis; job ids must be unique among pending jobs."""
+        self._jobs.put((job_id, text, audio_prompt_path, exaggeration))
+        self._queued[job_id] = None
+        self.pending += 1
+
+    def results(self, count=None):
+        """Yield PoolResult entries as workers finish, until `count` (default: all pending) arrive."""
+        remaining = self.pending if count is None else count
+        while remaining > 0:
+            try:
+                message = self._results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                for result in self._lost_jobs():
+                    self.pending -= 1
+                    remaining -= 1
+                    yield result
+                continue
+
+            if message[0] == "started":
+                _, worker_id, job_id = message
+                self._queued.pop(job_id, None)
+                self._running[worker_id] = job_id
+                continue
+            self._running.pop(message[1], None)
+            self.pending -= 1
+            remaining -= 1
+
+            if message[0] == "error":
+                _, worker_id, job_id, error, seconds = message
+                yield PoolResult(job_id, None, self.sample_rate, worker_id, seconds, error)
+                continue
+
+            _, worker_id, job_id, shm_name, shape, seconds = message
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                wav = torch.from_numpy(np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy())
+            finally:
+                shm.close()
+                shm.unlink()
+            yield PoolResult(job_id, wav, self.sample_rate, worker_id, seconds)
+
+    def _lost_jobs(self):
+        """Error results for jobs that died with their worker, and for every queued job once no worker is left."""
+        lost = []
+        for worker_id, proc in enumerate(self._workers):
+            if worker_id in self._dead or proc.is_alive():
+                continue
+            self._dead.add(worker_id)
+            print(f"Synthesis worker {worker_id} exited unexpectedly (exit code {proc.exitcode})")
+            job_id = self._running.pop(worker_id, None)
+            if job_id is not None:
+                lost.append(PoolResult(job_id, None, self.sample_rate, worker_id, 0.0,
+                                       f"Worker {worker_id} exited with code {proc.exitcode}"))
+        if self._workers and len(self._dead) == len(self._workers):
+            for job_id in self._queued:
+                lost.append(PoolResult(job_id, None, self.sample_rate, -1, 0.0, "All synthesis workers exited"))
+            self._queued.clear()
+        return lost
+
+    def close(self):
+        """Stop all workers after they finish their current job."""
+        for _ in self._workers:
+            self._jobs.put(None)
+        for proc in self._workers:
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+        self._workers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Local HTTP synthesis service around ChatterboxTTS.
+
+Keeps one model resident so many callers can share a warm model instead of
+each cold-starting the template script. ChatterboxTTS.generate renders one
+text at a time, so this is not batching and does not raise throughput:
+a single inference thread interleaves the active requests one sentence at a
+time. Every caller gets its first sentence after about one round over the
+active requests instead of waiting behind whole utterances, and a request
+that arrives mid-round joins at the next one. Speaker conditionals come from
+the shared conditioning cache, so switching voices between steps is free,
+and sentences rendered before (greetings, canned prompts) are read back from
+the utterance cache instead of running inference again.
+
+Audio streams back as chunked 16-bit mono PCM (audio/L16), one sentence at a
+time, joined with the same crossfade as the streaming CLI.
+
+Usage:
+    python synthesis_server.py --voices-dir voices/ --port 8001
+    SYNTHESIS_VOICES_DIR=voices/ uvicorn synthesis_server:app --port 8001
+
+    curl -N -X POST localhost:8001/api/synthesize \\
+        -H 'Content-Type: application/json' \\
+        -d '{"text": "Hello there. How are you?", "voice": "alice"}' \\
+        | aplay -f S16_LE -r 24000 -c 1
+"""
+
+import argparse
+import asyncio
+import os
+import queue
+import threading
+from contextlib import asynccontextmanager
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from conditioning_cache import DEFAULT_CACHE_DIR, ConditioningCache
+from streaming_synthesis import Crossfader, split_sentences
+from utterance_cache import DEFAULT_CACHE_DIR as DEFAULT_UTTERANCE_CACHE_DIR
+from utterance_cache import DEFAULT_MAX_MB, UtteranceCache, model_tag_for
+from voice_clone_template import load_model, synthesize as synthesize_line
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg")
+
+
+class SynthesisRequest(BaseModel):
+    text: str
+    voice: str
+    exaggeration: float = 0.5
+
+
+class _PendingSynthesis:
+    """A request in flight: its remaining sentences and the caller's audio queue."""
+
+    def __init__(self, request, audio_path, loop, sample_rate, crossfade_ms):
+        self.audio_path = audio_path
+        self.exaggeration = request.exaggeration
+        self.sentences = split_sentences(request.text)
+        self.loop = loop
+        self.chunks = asyncio.Queue()
+        self.crossfader = Crossfader(sample_rate, crossfade_ms)
+        self.cancelled = False
+
+    def emit(self, item):
+        """Hand a PCM chunk, an error, or None (end of stream) to the event loop."""
+        self.loop.call_soon_threadsafe(self.chunks.put_nowait, item)
+
+
+def _to_pcm(samples):
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+class SentenceScheduler:
+    """Single inference thread that interleaves active requests one sentence at a time."""
+
+    def __init__(self, model, cond_cache, max_active=8, utt_cache=None):
+        self.model = model
+        self.cond_cache = cond_cache
+        self.utt_cache = utt_cache
+        self.max_active = max_active
+        self.active = []
+        self.rounds = 0
+        self._incoming = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="synthesis-scheduler", daemon=True)
+        self._stopping = False
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping = True
+        self._incoming.put(None)
+        self._thread.join(timeout=30)
+        if self.utt_cache is not None:
+            self.utt_cache.save_stats()
+
+    def submit(self, pending):
+        self._incoming.put(pending)
+
+    @property
+    def queued(self):
+        return self._incoming.qsize()
+
+    def _admit(self):
+        """Move newly arrived requests into the active set, blocking only when idle."""
+        while len(self.active) < self.max_active:
+            try:
+                pending = self._incoming.get() if not self.active else self._incoming.get_nowait()
+            except queue.Empty:
+                return
+            if pending is None:
+                return
+            self.active.append(pending)
+
+    def _step(self, pending):
+        """Synthesize the next sentence of one request. Returns False once it is finished."""
+        if pending.cancelled:
+            return False
+        sentence = next(pending.sentences, None)
+        if sentence is None:
+            pending.emit(_to_pcm(pending.crossfader.finish()))
+            pending.emit(None)
+            return False
+        try:
+            wav = synthesize_line(self.model, sentence, pending.audio_path, pending.exaggeration,
+                                  self.cond_cache, self.utt_cache)
+        except Exception as e:
+            pending.emit(e)
+            return False
+        pending.emit(_to_pcm(pending.crossfader.push(wav.squeeze(0).detach().cpu().numpy())))
+        return True
+
+    def _run(self):
+        while not self._stopping:
+            # Late arrivals join at the start of the next round
+            self._admit()
+            if not self.active:
+                continue
+            self.rounds += 1
+            # Order by voice so consecutive steps reuse the same conditionals
+            self.active.sort(key=lambda p: (p.audio_path, p.exaggeration))
+            self.active = [p for p in self.active if self._step(p)]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # main() sets the config; under a plain `uvicorn synthesis_server:app` the
+    # defaults and SYNTHESIS_* environment variables apply
+    config = getattr(app.state, "config", None) or build_parser().parse_args([])
+    if not os.path.isdir(config.voices_dir):
+        raise RuntimeError(f"Voices directory {config.voices_dir} not found")
+    app.state.config = config
+    model = load_model(config.device, config.artifact)
+    app.state.sample_rate = model.sr
+    utt_cache = None
+    if not config.no_utterance_cache:
+        utt_cache = UtteranceCache(
+            config.utterance_cache_dir, config.utterance_cache_mb, model_tag_for(config.artifact)
+        )
+    app.state.scheduler = SentenceScheduler(
+        model,
+        ConditioningCache(config.cond_cache_dir),
+        max_active=config.max_active,
+        utt_cache=utt_cache,
+    )
+    app.state.scheduler.start()
+    yield
+    app.state.scheduler.stop()
+
+
+app = FastAPI(
+    title="Voice Cloning Synthesis API",
+    description="Local ChatterboxTTS synthesis service with sentence-interleaved streaming",
+    version="0.1.0",
+    lifespan=lifespan,
+)
+
+
+def _voice_path(voice):
+    """Resolve a voice name to a prompt file inside the voices directory."""
+    voices_dir = app.state.config.voices_dir
+    if os.path.basename(voice) != voice:
+        raise HTTPException(status_code=400, detail="Voice must be a plain name")
+    for ext in ("",) + AUDIO_EXTENSIONS:
+        path = os.path.join(voices_dir, voice + ext)
+        if os.path.isfile(path):
+            return path
+    raise HTTPException(status_code=404, detail=f"Voice not found: {voice}")
+
+
+@app.get("/health")
+async def health():
+    """Health check endpoint"""
+    scheduler = app.state.scheduler
+    utt_cache = scheduler.utt_cache
+    return {
+        "status": "healthy",
+        "active": len(scheduler.active),
+        "queued": scheduler.queued,
+        "rounds": scheduler.rounds,
+        "utterance_cache_hits": utt_cache.hits if utt_cache else 0,
+        "utterance_cache_misses": utt_cache.misses if utt_cache else 0,
+    }
+
+
+@app.get("/api/voices")
+async def list_voices():
+    """List the voice prompts available for synthesis"""
+    voices_dir = app.state.config.voices_dir
+    voices = sorted(
+        os.path.splitext(name)[0]
+        for name in os.listdir(voices_dir)
+        if name.lower().endswith(AUDIO_EXTENSIONS)
+    )
+    return {"voices": voices, "sample_rate": app.state.sample_rate}
+
+
+@app.post("/api/synthesize")
+async def synthesize(request: SynthesisRequest):
+    """
+    Synthesize text with a cloned voice.
+
+    Returns:
+        Chunked 16-bit mono PCM, one sentence per chunk as soon as it is rendered
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Text cannot be empty")
+
+    pending = _PendingSynthesis(
+        request,
+        _voice_path(request.voice),
+        asyncio.get_running_loop(),
+        app.state.sample_rate,
+        app.state.config.crossfade_ms,
+    )
+    app.state.scheduler.submit(pending)
+
+    # Wait for the first sentence so failures up front still get a proper status
+    try:
+        first = await pending.chunks.get()
+    except asyncio.CancelledError:
+        pending.cancelled = True
+        raise
+    if isinstance(first, Exception):
+        raise HTTPException(status_code=500, detail=f"Failed to synthesize: {str(first)}")
+
+    async def stream():
+        item = first
+        try:
+            while item is not None:
+                if isinstance(item, Exception):
+                    # Headers are already sent, so the error can only abort the stream
+                    raise item
+                if item:
+                    yield item
+                item = await pending.chunks.get()
+        finally:
+            # Stop rendering for callers that went away mid-stream
+            pending.cancelled = True
+
+    sample_rate = app.state.sample_rate
+    return StreamingResponse(
+        stream(),
+        media_type=f"audio/L16; rate={sample_rate}; channels=1",
+        headers={"X-Sample-Rate": str(sample_rate)},
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve ChatterboxTTS synthesis over HTTP")
+    parser.add_argument("--voices-dir", default=os.environ.get("SYNTHESIS_VOICES_DIR", "voices"),
+                       help="Directory of voice prompt files, addressed by file name without extension "
+                            "(default: SYNTHESIS_VOICES_DIR or voices)")
+    parser.add_argument("--host", default="0.0.0.0",
+                       help="Interface to bind (default: 0.0.0.0)")
+    parser.add_argument("--port", "-p", type=int, default=8001,
+                       help="Port to listen on (default: 8001)")
+    parser.add_argument("--device", "-d", default=os.environ.get("SYNTHESIS_DEVICE", "cpu"),
+                       choices=["cpu", "cuda"],
+                       help="Device to use for inference (default: SYNTHESIS_DEVICE or cpu)")
+    parser.add_argument("--artifact", default=os.environ.get("SYNTHESIS_ARTIFACT"),
+                       help="Load the model from a warm-start artifact built with warm_start.py "
+                            "(default: SYNTHESIS_ARTIFACT)")
+    parser.add_argument("--max-active", type=int, default=8,
+                       help="Requests rendered in turn, one sentence each per round; "
+                            "later ones wait in a queue (default: 8)")
+    parser.add_argument("--crossfade-ms", type=float, default=20,
+                       help="Crossfade between sentences in ms (default: 20)")
+    parser.add_argument("--cond-cache-dir", default=DEFAULT_CACHE_DIR,
+                       help=f"Directory for cached speaker conditionals (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--utterance-cache-dir", default=DEFAULT_UTTERANCE_CACHE_DIR,
+                       help=f"Directory for cached rendered sentences (default: {DEFAULT_UTTERANCE_CACHE_DIR})")
+    parser.add_argument("--utterance-cache-mb", type=float, default=DEFAULT_MAX_MB,
+                       help=f"Size limit of the rendered sentence cache in MB (default: {DEFAULT_MAX_MB})")
+    parser.add_argument("--no-utterance-cache", action="store_true",
+                       help="Always run inference, even for sentences rendered before")
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.voices_dir):
+        parser.error(f"Voices directory {args.voices_dir} not found")
+
+    app.state.config = args
+    print(f"🚀 Starting synthesis server on port {args.port}...")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
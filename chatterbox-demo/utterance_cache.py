@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of rendered utterances.
+
+Greetings, IVR prompts and demo lines repeat the same (text, voice,
+exaggeration) combinations constantly. This cache stores the rendered PCM on
+disk under a hash of those inputs, so a repeat costs a file read instead of
+seconds of inference. The voice is identified by its prompt file's content
+hash, so editing or replacing a prompt naturally invalidates its lines.
+
+Entries are raw float32 sample files named after their key. Reads touch the
+file's mtime, and when the directory grows past its size limit the least
+recently used entries are evicted. The size is tracked in memory after one
+initial scan, so a put only rescans the directory when it crosses the limit.
+Hit and miss counters are kept in a small stats file next to the entries,
+updated under a file lock so pool workers saving at once keep every count.
+
+Usage:
+    python utterance_cache.py stats
+    python utterance_cache.py prune --max-mb 512
+    python utterance_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: stats updates are not locked
+    fcntl = None
+
+import numpy as np
+import torch
+
+from conditioning_cache import file_sha256
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "voice-clone", "utterances")
+DEFAULT_MAX_MB = 1024
+
+_STATS_FILE = "stats.json"
+_STATS_LOCK = "stats.lock"
+_ENTRY_SUFFIX = ".f32"
+# A put that crosses the limit prunes down to this share of it, so a full
+# cache rescans once per several puts rather than on every one
+_PRUNE_TO = 0.9
+
+
+def model_tag_for(artifact=None):
+    """Identify which weights rendered an entry: the pretrained model or a warm-start artifact."""
+    return f"artifact:{os.path.abspath(artifact)}" if artifact else "pretrained"
+
+
+class UtteranceCache:
+    """Size-bounded LRU of rendered audio on disk, keyed by text, voice and exaggeration."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB, model_tag="pretrained"):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        # Renders from different weights (e.g. a quantized artifact) never share entries
+        self.model_tag = model_tag
+        self.hits = 0
+        self.misses = 0
+        self._voice_hashes = {}
+        # Bytes of entries on disk, counted on the first put; other processes
+        # sharing the directory are only seen at the next prune's rescan
+        self._total_bytes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _voice_hash(self, audio_prompt_path):
+        stat = os.stat(audio_prompt_path)
+        stamp = (os.path.abspath(audio_prompt_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._voice_hashes.get(stamp)
+        if digest is None:
+            digest = file_sha256(audio_prompt_path)
+            self._voice_hashes[stamp] = digest
+        return digest
+
+    def key(self, text, audio_prompt_path, exaggeration):
+        """Content address of one rendering."""
+        voice = self._voice_hash(audio_prompt_path)
+        payload = json.dumps([text, voice, round(float(exaggeration), 4), self.model_tag])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + _ENTRY_SUFFIX)
+
+    def get(self, text, audio_prompt_path, exaggeration):
+        """Return the cached (1, N) waveform tensor, or None on a miss."""
+        path = self._path(self.key(text, audio_prompt_path, exaggeration))
+        try:
+            samples = np.fromfile(path, dtype="<f4")
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return torch.from_numpy(samples).unsqueeze(0)
+
+    def put(self, text, audio_prompt_path, exaggeration, wav):
+        """Store a rendered waveform and evict old entries if over the size limit."""
+        path = self._path(self.key(text, audio_prompt_path, exaggeration))
+        samples = np.ascontiguousarray(wav.detach().cpu().numpy().reshape(-1), dtype="<f4")
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self.entries())
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        samples.tofile(tmp_path)
+        os.replace(tmp_path, path)
+        self._total_bytes += samples.nbytes - replaced
+        if self._total_bytes > self.max_bytes:
+            self.prune(int(self.max_bytes * _PRUNE_TO))
+
+    def entries(self):
+        """(path, size, mtime) of every entry."""
+        result = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(_ENTRY_SUFFIX):
+                    stat = entry.stat()
+                    result.append((entry.path, stat.st_size, stat.st_mtime))
+        return result
+
+    def prune(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits. Returns bytes freed."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total - freed <= limit:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total - freed
+        return freed
+
+    def clear(self):
+        """Remove every entry and reset the stats."""
+        for path, _, _ in self.entries():
+            os.remove(path)
+        self._total_bytes = 0
+        with self._stats_lock():
+            stats_path = os.path.join(self.cache_dir, _STATS_FILE)
+            if os.path.exists(stats_path):
+                os.remove(stats_path)
+
+    @contextmanager
+    def _stats_lock(self):
+        """Serialize stats updates across processes sharing the cache directory."""
+        with open(os.path.join(self.cache_dir, _STATS_LOCK), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Released when the file is closed, or by the OS if the process dies
+            yield
+
+    def load_stats(self):
+        """Lifetime hit/miss counters persisted by earlier runs."""
+        try:
+            with open(os.path.join(self.cache_dir, _STATS_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def save_stats(self):
+        """Fold this run's counters into the persisted totals."""
+        path = os.path.join(self.cache_dir, _STATS_FILE)
+        with self._stats_lock():
+            stats = self.load_stats()
+            stats["hits"] += self.hits
+            stats["misses"] += self.misses
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stats, f)
+            os.replace(tmp_path, path)
+        self.hits = self.misses = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the rendered-utterance cache")
+    parser.add_argument("command", choices=["stats", "prune", "clear"],
+                       help="stats: show usage and hit rate, prune: evict down to --max-mb, "
+                            "clear: delete everything")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                       help=f"Cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB,
+                       help=f"Size limit for prune (default: {DEFAULT_MAX_MB})")
+    args = parser.parse_args()
+
+    cache = UtteranceCache(args.cache_dir, args.max_mb)
+    if args.command == "stats":
+        entries = cache.entries()
+        stats = cache.load_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = f"{stats['hits'] / lookups:.1%}" if lookups else "n/a"
+        print(f"Cache directory: {cache.cache_dir}")
+        total_mb = sum(size for _, size, _ in entries) / (1024 * 1024)
+        print(f"Entries: {len(entries)} ({total_mb:.1f} MB)")
+        print(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {hit_rate}")
+    elif args.command == "prune":
+        freed = cache.prune()
+        print(f"Freed {freed / (1024 * 1024):.1f} MB")
+    else:
+        cache.clear()
+        print("Cache cleared")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,23 @@ This template demonstrates how to:
 Usage:
     python voice_clone_template.py --audio path/to/your_voice.wav --text "Text to synthesize" --output output.wav
 
+Batch mode renders a whole manifest with one model load:
+    python voice_clone_template.py --manifest lines.jsonl --report report.jsonl
+
+Streaming mode writes audio sentence by sentence as it is synthesized:
+    python voice_clone_template.py --audio voice.wav --text-file book.txt --stream --output book.wav
+
+Add --workers N to spread a manifest over N model-holding CPU worker
+processes (see synthesis_pool.py).
+
+Speaker conditionals for each voice prompt are cached in memory and on disk
+(see conditioning_cache.py), so repeated runs against the same audio skip the
+speaker-encoding step. Use --no-cond-cache to disable this.
+
+Rendered lines are cached too (see utterance_cache.py): repeating the same
+text, voice and exaggeration reads the audio back from disk instead of running
+inference again. Use --no-utterance-cache to always render.
+
 Requirements:
     - ChatterboxTTS installed
     - Audio file with clear speech (2+ minutes recommended)
@@ -18,21 +35,43 @@ Requirements:
 """
 
 import argparse
+import contextlib
 import os
 import sys
 import torchaudio as ta
+from chatterbox.models.s3gen import S3GEN_SR
 from chatterbox.tts import ChatterboxTTS
 
+from audio_source import AudioFormatError, AudioSource, sniff_format
+from conditioning_cache import DEFAULT_CACHE_DIR, ConditioningCache
+from utterance_cache import DEFAULT_CACHE_DIR as DEFAULT_UTTERANCE_CACHE_DIR
+from utterance_cache import DEFAULT_MAX_MB, UtteranceCache, model_tag_for
+
 
-def load_model(device="cpu"):
-    """Load the ChatterboxTTS model."""
+def load_model(device="cpu", artifact=None):
+    """Load the ChatterboxTTS model, from a warm-start artifact when one is given.
+
+    Raises RuntimeError if the model cannot be loaded.
+    """
     print("Loading ChatterboxTTS model...")
     try:
-        model = ChatterboxTTS.from_pretrained(device=device)
-        print(f"Model loaded successfully on {device}")
-        return model
+        if artifact:
+            from warm_start import load_artifact
+            model = load_artifact(artifact, device=device)
+        else:
+            model = ChatterboxTTS.from_pretrained(device=device)
     except Exception as e:
-        print(f"Error loading model: {e}")
+        raise RuntimeError(f"Error loading model: {e}") from e
+    print(f"Model loaded successfully on {device}")
+    return model
+
+
+def load_model_or_exit(device="cpu", artifact=None):
+    """load_model for the command line: print the error and exit on failure."""
+    try:
+        return load_model(device, artifact)
+    except RuntimeError as e:
+        print(e)
         sys.exit(1)
 
 
@@ -43,26 +82,55 @@ def validate_audio_file(audio_path):
         sys.exit(1)
     
     try:
-        # Try to load the audio file to verify it's valid
-        ta.load(audio_path)
+        # The model decodes the prompt itself, so nothing is decoded here: PCM and
+        # float WAVs are checked from the header, other files by their leading bytes
+        with AudioSource(audio_path) as source:
+            if source.is_mapped and source.num_frames == 0:
+                raise AudioFormatError("file contains no audio")
+            if not source.is_mapped and sniff_format(audio_path) is None:
+                raise AudioFormatError("not a recognized audio container")
         print(f"Audio file validated: {audio_path}")
     except Exception as e:
         print(f"Error: Invalid audio file {audio_path}: {e}")
         sys.exit(1)
 
 
-def generate_voice_clone(model, text, audio_prompt_path, exaggeration=0.5):
-    """Generate cloned voice audio."""
-    print("Generating cloned voice audio...")
-    print(f"Text: {text[:100]}{'...' if len(text) > 100 else ''}")
+def open_utterance_cache(args):
+    """Build the rendered-utterance cache from the CLI options, or None when disabled."""
+    if args.no_utterance_cache:
+        return None
+    return UtteranceCache(args.utterance_cache_dir, args.utterance_cache_mb, model_tag_for(args.artifact))
+
+
+def synthesize(model, text, audio_prompt_path, exaggeration=0.5, cond_cache=None, utt_cache=None):
+    """Run inference for one line, raising on failure."""
+    if utt_cache is not None:
+        wav = utt_cache.get(text, audio_prompt_path, exaggeration)
+        if wav is not None:
+            return wav
     
-    try:
+    if cond_cache is not None:
+        model.conds = cond_cache.get(model, audio_prompt_path, exaggeration)
+        wav = model.generate(text, exaggeration=exaggeration)
+    else:
         wav = model.generate(
             text, 
             audio_prompt_path=audio_prompt_path, 
             exaggeration=exaggeration
         )
-        return wav
+    
+    if utt_cache is not None:
+        utt_cache.put(text, audio_prompt_path, exaggeration, wav)
+    return wav
+
+
+def generate_voice_clone(model, text, audio_prompt_path, exaggeration=0.5, cond_cache=None, utt_cache=None):
+    """Generate cloned voice audio."""
+    print("Generating cloned voice audio...")
+    print(f"Text: {text[:100]}{'...' if len(text) > 100 else ''}")
+    
+    try:
+        return synthesize(model, text, audio_prompt_path, exaggeration, cond_cache, utt_cache)
     except Exception as e:
         print(f"Error generating audio: {e}")
         sys.exit(1)
@@ -78,21 +146,150 @@ def save_audio(wav, output_path, sample_rate):
         sys.exit(1)
 
 
+def run_manifest(args):
+    """Render every line of a batch manifest with a single loaded model."""
+    from batch_synthesis import load_manifest
+
+    try:
+        jobs = load_manifest(args.manifest, default_exaggeration=args.exaggeration)
+    except Exception as e:
+        print(f"Error reading manifest {args.manifest}: {e}")
+        sys.exit(1)
+    
+    if args.workers > 1:
+        from synthesis_pool import SynthesisPool
+        from batch_synthesis import run_batch_pool
+
+        try:
+            with SynthesisPool(args.workers, args.device, args.threads_per_worker,
+                               None if args.no_cond_cache else args.cond_cache_dir,
+                               artifact=args.artifact,
+                               utterance_cache_dir=None if args.no_utterance_cache else args.utterance_cache_dir,
+                               utterance_cache_mb=args.utterance_cache_mb) as pool:
+                counts = run_batch_pool(pool, jobs, args.report, args.overwrite)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    else:
+        counts = run_manifest_inline(args, jobs)
+    
+    print(f"Batch complete: {counts['ok']} rendered, {counts['skipped']} skipped, {counts['error']} failed")
+    if counts["error"]:
+        sys.exit(1)
+
+
+def run_manifest_inline(args, jobs):
+    """Render a manifest in this process."""
+    import functools
+
+    from batch_synthesis import run_batch
+
+    utt_cache = open_utterance_cache(args)
+    model = load_model_or_exit(args.device, args.artifact)
+    # Keep conditionals in memory even without the disk cache so each voice
+    # group is only encoded once
+    cond_cache = ConditioningCache(None if args.no_cond_cache else args.cond_cache_dir)
+    try:
+        return run_batch(model, jobs, functools.partial(synthesize, utt_cache=utt_cache),
+                         cond_cache, args.report, args.overwrite)
+    finally:
+        if utt_cache is not None:
+            utt_cache.save_stats()
+
+
+def run_stream(args):
+    """Synthesize sentence by sentence into a file or stdout ("-")."""
+    from streaming_synthesis import PcmSink, split_sentences, stream_voice_clone
+
+    to_stdout = args.output == "-"
+    out = sys.stdout.buffer if to_stdout else open(args.output, "wb")
+    # Keep progress messages out of the audio stream when writing to stdout
+    with contextlib.redirect_stdout(sys.stderr if to_stdout else sys.stdout):
+        validate_audio_file(args.audio)
+        if not args.text.strip():
+            print("Error: Text cannot be empty!")
+            sys.exit(1)
+        
+        model = load_model_or_exit(args.device, args.artifact)
+        cond_cache = None if args.no_cond_cache else ConditioningCache(args.cond_cache_dir)
+        sink = PcmSink(out, model.sr, args.format)
+        try:
+            count, first_audio = stream_voice_clone(
+                model, split_sentences(args.text), args.audio, sink,
+                args.exaggeration, cond_cache, args.crossfade_ms,
+            )
+        except Exception as e:
+            print(f"Error generating audio: {e}")
+            sys.exit(1)
+        finally:
+            sink.close()
+            if not to_stdout:
+                out.close()
+        
+        print(f"Streamed {count} chunks ({sink.frames / model.sr:.1f}s of audio, "
+              f"first audio after {first_audio or 0:.2f}s) to {'stdout' if to_stdout else args.output}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate voice clones using ChatterboxTTS")
-    parser.add_argument("--audio", "-a", required=True, 
+    parser.add_argument("--audio", "-a",
                        help="Path to audio file for voice cloning (WAV format recommended)")
-    parser.add_argument("--text", "-t", required=True,
+    parser.add_argument("--text", "-t",
                        help="Text to synthesize with the cloned voice")
+    parser.add_argument("--text-file",
+                       help="Read the text to synthesize from a file instead of --text")
     parser.add_argument("--output", "-o", default="cloned_voice.wav",
                        help="Output file path (default: cloned_voice.wav)")
     parser.add_argument("--exaggeration", "-e", type=float, default=0.5,
                        help="Exaggeration factor (0.0-1.0, default: 0.5)")
     parser.add_argument("--device", "-d", default="cpu", choices=["cpu", "cuda"],
                        help="Device to use for inference (default: cpu)")
+    parser.add_argument("--artifact",
+                       help="Load the model from a warm-start artifact built with warm_start.py")
+    parser.add_argument("--cond-cache-dir", default=DEFAULT_CACHE_DIR,
+                       help=f"Directory for cached speaker conditionals (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cond-cache", action="store_true",
+                       help="Recompute speaker conditionals on every call")
+    parser.add_argument("--utterance-cache-dir", default=DEFAULT_UTTERANCE_CACHE_DIR,
+                       help=f"Directory for cached rendered audio (default: {DEFAULT_UTTERANCE_CACHE_DIR})")
+    parser.add_argument("--utterance-cache-mb", type=float, default=DEFAULT_MAX_MB,
+                       help=f"Size limit of the rendered audio cache in MB (default: {DEFAULT_MAX_MB})")
+    parser.add_argument("--no-utterance-cache", action="store_true",
+                       help="Always run inference, even for lines rendered before")
+    parser.add_argument("--manifest", "-m",
+                       help="Batch mode: JSONL/CSV manifest of text, audio, exaggeration and output")
+    parser.add_argument("--report", default=None,
+                       help="Batch mode: append per-item results to this JSONL file")
+    parser.add_argument("--overwrite", action="store_true",
+                       help="Batch mode: re-render outputs that already exist")
+    parser.add_argument("--workers", "-w", type=int, default=1,
+                       help="Batch mode: number of model-holding worker processes (default: 1)")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                       help="Batch mode: torch threads per worker (default: CPUs / workers)")
+    parser.add_argument("--stream", action="store_true",
+                       help="Synthesize sentence by sentence, appending audio to the output as it is ready")
+    parser.add_argument("--format", default="wav", choices=["wav", "raw"],
+                       help="Streaming mode: output container, raw is 16-bit mono PCM (default: wav)")
+    parser.add_argument("--crossfade-ms", type=float, default=20,
+                       help="Streaming mode: crossfade between sentences in ms (default: 20)")
     
     args = parser.parse_args()
     
+    if args.manifest:
+        run_manifest(args)
+        return
+    
+    if args.text_file:
+        with open(args.text_file, "r", encoding="utf-8") as f:
+            args.text = f.read()
+    
+    if not args.audio or args.text is None:
+        parser.error("--audio and --text are required unless --manifest is given")
+    
+    if args.stream:
+        run_stream(args)
+        return
+    
     # Validate inputs
     validate_audio_file(args.audio)
     
@@ -100,9 +297,24 @@ def main():
         print("Error: Text cannot be empty!")
         sys.exit(1)
     
+    # A cached line needs neither the model nor inference
+    utt_cache = open_utterance_cache(args)
+    if utt_cache is not None:
+        wav = utt_cache.get(args.text, args.audio, args.exaggeration)
+        if wav is not None:
+            utt_cache.save_stats()
+            print("Using cached rendering")
+            save_audio(wav, args.output, S3GEN_SR)
+            print("Voice cloning completed successfully!")
+            return
+    
     # Load model and generate
-    model = load_model(args.device)
-    wav = generate_voice_clone(model, args.text, args.audio, args.exaggeration)
+    model = load_model_or_exit(args.device, args.artifact)
+    cond_cache = None if args.no_cond_cache else ConditioningCache(args.cond_cache_dir)
+    wav = generate_voice_clone(model, args.text, args.audio, args.exaggeration, cond_cache)
+    if utt_cache is not None:
+        utt_cache.put(args.text, args.audio, args.exaggeration, wav)
+        utt_cache.save_stats()
     save_audio(wav, args.output, model.sr)
     
     print("Voice cloning completed successfully!")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Warm-start model artifacts for ChatterboxTTS.
+
+ChatterboxTTS.from_pretrained checks the Hugging Face cache, builds every
+module with freshly initialized random weights and then copies the
+checkpoint over them, which dominates startup for short jobs. This module
+prepares a local artifact once and loads it much faster:
+
+- All weights go into a single torch file that is loaded with mmap=True and
+  assigned directly to the modules, so pages are only read when touched.
+- Modules are constructed with random initialization skipped, since every
+  parameter is overwritten from the artifact anyway.
+- Optionally, the T3 transformer's linear layers are dynamically quantized
+  to int8 for CPU inference, which shrinks the artifact and speeds up the
+  token generation loop.
+
+Usage:
+    python warm_start.py build --output artifacts/chatterbox-int8
+    python voice_clone_template.py --artifact artifacts/chatterbox-int8 --audio voice.wav --text "Hello"
+
+See benchmark_warm_start.py for load time, RSS, realtime factor and output
+similarity against the default path.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+
+import torch
+import torch.nn as nn
+from chatterbox.tts import REPO_ID, ChatterboxTTS, Conditionals
+from chatterbox.models.s3gen import S3Gen
+from chatterbox.models.t3 import T3
+from chatterbox.models.tokenizers import EnTokenizer
+from chatterbox.models.voice_encoder import VoiceEncoder
+from huggingface_hub import hf_hub_download
+from transformers.modeling_utils import no_init_weights
+
+ARTIFACT_VERSION = 1
+WEIGHTS_FILE = "model.pt"
+META_FILE = "meta.json"
+
+_RANDOM_INITS = (
+    "uniform_", "normal_", "trunc_normal_", "kaiming_uniform_", "kaiming_normal_",
+    "xavier_uniform_", "xavier_normal_", "orthogonal_",
+)
+
+
+@contextlib.contextmanager
+def skip_weight_init():
+    """Turn random weight initialization into a no-op while modules are built."""
+    originals = {name: getattr(nn.init, name) for name in _RANDOM_INITS}
+    try:
+        for name in _RANDOM_INITS:
+            setattr(nn.init, name, lambda tensor, *args, **kwargs: tensor)
+        # The T3 backbone is a transformers model that initializes its own weights
+        with no_init_weights():
+            yield
+    finally:
+        for name, fn in originals.items():
+            setattr(nn.init, name, fn)
+
+
+def quantize_t3(t3):
+    """Dynamically quantize the T3 transformer's linear layers to int8 in place."""
+    return torch.ao.quantization.quantize_dynamic(t3, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def build_artifact(output_dir, quantize=True):
+    """Load the pretrained model once and save it as a warm-start artifact."""
+    os.makedirs(output_dir, exist_ok=True)
+    print("Loading ChatterboxTTS model...")
+    model = ChatterboxTTS.from_pretrained(device="cpu")
+
+    if quantize:
+        print("Quantizing T3 linear layers to int8...")
+        quantize_t3(model.t3)
+
+    torch.save(
+        {
+            "t3": model.t3.state_dict(),
+            "s3gen": model.s3gen.state_dict(),
+            "ve": model.ve.state_dict(),
+        },
+        os.path.join(output_dir, WEIGHTS_FILE),
+    )
+    if model.conds is not None:
+        model.conds.save(os.path.join(output_dir, "conds.pt"))
+    shutil.copyfile(hf_hub_download(repo_id=REPO_ID, filename="tokenizer.json"),
+                    os.path.join(output_dir, "tokenizer.json"))
+
+    with open(os.path.join(output_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": ARTIFACT_VERSION,
+            "quantized": quantize,
+            "torch": torch.__version__,
+        }, f, indent=2)
+    print(f"Artifact written to {output_dir}")
+
+
+def load_artifact(artifact_dir, device="cpu"):
+    """Build a ChatterboxTTS model from a warm-start artifact."""
+    with open(os.path.join(artifact_dir, META_FILE), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported artifact version {meta.get('version')}; rebuild it with warm_start.py build")
+    if meta["quantized"] and device != "cpu":
+        raise ValueError("Quantized artifacts only run on CPU")
+
+    state = torch.load(os.path.join(artifact_dir, WEIGHTS_FILE), map_location="cpu", mmap=True, weights_only=True)
+
+    with skip_weight_init():
+        t3 = T3()
+        s3gen = S3Gen()
+        ve = VoiceEncoder()
+    if meta["quantized"]:
+        quantize_t3(t3)
+
+    # assign=True keeps the memory-mapped tensors instead of copying into fresh ones
+    t3.load_state_dict(state["t3"], assign=True)
+    s3gen.load_state_dict(state["s3gen"], assign=True)
+    ve.load_state_dict(state["ve"], assign=True)
+    for module in (t3, s3gen, ve):
+        module.to(device).eval()
+
+    tokenizer = EnTokenizer(os.path.join(artifact_dir, "tokenizer.json"))
+    conds = None
+    conds_path = os.path.join(artifact_dir, "conds.pt")
+    if os.path.exists(conds_path):
+        conds = Conditionals.load(conds_path, map_location="cpu").to(device)
+
+    return ChatterboxTTS(t3, s3gen, ve, tokenizer, device, conds=conds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare warm-start ChatterboxTTS artifacts")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Save the pretrained model as a fast-loading artifact")
+    build.add_argument("--output", "-o", required=True,
+                       help="Directory to write the artifact to")
+    build.add_argument("--no-quantize", action="store_true",
+                       help="Keep full-precision weights (needed for CUDA)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_artifact(args.output, quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()